@@ -4,7 +4,9 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
-from app.models.user_model import Base  # adjust "myapp.models" to the actual location of your Base
+from app.models.user_model import Base, TRIGRAM_INDEXES  # adjust "myapp.models" to the actual location of your Base
+import app.models.email_outbox_model  # noqa: F401 - registers the table on Base.metadata
+import app.models.refresh_token_model  # noqa: F401
 
 
 # this is the Alembic Config object, which provides
@@ -22,6 +24,11 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # The pg_trgm indexes exist in migrations only; see app.models.user_model.TRIGRAM_INDEXES
+    return not (type_ == "index" and reflected and compare_to is None and name in TRIGRAM_INDEXES)
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -44,6 +51,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -67,7 +75,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
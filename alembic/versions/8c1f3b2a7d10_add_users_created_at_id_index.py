@@ -0,0 +1,26 @@
+"""add users (created_at, id) index for keyset pagination
+
+Revision ID: 8c1f3b2a7d10
+Revises: 25d814bc83ed
+Create Date: 2026-10-18 09:12:31.402511
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1f3b2a7d10'
+down_revision: Union[str, None] = '25d814bc83ed'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_created_at_id', table_name='users')
@@ -0,0 +1,42 @@
+"""add user search indexes
+
+Revision ID: 9d4e7a1c2b36
+Revises: 5b7d2e8f9a13
+Create Date: 2026-10-18 15:26:40.913207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4e7a1c2b36'
+down_revision: Union[str, None] = '5b7d2e8f9a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_DOCUMENT = (
+    "to_tsvector('simple'::regconfig, coalesce(nickname, '') || ' ' || coalesce(email, '') || ' ' || "
+    "coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || coalesce(bio, ''))"
+)
+TRIGRAM_COLUMNS = ('nickname', 'email', 'first_name', 'last_name')
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Built concurrently so a populated users table stays writable meanwhile
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_search_document', 'users', [sa.text(SEARCH_DOCUMENT)], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True)
+        for column in TRIGRAM_COLUMNS:
+            op.create_index(f'ix_users_{column}_trgm', 'users', [column], unique=False, postgresql_using='gin',
+                            postgresql_ops={column: 'gin_trgm_ops'}, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in TRIGRAM_COLUMNS:
+            op.drop_index(f'ix_users_{column}_trgm', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_search_document', table_name='users', postgresql_concurrently=True)
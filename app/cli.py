@@ -0,0 +1,68 @@
+"""
+Command line tools, run against the configured database:
+
+    python -m app.cli import-users users.csv
+
+`import-users` does what `POST /api/users/import` does, reading the file instead of a request
+body; the format is taken from the file extension unless `--format` is given. It prints the
+import report as JSON and exits with status 1 if any row failed.
+"""
+
+from builtins import int, open, print, str
+import argparse
+import asyncio
+import json
+import sys
+from typing import AsyncIterator, List, Optional
+from app.database import Database
+from app.dependencies import get_email_service, get_import_password_service
+from app.services.user_import_service import UserImportService
+from app.utils.exports import ExportFormat
+from app.utils.imports import csv_records, ndjson_records
+from settings.config import get_settings
+
+CHUNK_SIZE = 64 * 1024
+
+
+async def _file_chunks(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as file:
+        while True:
+            chunk = await asyncio.to_thread(file.read, CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def import_users(path: str, format: ExportFormat) -> dict:
+    settings = get_settings()
+    Database.initialize(settings.database_url, pool_size=1, max_overflow=0)
+    password_service = get_import_password_service()
+    try:
+        async with Database.get_session_factory()() as session:
+            chunks = _file_chunks(path)
+            records = ndjson_records(chunks) if format == ExportFormat.ndjson else csv_records(chunks)
+            return await UserImportService.import_users(
+                session, records, password_service, get_email_service(), settings.import_batch_size
+            )
+    finally:
+        password_service.shutdown()
+        await Database._engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import-users", help="create users in bulk from a CSV or NDJSON file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=[format.value for format in ExportFormat])
+    args = parser.parse_args(argv)
+
+    format = ExportFormat(args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson"))
+    report = asyncio.run(import_users(args.path, format))
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,158 @@
-from builtins import Exception, dict, str
+from builtins import Exception, ValueError, dict, str
+import os
+import uuid
+from typing import List, Optional, Tuple
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import Database
+from app.models.user_model import User
+from app.schemas.user_schemas import UserBatchRequest, UserResponse
 from app.utils.template_manager import TemplateManager
+from app.services.count_provider import CountProvider, build_count_provider
 from app.services.email_service import EmailService
-from app.services.jwt_service import decode_token
-from settings.config import Settings
+from app.services.jwt_service import decode_token, verification_key_id
+from app.services.password_service import PasswordHashingBusy, PasswordService
+from app.services.rate_limiter import InMemoryRateLimitBackend, RateLimitBackend
+from app.services.token_cache import TokenCache
+from app.utils.cursors import CursorPosition, decode_cursor
+from settings.config import Settings, get_settings
 from fastapi import Depends
 
-def get_settings() -> Settings:
-    """Return application settings."""
-    return Settings()
+_password_service = None
+
+def get_password_service() -> PasswordService:
+    """Return the process-wide password hashing pool, creating it on first use."""
+    global _password_service
+    if _password_service is None:
+        settings = get_settings()
+        _password_service = PasswordService(
+            max_workers=settings.password_hash_workers,
+            max_in_flight=settings.password_hash_max_in_flight,
+            queue_timeout=settings.password_hash_queue_timeout,
+            executor=settings.password_hash_executor,
+        )
+    return _password_service
+
+_import_password_service = None
+
+def get_import_password_service() -> PasswordService:
+    """
+    Return the process pool that hashes passwords for bulk imports. It is separate from the
+    request pool so an import cannot starve logins and registrations of hashing slots.
+    """
+    global _import_password_service
+    if _import_password_service is None:
+        workers = get_settings().import_hash_workers or os.cpu_count() or 1
+        _import_password_service = PasswordService(
+            max_workers=workers,
+            max_in_flight=workers,
+            # An import hands each worker a chunk of a batch; a second import queues behind it
+            queue_timeout=600.0,
+            executor="process",
+        )
+    return _import_password_service
+
+_user_count_provider = None
+
+def get_user_count_provider() -> CountProvider:
+    """Return the process-wide provider used for user list totals."""
+    global _user_count_provider
+    if _user_count_provider is None:
+        settings = get_settings()
+        _user_count_provider = build_count_provider(
+            User,
+            settings.user_count_strategy,
+            ttl=settings.user_count_cache_ttl,
+            threshold=settings.user_count_estimate_threshold,
+        )
+    return _user_count_provider
+
+_token_cache = None
+
+def get_token_cache() -> TokenCache:
+    """Return the process-wide cache of verified access tokens."""
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache(max_size=get_settings().token_cache_size)
+    return _token_cache
+
+_rate_limit_backend = None
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Return the process-wide rate limit state used by RateLimitMiddleware."""
+    global _rate_limit_backend
+    if _rate_limit_backend is None:
+        _rate_limit_backend = InMemoryRateLimitBackend(max_keys=get_settings().rate_limit_max_keys)
+    return _rate_limit_backend
+
+_email_service = None
 
 def get_email_service() -> EmailService:
-    template_manager = TemplateManager()
-    return EmailService(template_manager=template_manager)
+    """Return the process-wide email service, so its pooled SMTP sessions are shared."""
+    global _email_service
+    if _email_service is None:
+        template_manager = TemplateManager()
+        _email_service = EmailService(template_manager=template_manager)
+    return _email_service
 
 async def get_db() -> AsyncSession:
-    """Dependency that provides a database session for each request."""
+    """
+    Dependency that provides a database session for each request. The request is one unit
+    of work: whatever it leaves in the session is committed once, after the endpoint returns.
+    """
     async_session_factory = Database.get_session_factory()
     async with async_session_factory() as session:
         try:
             yield session
+            if session.in_transaction():
+                await session.commit()
+        except (HTTPException, PasswordHashingBusy):
+            # The endpoint's own 4xx, and the app-level 503, must not be masked as a 500
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
-        
+
+async def get_read_db() -> AsyncSession:
+    """Dependency that provides a session for endpoints that only read; nothing is committed."""
+    async_session_factory = Database.get_read_session_factory()
+    async with async_session_factory() as session:
+        try:
+            yield session
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+def get_cursor_position(cursor: Optional[str] = None) -> Optional[CursorPosition]:
+    """Decode the `cursor` query parameter; an empty or missing cursor means the first page."""
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def get_user_fields(fields: Optional[str] = None) -> Tuple[str, ...]:
+    """
+    Parse the `fields` query parameter, a comma-separated sparse fieldset of user response
+    fields such as `id,nickname,email,role`. Without it every field is returned.
+    """
+    if fields is None:
+        return tuple(UserResponse.model_fields)
+    selected = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in selected if name not in UserResponse.model_fields]
+    if not selected or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}" if unknown else "No fields selected")
+    return selected
+
+def get_batch_user_ids(body: UserBatchRequest) -> List[uuid.UUID]:
+    """The distinct ids of a batch lookup, in request order, within the configured limit."""
+    ids = list(dict.fromkeys(body.ids))
+    limit = get_settings().batch_get_max_ids
+    if len(ids) > limit:
+        raise HTTPException(status_code=400, detail=f"At most {limit} ids may be requested at once")
+    return ids
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
@@ -35,9 +162,14 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    payload = decode_token(token)
+    token_cache = get_token_cache()
+    signing_key = verification_key_id()
+    payload = token_cache.get(token, signing_key)
     if payload is None:
-        raise credentials_exception
+        payload = decode_token(token)
+        if payload is None:
+            raise credentials_exception
+        token_cache.put(token, signing_key, payload)
     user_id: str = payload.get("sub")
     user_role: str = payload.get("role")
     if user_id is None or user_role is None:
@@ -1,10 +1,18 @@
-from builtins import Exception
+from builtins import Exception, getattr, hasattr
+import asyncio
+import signal
 from fastapi import FastAPI
 from starlette.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware  # Import the CORSMiddleware
 from app.database import Database
-from app.dependencies import get_settings
-from app.routers import user_routes
+from app.dependencies import get_email_service, get_import_password_service, get_password_service, get_settings
+from app.middleware import RateLimitMiddleware
+from app.routers import metrics_routes, user_routes, well_known_routes
+from app.services.email_outbox_worker import EmailOutboxWorker
+from app.services.jwt_service import get_key_ring, is_asymmetric
+from app.services.password_service import PasswordHashingBusy
+from app.utils.link_generation import get_link_factory
+from settings.config import reload_settings
 from app.utils.api_description import getDescription
 
 
@@ -21,6 +29,9 @@ app = FastAPI(
     },
     license_info={"name": "MIT", "url": "https://opensource.org/licenses/MIT"},
 )
+# Throttle credential endpoints before they reach bcrypt or the database; added first so the
+# CORS middleware still wraps its 429 responses
+app.add_middleware(RateLimitMiddleware)
 # CORS middleware configuration
 # This middleware will enable CORS and allow requests from any origin
 # It can be configured to allow specific methods, headers, and origins
@@ -35,7 +46,54 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     settings = get_settings()
-    Database.initialize(settings.database_url, settings.debug)
+    Database.initialize(
+        settings.database_url,
+        settings.debug,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        statement_cache_size=settings.db_statement_cache_size,
+        read_only_transactions=settings.db_read_only_transactions,
+        replica_urls=[url.strip() for url in settings.database_replica_urls.split(",") if url.strip()],
+        replica_eject_seconds=settings.db_replica_eject_seconds,
+    )
+    # `kill -HUP <pid>` re-reads the environment and .env without a restart
+    if hasattr(signal, "SIGHUP"):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_settings)
+    get_email_service().template_manager.precompile()
+    get_link_factory(app)
+    if is_asymmetric():
+        get_key_ring()  # fail at startup, not on the first login, if the keys are unusable
+    if settings.email_outbox_worker_enabled:
+        worker = EmailOutboxWorker(
+            Database.get_session_factory(),
+            get_email_service(),
+            batch_size=settings.email_outbox_batch_size,
+            poll_interval=settings.email_outbox_poll_interval,
+            max_attempts=settings.email_outbox_max_attempts,
+            backoff_seconds=settings.email_outbox_backoff_seconds,
+            claim_timeout=settings.email_outbox_claim_timeout,
+        )
+        app.state.email_outbox_worker = worker
+        app.state.email_outbox_task = asyncio.create_task(worker.run())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    worker = getattr(app.state, "email_outbox_worker", None)
+    if worker is not None:
+        worker.stop()
+        await app.state.email_outbox_task
+    smtp_client = get_email_service().smtp_client
+    if hasattr(smtp_client, "close"):
+        smtp_client.close()
+    get_password_service().shutdown()
+    get_import_password_service().shutdown()
+
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request, exc):
+    return JSONResponse(status_code=503, content={"message": str(exc)}, headers={"Retry-After": "1"})
 
 @app.exception_handler(Exception)
 async def exception_handler(request, exc):
@@ -44,4 +102,6 @@ async def exception_handler(request, exc):
 
 
 app.include_router(user_routes.router)
-app.include_router(user_routes.router, prefix="/api/users", tags=["users"])
\ No newline at end of file
+app.include_router(user_routes.router, prefix="/api/users", tags=["users"])
+app.include_router(metrics_routes.router)
+app.include_router(well_known_routes.router)
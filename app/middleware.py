@@ -0,0 +1,135 @@
+"""
+ASGI middleware.
+
+`RateLimitMiddleware` throttles the credential endpoints (login, registration and token
+refresh) per client IP and per username. It runs ahead of routing, so a rejected request never
+reaches bcrypt or opens a database session. Behind a reverse proxy every connection comes from
+the proxy, so the client IP is taken from `X-Forwarded-For` (or `X-Real-IP`) when, and only
+when, the peer is listed in RATE_LIMIT_TRUSTED_PROXIES; anyone else could forge those headers.
+"""
+
+from builtins import any, bytes, dict, isinstance, len, reversed, str, tuple
+import ipaddress
+import json
+import math
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import parse_qs
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.dependencies import get_rate_limit_backend
+from app.services.rate_limiter import RateLimitBackend, SlidingWindow, TokenBucket
+from settings.config import get_settings
+
+# Bodies larger than this are not parsed for a username; they are still limited per IP
+MAX_INSPECTED_BODY = 64 * 1024
+
+
+def _username(content_type: str, body: bytes) -> Optional[str]:
+    """The account a login or registration is for: the form's `username` or the JSON `email`."""
+    try:
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            value = parse_qs(body.decode()).get("username", [None])[0]
+        elif content_type.startswith("application/json"):
+            data = json.loads(body)
+            value = data.get("email") if isinstance(data, dict) else None
+        else:
+            return None
+    except ValueError:
+        return None
+    return value.strip().lower() if isinstance(value, str) and value.strip() else None
+
+
+@lru_cache(maxsize=8)
+def _trusted_networks(proxies: str) -> tuple:
+    return tuple(ipaddress.ip_network(proxy.strip(), strict=False) for proxy in proxies.split(",") if proxy.strip())
+
+
+def _is_trusted(ip: str, networks: tuple) -> bool:
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def client_ip(scope: Scope, trusted_proxies: str) -> str:
+    """
+    The address a request came from. When the peer is a trusted proxy, the forwarded chain is
+    read from the right and the first address not itself a trusted proxy is the client.
+    """
+    client = scope.get("client")
+    ip = client[0] if client else "unknown"
+    networks = _trusted_networks(trusted_proxies)
+    if not networks or not _is_trusted(ip, networks):
+        return ip
+    headers = dict(scope["headers"])
+    forwarded = [hop.strip() for hop in headers.get(b"x-forwarded-for", b"").decode("latin-1").split(",") if hop.strip()]
+    for hop in reversed(forwarded):
+        if not _is_trusted(hop, networks):
+            return hop
+    if forwarded:
+        return forwarded[0]
+    real_ip = headers.get(b"x-real-ip", b"").decode("latin-1").strip()
+    return real_ip or ip
+
+
+class RateLimitMiddleware:
+    def __init__(self, app: ASGIApp, backend: Optional[RateLimitBackend] = None):
+        self.app = app
+        self.backend = backend or get_rate_limit_backend()
+
+    def _limited(self, scope: Scope) -> bool:
+        settings = get_settings()
+        if scope["type"] != "http" or scope["method"] != "POST" or not settings.rate_limit_enabled:
+            return False
+        suffixes = [suffix.strip() for suffix in settings.rate_limit_paths.split(",") if suffix.strip()]
+        return any(scope["path"].endswith(suffix) for suffix in suffixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if not self._limited(scope):
+            return await self.app(scope, receive, send)
+        settings = get_settings()
+        ip = client_ip(scope, settings.rate_limit_trusted_proxies)
+        retry_after = await self.backend.hit(
+            f"ip:{ip}", TokenBucket(settings.rate_limit_ip_burst, settings.rate_limit_ip_per_second)
+        )
+        if not retry_after:
+            body, receive = await self._buffer(receive)
+            headers = dict(scope["headers"])
+            username = _username(headers.get(b"content-type", b"").decode("latin-1"), body) if body is not None else None
+            if username:
+                retry_after = await self.backend.hit(
+                    f"user:{username}", SlidingWindow(settings.rate_limit_username_attempts, settings.rate_limit_username_window)
+                )
+        if retry_after:
+            response = JSONResponse(
+                status_code=429,
+                content={"message": "Too many requests, please try again later."},
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+            return await response(scope, receive, send)
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _buffer(receive: Receive):
+        """
+        Read the request body so it can be inspected, and return it with a `receive` that
+        replays it to the application. Returns None for the body if it is too large to inspect.
+        """
+        messages, body, more = [], b"", True
+        while more:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+            if len(body) > MAX_INSPECTED_BODY:
+                body = None
+                break
+
+        async def replay():
+            return messages.pop(0) if messages else await receive()
+
+        return body, replay
@@ -0,0 +1,52 @@
+from builtins import dict, int, str
+from datetime import datetime
+import uuid
+from sqlalchemy import Column, DateTime, Index, Integer, JSON, String, Text, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class EmailOutbox(Base):
+    """
+    An email waiting to be delivered, corresponding to the 'email_outbox' table.
+
+    Rows are written in the same transaction as the change that triggers the email and
+    drained by `EmailOutboxWorker`, so requests never wait on SMTP.
+
+    Attributes:
+        id (UUID): Unique identifier for the message.
+        recipient (str): Address the email is sent to.
+        email_type (str): Template name, e.g. 'email_verification'.
+        context (dict): Values substituted into the template.
+        status (str): 'pending', 'sending' (claimed by a worker), 'sent' or 'failed'.
+        attempts (int): Number of delivery attempts so far.
+        next_attempt_at (datetime): Earliest time the next attempt may run; while 'sending',
+            when the worker's claim expires.
+        last_error (str): Error from the most recent failed attempt.
+        created_at (datetime): Timestamp when the message was queued.
+        sent_at (datetime): Timestamp of successful delivery.
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    recipient: Mapped[str] = Column(String(255), nullable=False)
+    email_type: Mapped[str] = Column(String(50), nullable=False)
+    context: Mapped[dict] = Column(JSON, nullable=False)
+    status: Mapped[str] = Column(String(20), nullable=False, default=PENDING)
+    attempts: Mapped[int] = Column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error: Mapped[str] = Column(Text, nullable=True)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<EmailOutbox {self.email_type} to {self.recipient}, Status: {self.status}>"
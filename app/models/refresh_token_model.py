@@ -0,0 +1,41 @@
+from builtins import str
+from datetime import datetime
+import uuid
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class RefreshToken(Base):
+    """
+    A refresh token issued at login, corresponding to the 'refresh_tokens' table.
+
+    Only a SHA-256 digest of the token is stored. Each use revokes the token and issues its
+    successor in the same family; presenting a revoked token again revokes the whole family.
+
+    Attributes:
+        id (UUID): Unique identifier for the token.
+        user_id (UUID): The user the token was issued to.
+        family_id (UUID): Shared by every token descended from the same login.
+        token_hash (str): Hex SHA-256 digest of the token, unique and indexed for lookup.
+        expires_at (datetime): Time after which the token is no longer accepted.
+        created_at (datetime): Timestamp when the token was issued.
+        revoked_at (datetime): Timestamp when the token was used or revoked.
+    """
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("ix_refresh_tokens_family_id", "family_id"),
+        Index("ix_refresh_tokens_user_id", "user_id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    family_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), nullable=False)
+    token_hash: Mapped[str] = Column(String(64), nullable=False, unique=True, index=True)
+    expires_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now())
+    revoked_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<RefreshToken family {self.family_id} for {self.user_id}, Revoked: {self.revoked_at is not None}>"
@@ -3,7 +3,7 @@ from datetime import datetime
 from enum import Enum
 import uuid
 from sqlalchemy import (
-    Column, String, Integer, DateTime, Boolean, func, Enum as SQLAlchemyEnum
+    Column, String, Integer, DateTime, Boolean, Index, func, literal_column, Enum as SQLAlchemyEnum
 )
 from sqlalchemy.dialects.postgresql import UUID, ENUM
 from sqlalchemy.orm import Mapped, mapped_column
@@ -19,6 +19,19 @@ class UserRole(Enum):
     USER = "user"
 
 
+def search_document(*columns):
+    """
+    The full-text document of a user: the columns joined by spaces and parsed with the
+    `simple` configuration. It is written with inline constants only, so the expression a
+    query uses is textually the one ix_users_search_document was built on.
+    """
+    text = None
+    for column in columns:
+        part = func.coalesce(column, literal_column("''"))
+        text = part if text is None else text + literal_column("' '") + part
+    return func.to_tsvector(literal_column("'simple'::regconfig"), text)
+
+
 class User(Base):
     """
     Represents a user within the application, corresponding to the 'users' table in the database.
@@ -77,6 +90,13 @@ class User(Base):
     email_verified: Mapped[bool] = Column(Boolean, default=False, nullable=False)
     hashed_password: Mapped[str] = Column(String(255), nullable=False)
 
+    __table_args__ = (
+        # Supports keyset pagination ordered by (created_at, id)
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Full-text search over the user's names, email and bio
+        Index("ix_users_search_document", search_document(nickname, email, first_name, last_name, bio), postgresql_using="gin"),
+    )
+
 
     def __repr__(self) -> str:
         """Provides a readable representation of a user object."""
@@ -99,4 +119,13 @@ class User(Base):
         self.is_professional = status
         self.professional_status_updated_at = func.now()
 
-    
\ No newline at end of file
+    
+
+
+SEARCH_DOCUMENT = search_document(User.nickname, User.email, User.first_name, User.last_name, User.bio)
+
+# Columns searched by substring with ILIKE, each backed by a pg_trgm GIN index. The indexes
+# need the extension, so only migration 9d4e7a1c2b36 creates them; alembic/env.py keeps
+# autogenerate from dropping them.
+TRIGRAM_COLUMNS = ("nickname", "email", "first_name", "last_name")
+TRIGRAM_INDEXES = tuple(f"ix_users_{column}_trgm" for column in TRIGRAM_COLUMNS)
@@ -0,0 +1,25 @@
+"""
+Operational metrics for the running worker.
+
+Exposes point-in-time gauges and counters for the shared resources each worker owns
+(the password hashing pool, the database connection pools, the token cache and the rate limiter) so saturation can be watched from dashboards.
+"""
+
+from builtins import dict
+from fastapi import APIRouter, Depends
+from app.database import Database
+from app.dependencies import get_password_service, get_rate_limit_backend, get_token_cache, require_role
+
+router = APIRouter()
+
+
+@router.get("/metrics", name="metrics", tags=["Operations"])
+async def metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """Return runtime metrics for this worker process."""
+    return {
+        "password_hashing": get_password_service().metrics(),
+        "database_pool": Database.pool_metrics(),
+        "database_replicas": Database.replica_metrics(),
+        "token_cache": get_token_cache().metrics(),
+        "rate_limiter": get_rate_limit_backend().metrics(),
+    }
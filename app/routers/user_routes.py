@@ -18,59 +18,165 @@ Key Highlights:
 - Utilizes OAuth2PasswordBearer for securing API endpoints, requiring valid access tokens for operations.
 """
 
-from builtins import dict, int, len, str
-from datetime import timedelta
+from builtins import ValueError, dict, getattr, int, len, list, set, str, tuple, zip
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import not_
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.dependencies import get_current_user, get_db, get_email_service, require_role
+from app.database import Database
+from app.dependencies import get_batch_user_ids, get_current_user, get_cursor_position, get_db, get_email_service, get_import_password_service, get_read_db, get_user_count_provider, get_user_fields, require_role
 from app.schemas.pagination_schema import EnhancedPagination
-from app.schemas.token_schema import TokenResponse
-from app.schemas.user_schemas import LoginRequest, UserBase, UserCreate, UserListResponse, UserResponse, UserUpdate
+from app.schemas.token_schema import RefreshRequest, TokenResponse
+from app.schemas.user_schemas import BulkRoleRequest, BulkUserRequest, BulkUserResponse, LoginRequest, UserBase, UserBatchResponse, UserCreate, UserImportResponse, UserListResponse, UserResponse, UserUpdate, user_response_model
+from app.services.count_provider import CountProvider
+from app.services.password_service import PasswordService
+from app.services.refresh_token_service import RefreshTokenService
+from app.services.user_import_service import UserImportService
 from app.services.user_service import UserService
 from app.services.jwt_service import create_access_token
-from app.utils.link_generation import create_user_links, generate_pagination_links
+from app.utils.cursors import CursorPosition, encode_cursor
+from app.utils.exports import EXPORT_MEDIA_TYPES, ExportFormat, csv_chunks, gzip_chunks, ndjson_chunks
+from app.utils.imports import csv_records, ndjson_records
+from app.utils.link_generation import create_user_links, generate_cursor_pagination_links, generate_pagination_links, get_link_factory, request_base_url
+from app.utils.responses import ORJSONResponse
 from app.dependencies import get_settings
 from app.services.email_service import EmailService
-from app.models.user_model import UserRole  # Correct import
+from app.models.user_model import User, UserRole  # Correct import
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 settings = get_settings()
-@router.get("/api/users/{user_id}", response_model=UserResponse, name="get_user", tags=["User Management Requires (Admin or Manager Roles)"])
-async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+
+
+def user_columns(fields: Tuple[str, ...]) -> List[str]:
+    """The users columns a fieldset needs; sensitive columns are never among them."""
+    return [field for field in fields if field != "links"]
+
+
+def user_list_items(users: List[User], request: Optional[Request] = None, fields: Tuple[str, ...] = tuple(UserResponse.model_fields)) -> List[dict]:
+    """
+    The `UserResponse` items, cut down to `fields`, for a page of rows, with each user's links
+    when `request` is given and `links` is selected. The rows were validated when they were
+    written, so they are dumped as they are instead of being validated again (EmailStr alone
+    costs more than the rest of the request).
+    """
+    columns = user_columns(fields)
+    items = [{column: getattr(user, column) for column in columns} for user in users]
+    if request is not None and "links" in fields:
+        links, base_url = get_link_factory(request.app), request_base_url(request)
+        for item, user in zip(items, users):
+            item["links"] = links.user_links(base_url, user.id)
+    return items
+
+
+def user_search_conditions(
+    q: Optional[str] = None,
+    contains: Optional[str] = None,
+    role: Optional[UserRole] = None,
+    is_locked: Optional[bool] = None,
+    email_verified: Optional[bool] = None,
+    is_professional: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> list:
+    """The search filters shared by the search and export endpoints, as WHERE clauses."""
+    return UserService.search_conditions(
+        q=q, contains=contains, role=role, is_locked=is_locked, email_verified=email_verified,
+        is_professional=is_professional, created_after=created_after, created_before=created_before,
+    )
+
+
+# Declared ahead of /api/users/{user_id}, which would otherwise take "search" for a user id
+@router.get("/api/users/search", response_model=UserListResponse, response_class=ORJSONResponse, name="search_users", tags=["User Management Requires (Admin or Manager Roles)"])
+async def search_users(
+    request: Request,
+    limit: int = 10,
+    cursor: str = "",
+    include_links: bool = True,
+    where: list = Depends(user_search_conditions),
+    fields: Tuple[str, ...] = Depends(get_user_fields),
+    position: Optional[CursorPosition] = Depends(get_cursor_position),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
+):
+    """
+    Search and filter users, paginated by cursor like `GET /api/users/?cursor=`.
+
+    - **q**: words, each matching the start of a word in the nickname, email, names or bio.
+    - **contains**: a substring of the nickname, email, first or last name, case-insensitive.
+    - **role**, **is_locked**, **email_verified**, **is_professional**: exact matches.
+    - **created_after** (inclusive), **created_before** (exclusive): creation time range.
+
+    The `next`/`prev` links repeat the filters, so following them pages through the same search.
+    """
+    extra_params = {name: value for name, value in request.query_params.items() if name not in ("limit", "cursor")}
+    return await _list_users_by_cursor(request, limit, cursor, position, db, request if include_links else None, fields, where, extra_params)
+
+
+async def _export_batches(columns: List[str], where: list):
+    # Request-scoped sessions are closed before a streamed body is sent, so the export opens its
+    # own. It comes from the transactional factory, as the server-side cursor needs a transaction;
+    # the SELECT itself is still routed to a read replica when one is configured
+    async with Database.get_session_factory()() as session:
+        async for rows in UserService.stream_users(session, columns, where, settings.export_batch_size):
+            yield rows
+
+
+@router.get("/api/users/export", name="export_users", tags=["User Management Requires (Admin or Manager Roles)"])
+async def export_users(
+    format: ExportFormat = ExportFormat.ndjson,
+    gzip: bool = False,
+    where: list = Depends(user_search_conditions),
+    fields: Tuple[str, ...] = Depends(get_user_fields),
+    current_user: dict = Depends(require_role(["ADMIN"]))
+):
+    """
+    Stream every user, or those matching the filters of `GET /api/users/search`, as NDJSON or
+    CSV in (created_at, id) order. Memory use does not grow with the number of users exported.
+
+    - **format**: `ndjson` (default) or `csv`.
+    - **fields**: the columns to export, as for the other user endpoints; `links` is ignored.
+    - **gzip**: compress the body, sent with `Content-Encoding: gzip`.
+    """
+    columns = user_columns(fields)
+    if not columns:
+        raise HTTPException(status_code=400, detail="No fields selected")
+    batches = _export_batches(columns, where)
+    chunks = ndjson_chunks(batches) if format == ExportFormat.ndjson else csv_chunks(batches, columns)
+    headers = {"Content-Disposition": f'attachment; filename="users.{format.value}"'}
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+
+@router.get("/api/users/{user_id}", response_model=UserResponse, response_class=ORJSONResponse, name="get_user", tags=["User Management Requires (Admin or Manager Roles)"])
+async def get_user(user_id: UUID, request: Request, fields: Tuple[str, ...] = Depends(get_user_fields), db: AsyncSession = Depends(get_read_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Endpoint to fetch a user by their unique identifier (UUID).
 
     Utilizes the UserService to query the database asynchronously for the user and constructs a response
     model that includes the user's details along with HATEOAS links for possible next actions.
+    `fields=id,nickname,email,role` returns, and reads from the database, only those fields.
 
     Args:
         user_id: UUID of the user to fetch.
         request: The request object, used to generate full URLs in the response.
+        fields: The sparse fieldset parsed from the `fields` query parameter.
         db: Dependency that provides an AsyncSession for database access.
         token: The OAuth2 access token obtained through OAuth2PasswordBearer dependency.
     """
-    user = await UserService.get_by_id(db, user_id)
+    user = await UserService.get_by_id(db, user_id, columns=user_columns(fields))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    return UserResponse.model_construct(
-        id=user.id,
-        nickname=user.nickname,
-        first_name=user.first_name,
-        last_name=user.last_name,
-        bio=user.bio,
-        profile_picture_url=user.profile_picture_url,
-        github_profile_url=user.github_profile_url,
-        linkedin_profile_url=user.linkedin_profile_url,
-        role=user.role,
-        email=user.email,
-        last_login_at=user.last_login_at,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-        links=create_user_links(user.id, request)  
-    )
+    values = {column: getattr(user, column) for column in user_columns(fields)}
+    if "links" in fields:
+        values["links"] = create_user_links(user.id, request)
+    return ORJSONResponse(user_response_model(fields).model_construct(**values))
 
 # Additional endpoints for update, delete, create, and list users follow a similar pattern, using
 # asynchronous database operations, handling security with OAuth2PasswordBearer, and enhancing response
@@ -79,7 +185,7 @@ async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(g
 # This approach not only ensures that the API is secure and efficient but also promotes a better client
 # experience by adhering to REST principles and providing self-discoverable operations.
 
-@router.put("/api/users/{user_id}", response_model=UserResponse, name="update_user", tags=["User Management Requires (Admin or Manager Roles)"])
+@router.put("/api/users/{user_id}", response_model=UserResponse, response_class=ORJSONResponse, name="update_user", tags=["User Management Requires (Admin or Manager Roles)"])
 async def update_user(user_id: UUID, user_update: UserUpdate, request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Update user information.
@@ -92,7 +198,7 @@ async def update_user(user_id: UUID, user_update: UserUpdate, request: Request,
     if not updated_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    return UserResponse.model_construct(
+    return ORJSONResponse(UserResponse.model_construct(
         id=updated_user.id,
         bio=updated_user.bio,
         first_name=updated_user.first_name,
@@ -107,7 +213,7 @@ async def update_user(user_id: UUID, user_update: UserUpdate, request: Request,
         created_at=updated_user.created_at,
         updated_at=updated_user.updated_at,
         links=create_user_links(updated_user.id, request)
-    )
+    ))
 
 
 @router.delete("/api/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT, name="delete_user", tags=["User Management Requires (Admin or Manager Roles)"])
@@ -124,7 +230,7 @@ async def delete_user(user_id: UUID, db: AsyncSession = Depends(get_db), token:
 
 
 
-@router.post("/api/users/", response_model=UserResponse, status_code=status.HTTP_201_CREATED, tags=["User Management Requires (Admin or Manager Roles)"], name="create_user")
+@router.post("/api/users/", response_model=UserResponse, response_class=ORJSONResponse, status_code=status.HTTP_201_CREATED, tags=["User Management Requires (Admin or Manager Roles)"], name="create_user")
 async def create_user(user: UserCreate, request: Request, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Create a new user.
@@ -141,16 +247,15 @@ async def create_user(user: UserCreate, request: Request, db: AsyncSession = Dep
     Returns:
     - UserResponse: The newly created user's information along with navigation links.
     """
-    existing_user = await UserService.get_by_email(db, user.email)
-    if existing_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
-    
-    created_user = await UserService.create(db, user.model_dump(), email_service)
+    try:
+        created_user = await UserService.create(db, user.model_dump(), email_service)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not created_user:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create user")
     
     
-    return UserResponse.model_construct(
+    return ORJSONResponse(status_code=status.HTTP_201_CREATED, content=UserResponse.model_construct(
         id=created_user.id,
         bio=created_user.bio,
         first_name=created_user.first_name,
@@ -163,34 +268,179 @@ async def create_user(user: UserCreate, request: Request, db: AsyncSession = Dep
         created_at=created_user.created_at,
         updated_at=created_user.updated_at,
         links=create_user_links(created_user.id, request)
-    )
+    ))
+
+
+@router.post("/api/users/import", response_model=UserImportResponse, name="import_users", tags=["User Management Requires (Admin or Manager Roles)"])
+async def import_users(
+    request: Request,
+    format: ExportFormat = ExportFormat.ndjson,
+    current_user: dict = Depends(require_role(["ADMIN"])),
+    db: AsyncSession = Depends(get_db),
+    email_service: EmailService = Depends(get_email_service),
+    password_service: PasswordService = Depends(get_import_password_service),
+):
+    """
+    Create users in bulk from the request body, read as it arrives: NDJSON (default) or CSV
+    with a header row, each row holding the fields of `POST /api/users/`. `role` defaults to
+    AUTHENTICATED and a nickname is generated when none is given.
+
+    Rows are loaded a batch at a time, each batch committed on its own, with verification
+    emails queued for delivery. Rows that are invalid or clash with an existing email or
+    nickname are skipped and listed in `errors` by row number.
+    """
+    records = ndjson_records(request.stream()) if format == ExportFormat.ndjson else csv_records(request.stream())
+    return await UserImportService.import_users(db, records, password_service, email_service, settings.import_batch_size)
 
 
-@router.get("/api/users/", response_model=UserListResponse, tags=["User Management Requires (Admin or Manager Roles)"])
+@router.post("/api/users/batch", response_model=UserBatchResponse, response_class=ORJSONResponse, name="get_users_batch", tags=["User Management Requires (Admin or Manager Roles)"])
+async def get_users_batch(request: Request, current_user: dict = Depends(require_role(["ADMIN", "MANAGER"])), ids: List[UUID] = Depends(get_batch_user_ids),
+                          fields: Tuple[str, ...] = Depends(get_user_fields), db: AsyncSession = Depends(get_read_db)):
+    """
+    Fetch up to BATCH_GET_MAX_IDS users by id with one query. `items` follows the order of the
+    requested ids (repeats collapse to the first), `missing` lists the ids with no user, and
+    `fields=` trims each item as it does for `GET /api/users/{user_id}`.
+    """
+    found = {user.id: user for user in await UserService.get_by_ids(db, ids, columns=user_columns(fields))}
+    users = [found[user_id] for user_id in ids if user_id in found]
+    missing = [user_id for user_id in ids if user_id not in found]
+    return ORJSONResponse({"items": user_list_items(users, request, fields), "missing": missing})
+
+
+def _is_caller(subject: str):
+    """A condition matching the token subject's account; the subject is an email or a user id."""
+    try:
+        return User.id == UUID(subject)
+    except ValueError:
+        return User.email == subject
+
+
+async def _bulk_update(db: AsyncSession, current_user: dict, body: BulkUserRequest, values: Optional[dict], outcome: str) -> ORJSONResponse:
+    """
+    Run a bulk operation and answer with one outcome per requested id, in request order.
+
+    A filter must narrow the users down: one that reduces to no conditions (`{}`, or a `q`
+    with no searchable terms) would act on every account, so it is refused. The caller's own
+    account is never acted on: listing it is refused, and a filter skips it.
+    """
+    is_caller = _is_caller(current_user["user_id"])
+    if body.ids is not None:
+        ids, where = list(dict.fromkeys(body.ids)), ()
+        if await UserService.count_matching(db, [is_caller, User.id.in_(ids)]):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="A bulk operation cannot include your own account")
+    else:
+        ids, where = None, UserService.search_conditions(**body.filter.model_dump())
+        if not where:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The filter matches every user; narrow it down")
+        where.append(not_(is_caller))
+    affected = await UserService.bulk_update(db, values, ids=ids, where=where, chunk_size=settings.bulk_chunk_size)
+    if ids is None:
+        results = [{"id": user_id, "status": outcome} for user_id in affected]
+    else:
+        done = set(affected)
+        results = [{"id": user_id, "status": outcome if user_id in done else "not_found"} for user_id in ids]
+    return ORJSONResponse({"count": len(affected), "results": results})
+
+
+@router.post("/api/users/bulk/role", response_model=BulkUserResponse, response_class=ORJSONResponse, name="bulk_set_role", tags=["User Management Requires (Admin or Manager Roles)"])
+async def bulk_set_role(body: BulkRoleRequest, current_user: dict = Depends(require_role(["ADMIN"])), db: AsyncSession = Depends(get_db)):
+    """Give every listed (or matching) user `role`."""
+    return await _bulk_update(db, current_user, body, {"role": body.role}, "updated")
+
+
+@router.post("/api/users/bulk/lock", response_model=BulkUserResponse, response_class=ORJSONResponse, name="bulk_lock", tags=["User Management Requires (Admin or Manager Roles)"])
+async def bulk_lock(body: BulkUserRequest, current_user: dict = Depends(require_role(["ADMIN"])), db: AsyncSession = Depends(get_db)):
+    """Lock the listed (or matching) accounts; their refresh tokens stop working with it."""
+    return await _bulk_update(db, current_user, body, {"is_locked": True}, "updated")
+
+
+@router.post("/api/users/bulk/unlock", response_model=BulkUserResponse, response_class=ORJSONResponse, name="bulk_unlock", tags=["User Management Requires (Admin or Manager Roles)"])
+async def bulk_unlock(body: BulkUserRequest, current_user: dict = Depends(require_role(["ADMIN"])), db: AsyncSession = Depends(get_db)):
+    """Unlock the listed (or matching) accounts and reset their failed login counts."""
+    return await _bulk_update(db, current_user, body, {"is_locked": False, "failed_login_attempts": 0}, "updated")
+
+
+@router.post("/api/users/bulk/delete", response_model=BulkUserResponse, response_class=ORJSONResponse, name="bulk_delete", tags=["User Management Requires (Admin or Manager Roles)"])
+async def bulk_delete(body: BulkUserRequest, current_user: dict = Depends(require_role(["ADMIN"])), db: AsyncSession = Depends(get_db)):
+    """Delete the listed (or matching) users."""
+    return await _bulk_update(db, current_user, body, None, "deleted")
+
+
+@router.get("/api/users/", response_model=UserListResponse, response_class=ORJSONResponse, tags=["User Management Requires (Admin or Manager Roles)"])
 async def list_users(
     request: Request,
     skip: int = 0,
     limit: int = 10,
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    include_links: bool = True,
+    fields: Tuple[str, ...] = Depends(get_user_fields),
+    position: Optional[CursorPosition] = Depends(get_cursor_position),
+    count_provider: CountProvider = Depends(get_user_count_provider),
+    db: AsyncSession = Depends(get_read_db),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
 ):
-    total_users = await UserService.count(db)
-    users = await UserService.list_users(db, skip, limit)
+    """
+    List users.
+
+    Offset mode (`skip`/`limit`) is kept for compatibility. Passing `cursor` switches to keyset
+    pagination over (created_at, id): an empty cursor returns the first page and the `next`/`prev`
+    links carry the cursors for the neighbouring pages. Cursor mode does not count the table, so
+    every page costs the same regardless of depth.
+
+    In offset mode `include_total=false` skips counting; otherwise the total comes from the
+    configured count strategy and `total_exact` is false when it is a planner estimate or a cached count.
+
+    `include_links=false` leaves out each item's `links`, which otherwise make up much of a
+    large page. `fields=id,nickname,email,role` returns, and reads from the database, only
+    those fields of each item.
+    """
+    link_request = request if include_links else None
+    if cursor is not None:
+        return await _list_users_by_cursor(request, limit, cursor, position, db, link_request, fields)
+
+    total = await count_provider.count(db) if include_total else None
+    users = await UserService.list_users(db, skip, limit, columns=user_columns(fields))
 
-    user_responses = [
-        UserResponse.model_validate(user) for user in users
-    ]
+    user_responses = user_list_items(users, link_request, fields)
     
-    pagination_links = generate_pagination_links(request, skip, limit, total_users)
+    pagination_links = generate_pagination_links(request, skip, limit, total.value if total else None, has_next=len(users) == limit)
     
-    # Construct the final response with pagination details
-    return UserListResponse(
-        items=user_responses,
-        total=total_users,
-        page=skip // limit + 1,
-        size=len(user_responses),
-        links=pagination_links  # Ensure you have appropriate logic to create these links
-    )
+    # Construct the final response with pagination details, in UserListResponse's shape
+    return ORJSONResponse({
+        "items": user_responses,
+        "total": total.value if total else None,
+        "total_exact": total.exact if total else None,
+        "page": skip // limit + 1,
+        "size": len(user_responses),
+        "links": pagination_links,
+    })
+
+
+async def _list_users_by_cursor(request: Request, limit: int, cursor: str, position: Optional[CursorPosition], db: AsyncSession,
+                                link_request: Optional[Request], fields: Tuple[str, ...], where: List = (),
+                                extra_params: Optional[dict] = None) -> ORJSONResponse:
+    users, has_more = await UserService.list_users_by_cursor(db, limit, position, columns=user_columns(fields), where=where)
+    backwards = position is not None and position.backwards
+    next_cursor = prev_cursor = None
+    if users:
+        first, last = users[0], users[-1]
+        # Moving forward there is a previous page unless we started at the beginning;
+        # moving backward there is always a next page (the one we came from).
+        if has_more or backwards:
+            next_cursor = encode_cursor(CursorPosition(last.created_at, last.id))
+        if position is not None and (has_more or not backwards):
+            prev_cursor = encode_cursor(CursorPosition(first.created_at, first.id, backwards=True))
+
+    user_responses = user_list_items(users, link_request, fields)
+    return ORJSONResponse({
+        "items": user_responses,
+        "total": None,
+        "total_exact": None,
+        "page": None,
+        "size": len(user_responses),
+        "links": generate_cursor_pagination_links(request, limit, cursor, next_cursor, prev_cursor, extra_params),
+    })
 
 
 @router.post("/register/", response_model=UserResponse, tags=["Login and Registration"])
@@ -200,39 +450,52 @@ async def register(user_data: UserCreate, session: AsyncSession = Depends(get_db
         return user
     raise HTTPException(status_code=400, detail="Email already exists")
 
+def _token_response(user: User, refresh_token: str) -> dict:
+    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+
+    access_token = create_access_token(
+        data={"sub": user.email, "role": str(user.role.name)},
+        expires_delta=access_token_expires
+    )
+
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
 @router.post("/login/", response_model=TokenResponse, tags=["Login and Registration"])
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
-    if await UserService.is_account_locked(session, form_data.username):
+    user, locked = await UserService.authenticate(session, form_data.username, form_data.password)
+    if locked:
         raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
-
-    user = await UserService.login_user(session, form_data.username, form_data.password)
     if user:
-        access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-
-        access_token = create_access_token(
-            data={"sub": user.email, "role": str(user.role.name)},
-            expires_delta=access_token_expires
-        )
-
-        return {"access_token": access_token, "token_type": "bearer"}
+        return _token_response(user, await RefreshTokenService.issue(session, user.id))
     raise HTTPException(status_code=401, detail="Incorrect email or password.")
 
 @router.post("/login/", include_in_schema=False, response_model=TokenResponse, tags=["Login and Registration"])
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
-    if await UserService.is_account_locked(session, form_data.username):
+    user, locked = await UserService.authenticate(session, form_data.username, form_data.password)
+    if locked:
         raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
-
-    user = await UserService.login_user(session, form_data.username, form_data.password)
     if user:
-        access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+        return _token_response(user, await RefreshTokenService.issue(session, user.id))
+    raise HTTPException(status_code=401, detail="Incorrect email or password.")
 
-        access_token = create_access_token(
-            data={"sub": user.email, "role": str(user.role.name)},
-            expires_delta=access_token_expires
-        )
 
-        return {"access_token": access_token, "token_type": "bearer"}
-    raise HTTPException(status_code=401, detail="Incorrect email or password.")
+@router.post("/token/refresh", response_model=TokenResponse, tags=["Login and Registration"])
+async def refresh_token(body: RefreshRequest, session: AsyncSession = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and a new refresh token, without a
+    password check. The presented refresh token is used up; presenting it again revokes
+    every token descended from the same login.
+    """
+    rotated = await RefreshTokenService.rotate(session, body.refresh_token)
+    if rotated is None:
+        # Answered directly rather than raised, so the session still commits any revocation
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"detail": "Invalid or expired refresh token."},
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user, new_refresh_token = rotated
+    return _token_response(user, new_refresh_token)
 
 
 @router.get("/verify-email/{user_id}/{token}", status_code=status.HTTP_200_OK, name="verify_email", tags=["Login and Registration"])
@@ -0,0 +1,27 @@
+"""
+Discovery documents for other services.
+
+`/.well-known/jwks.json` publishes the public keys access tokens are signed with, so a gateway
+or downstream service can verify tokens locally instead of calling back into this one.
+"""
+
+from builtins import str
+import hashlib
+import json
+from fastapi import APIRouter, Request, Response
+from app.dependencies import get_settings
+from app.services.jwt_service import get_key_ring, is_asymmetric
+
+router = APIRouter()
+
+
+@router.get("/.well-known/jwks.json", name="jwks", tags=["Operations"])
+async def jwks(request: Request):
+    """Return the JSON Web Key Set, with cache headers and ETag revalidation."""
+    keys = get_key_ring().jwks() if is_asymmetric() else {"keys": []}
+    body = json.dumps(keys, separators=(",", ":"), sort_keys=True)
+    etag = '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+    headers = {"Cache-Control": f"public, max-age={get_settings().jwks_max_age}", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
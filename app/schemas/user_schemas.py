@@ -1,11 +1,14 @@
-from builtins import ValueError, any, bool, str
-from pydantic import BaseModel, EmailStr, Field, validator, root_validator
-from typing import Optional, List
+from builtins import ValueError, any, bool, set, str
+from functools import lru_cache
+from pydantic import BaseModel, EmailStr, Field, create_model, validator, root_validator
+from typing import Optional, List, Tuple, Type
 from datetime import datetime
 from enum import Enum
 import uuid
 import re
 from app.models.user_model import UserRole
+from app.schemas.link_schema import Link
+from app.schemas.pagination_schema import PaginationLink
 from app.utils.nickname_gen import generate_nickname
 
 
@@ -60,6 +63,15 @@ class UserResponse(UserBase):
     nickname: Optional[str] = Field(None, min_length=3, pattern=r'^[\w-]+$', example=generate_nickname())    
     is_professional: Optional[bool] = Field(default=False, example=True)
     role: UserRole
+    links: List[Link] = Field(default=[], description="Actions available on this user; omitted from list items with include_links=false.")
+
+@lru_cache(maxsize=256)
+def user_response_model(fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """The response model of a sparse fieldset: `UserResponse` cut down to `fields`."""
+    if set(fields) == set(UserResponse.model_fields):
+        return UserResponse
+    definitions = {name: (UserResponse.model_fields[name].annotation, UserResponse.model_fields[name]) for name in fields}
+    return create_model(f"UserResponse[{','.join(fields)}]", **definitions)
 
 class LoginRequest(BaseModel):
     email: str = Field(..., example="john.doe@example.com")
@@ -78,6 +90,56 @@ class UserListResponse(BaseModel):
         "linkedin_profile_url": "https://linkedin.com/in/johndoe", 
         "github_profile_url": "https://github.com/johndoe"
     }])
-    total: int = Field(..., example=100)
-    page: int = Field(..., example=1)
-    size: int = Field(..., example=10)
\ No newline at end of file
+    total: Optional[int] = Field(None, example=100, description="Total number of users; omitted in cursor mode or with include_total=false.")
+    total_exact: Optional[bool] = Field(None, example=True, description="False when `total` is a planner estimate or a cached count that may be stale.")
+    page: Optional[int] = Field(None, example=1, description="Page number; omitted in cursor mode.")
+    size: int = Field(..., example=10)
+    links: List[PaginationLink] = []
+class UserImportError(BaseModel):
+    row: int = Field(..., example=3, description="1-based row number, not counting a CSV header.")
+    email: Optional[str] = Field(None, example="john.doe@example.com")
+    error: str = Field(..., example="Email already exists")
+
+class UserImportResponse(BaseModel):
+    created: int = Field(..., example=998)
+    failed: int = Field(..., example=2)
+    errors: List[UserImportError] = []
+
+class UserSearchFilter(BaseModel):
+    """The filters of `GET /api/users/search`, for endpoints that take them in a body."""
+    q: Optional[str] = None
+    contains: Optional[str] = None
+    role: Optional[UserRole] = None
+    is_locked: Optional[bool] = None
+    email_verified: Optional[bool] = None
+    is_professional: Optional[bool] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+class BulkUserRequest(BaseModel):
+    ids: Optional[List[uuid.UUID]] = Field(None, description="Users to act on, by id.")
+    filter: Optional[UserSearchFilter] = Field(None, description="Act on every user matching these filters instead.")
+
+    @root_validator(pre=True)
+    def check_ids_or_filter(cls, values):
+        if (values.get("ids") is None) == (values.get("filter") is None):
+            raise ValueError("Provide either ids or filter")
+        return values
+
+class BulkRoleRequest(BulkUserRequest):
+    role: UserRole
+
+class BulkUserResult(BaseModel):
+    id: uuid.UUID
+    status: str = Field(..., example="updated", description="'updated', 'deleted' or 'not_found'.")
+
+class BulkUserResponse(BaseModel):
+    count: int = Field(..., example=2, description="Number of users updated or deleted.")
+    results: List[BulkUserResult] = Field(..., description="One outcome per requested id, in request order; with a filter, the users affected.")
+
+class UserBatchRequest(BaseModel):
+    ids: List[uuid.UUID] = Field(..., description="Users to look up; at most BATCH_GET_MAX_IDS of them.")
+
+class UserBatchResponse(BaseModel):
+    items: List[UserResponse] = Field(..., description="The users found, in the order their ids were requested.")
+    missing: List[uuid.UUID] = Field(..., description="Requested ids with no user.")
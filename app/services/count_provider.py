@@ -0,0 +1,97 @@
+# app/services/count_provider.py
+from builtins import ValueError, bool, float, int, str
+import time
+from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class CountResult(NamedTuple):
+    value: int
+    exact: bool
+
+
+class CountProvider(ABC):
+    """Counts the rows of one table. Subclasses decide how precise and how expensive that is."""
+
+    def __init__(self, model):
+        self.model = model
+
+    @abstractmethod
+    async def count(self, session: AsyncSession) -> CountResult:
+        """The row count, and whether it is exact (false for an estimate or a cached value)."""
+
+    async def _exact(self, session: AsyncSession) -> int:
+        result = await session.execute(select(func.count()).select_from(self.model), bind_arguments={"replica": True})
+        return result.scalar()
+
+
+class ExactCountProvider(CountProvider):
+    """Runs SELECT count(*) every time."""
+
+    async def count(self, session: AsyncSession) -> CountResult:
+        return CountResult(await self._exact(session), True)
+
+
+class CachedCountProvider(CountProvider):
+    """
+    Runs SELECT count(*) at most once per `ttl` seconds and serves the cached value in between.
+    Only the request that ran the count gets `exact=True`; a cached value may be up to `ttl` old.
+    """
+
+    def __init__(self, model, ttl: float = 30.0, clock=time.monotonic):
+        super().__init__(model)
+        self.ttl = ttl
+        self._clock = clock
+        self._value: Optional[int] = None
+        self._expires_at = 0.0
+
+    async def count(self, session: AsyncSession) -> CountResult:
+        now = self._clock()
+        if self._value is None or now >= self._expires_at:
+            self._value = await self._exact(session)
+            self._expires_at = now + self.ttl
+            return CountResult(self._value, True)
+        return CountResult(self._value, False)
+
+
+class EstimatedCountProvider(CountProvider):
+    """
+    Uses the planner's row estimate (pg_class.reltuples) once the table is at least
+    `threshold` rows, and an exact count below that where a scan is still cheap.
+    Falls back to an exact count on other databases or before the table was analyzed.
+    """
+
+    def __init__(self, model, threshold: int = 100_000):
+        super().__init__(model)
+        self.threshold = threshold
+
+    async def _estimate(self, session: AsyncSession) -> Optional[int]:
+        if session.bind is not None and session.bind.dialect.name != "postgresql":
+            return None
+        result = await session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": self.model.__tablename__},
+            bind_arguments={"replica": True},
+        )
+        estimate = result.scalar()
+        # reltuples is -1 until the table has been vacuumed or analyzed
+        return estimate if estimate is not None and estimate >= 0 else None
+
+    async def count(self, session: AsyncSession) -> CountResult:
+        estimate = await self._estimate(session)
+        if estimate is not None and estimate >= self.threshold:
+            return CountResult(estimate, False)
+        return CountResult(await self._exact(session), True)
+
+
+def build_count_provider(model, strategy: str, ttl: float = 30.0, threshold: int = 100_000) -> CountProvider:
+    """Create the count provider named by `strategy`: 'exact', 'cached' or 'estimate'."""
+    if strategy == "exact":
+        return ExactCountProvider(model)
+    if strategy == "cached":
+        return CachedCountProvider(model, ttl=ttl)
+    if strategy == "estimate":
+        return EstimatedCountProvider(model, threshold=threshold)
+    raise ValueError(f"Unknown count strategy '{strategy}'")
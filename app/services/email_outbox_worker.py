@@ -0,0 +1,120 @@
+# app/services/email_outbox_worker.py
+from builtins import Exception, dict, float, int, len, str, zip
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional
+from sqlalchemy import select, update
+from app.models.email_outbox_model import EmailOutbox
+from app.services.email_service import EmailService
+
+logger = logging.getLogger(__name__)
+
+
+class ClaimedMessage(NamedTuple):
+    id: uuid.UUID
+    recipient: str
+    email_type: str
+    context: dict
+    attempts: int
+
+
+class EmailOutboxWorker:
+    """
+    Drains the email outbox in three steps, so no transaction or row lock is held while SMTP
+    is talked to:
+
+    1. claim: due messages are locked with FOR UPDATE SKIP LOCKED (so several workers can run
+       side by side), marked 'sending' with a lease of `claim_timeout` seconds, and committed;
+    2. send: the batch goes out over the SMTP client's pooled sessions, off the event loop;
+    3. record: each outcome is written back in one short transaction.
+
+    A message whose worker died mid-send is claimed again once its lease runs out. Failed
+    sends are retried with exponential backoff until `max_attempts` is reached.
+    """
+
+    def __init__(self, session_factory, email_service: EmailService, batch_size: int = 50,
+                 poll_interval: float = 2.0, max_attempts: int = 8, backoff_seconds: float = 30.0,
+                 claim_timeout: float = 300.0):
+        self.session_factory = session_factory
+        self.email_service = email_service
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.claim_timeout = claim_timeout
+        self._stopping: Optional[asyncio.Event] = None
+
+    def backoff(self, attempts: int) -> timedelta:
+        """Delay before the next attempt after `attempts` failures."""
+        return timedelta(seconds=self.backoff_seconds * 2 ** (attempts - 1))
+
+    async def run_once(self) -> int:
+        """Deliver one batch of due messages and return how many were attempted."""
+        claimed = await self._claim()
+        if not claimed:
+            return 0
+        outcomes = await asyncio.to_thread(self.email_service.deliver_many, [(message.context, message.email_type) for message in claimed])
+        await self._record(claimed, outcomes)
+        return len(claimed)
+
+    async def _claim(self) -> List[ClaimedMessage]:
+        """Take a batch of due messages, including ones whose earlier claim has expired."""
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as session:
+            query = (
+                select(EmailOutbox)
+                .where(EmailOutbox.status.in_([EmailOutbox.PENDING, EmailOutbox.SENDING]), EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            messages = (await session.execute(query)).scalars().all()
+            claimed = []
+            for message in messages:
+                message.status = EmailOutbox.SENDING
+                message.attempts += 1
+                message.next_attempt_at = now + timedelta(seconds=self.claim_timeout)
+                claimed.append(ClaimedMessage(message.id, message.recipient, message.email_type, message.context, message.attempts))
+            await session.commit()
+            return claimed
+
+    async def _record(self, claimed: List[ClaimedMessage], outcomes: List[Optional[Exception]]):
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as session:
+            for message, error in zip(claimed, outcomes):
+                if error is None:
+                    values = dict(status=EmailOutbox.SENT, sent_at=now, last_error=None)
+                elif message.attempts >= self.max_attempts:
+                    values = dict(status=EmailOutbox.FAILED, last_error=str(error))
+                    logger.error(f"Giving up on {message.email_type} email to {message.recipient} after {message.attempts} attempts: {error}")
+                else:
+                    values = dict(status=EmailOutbox.PENDING, next_attempt_at=now + self.backoff(message.attempts), last_error=str(error))
+                    logger.warning(f"Delivery of {message.email_type} email to {message.recipient} failed, retrying: {error}")
+                # Only while the claim is still ours; after the lease ran out another worker may own it
+                await session.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id == message.id, EmailOutbox.status == EmailOutbox.SENDING, EmailOutbox.attempts == message.attempts)
+                    .values(**values)
+                )
+            await session.commit()
+
+    async def run(self):
+        """Poll the outbox until `stop()` is called."""
+        self._stopping = asyncio.Event()
+        while not self._stopping.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Email outbox worker error: {e}")
+                processed = 0
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stop(self):
+        if self._stopping is not None:
+            self._stopping.set()
@@ -1,38 +1,111 @@
 # email_service.py
-from builtins import ValueError, dict, str
+from builtins import Exception, ValueError, dict, len, str, zip
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from settings.config import settings
-from app.utils.smtp_connection import SMTPClient
+from app.utils.smtp_connection import PooledSMTPClient, SMTPClient
 from app.utils.template_manager import TemplateManager
+from app.models.email_outbox_model import EmailOutbox
 from app.models.user_model import User
 
 
 class EmailService:
+    subject_map = {
+        'email_verification': "Verify Your Account",
+        'password_reset': "Password Reset Instructions",
+        'account_locked': "Account Locked Notification"
+    }
+
     def __init__(self, template_manager: TemplateManager):
-        self.smtp_client = SMTPClient(
-            server=settings.smtp_server,
-            port=settings.smtp_port,
-            username=settings.smtp_username,
-            password=settings.smtp_password
-        )
+        if settings.smtp_pool_size > 0:
+            self.smtp_client = PooledSMTPClient(
+                server=settings.smtp_server,
+                port=settings.smtp_port,
+                username=settings.smtp_username,
+                password=settings.smtp_password,
+                use_tls=settings.smtp_use_tls,
+                pool_size=settings.smtp_pool_size,
+                idle_timeout=settings.smtp_idle_timeout
+            )
+        else:
+            self.smtp_client = SMTPClient(
+                server=settings.smtp_server,
+                port=settings.smtp_port,
+                username=settings.smtp_username,
+                password=settings.smtp_password,
+                use_tls=settings.smtp_use_tls
+            )
         self.template_manager = template_manager
 
-    async def send_user_email(self, user_data: dict, email_type: str):
-        subject_map = {
-            'email_verification': "Verify Your Account",
-            'password_reset': "Password Reset Instructions",
-            'account_locked': "Account Locked Notification"
-        }
-
-        if email_type not in subject_map:
+    def deliver(self, user_data: dict, email_type: str):
+        """Render and send an email synchronously. Blocks on SMTP, so call it off the event loop."""
+        if email_type not in self.subject_map:
             raise ValueError("Invalid email type")
 
         html_content = self.template_manager.render_template(email_type, **user_data)
-        self.smtp_client.send_email(subject_map[email_type], html_content, user_data['email'])
+        self.smtp_client.send_email(self.subject_map[email_type], html_content, user_data['email'])
 
-    async def send_verification_email(self, user: User):
+    def deliver_many(self, emails: Iterable[Tuple[dict, str]]) -> List[Optional[Exception]]:
+        """
+        Render and send `(user_data, email_type)` pairs over the SMTP client's pooled sessions.
+        Blocks like `deliver`. Returns one outcome per email, in order: None when it was sent,
+        otherwise the exception that stopped it.
+        """
+        outcomes: List[Optional[Exception]] = []
+        outgoing, positions = [], []
+        for user_data, email_type in emails:
+            try:
+                if email_type not in self.subject_map:
+                    raise ValueError("Invalid email type")
+                html_content = self.template_manager.render_template(email_type, **user_data)
+                outgoing.append((self.subject_map[email_type], html_content, user_data['email']))
+                positions.append(len(outcomes))
+                outcomes.append(None)
+            except Exception as e:
+                outcomes.append(e)
+        for position, outcome in zip(positions, self.smtp_client.send_each(outgoing)):
+            outcomes[position] = outcome
+        return outcomes
+
+    async def send_user_email(self, user_data: dict, email_type: str):
+        self.deliver(user_data, email_type)
+
+    def queue_user_email(self, session: AsyncSession, user_data: dict, email_type: str) -> EmailOutbox:
+        """
+        Add an email to the outbox as part of the caller's transaction. It is delivered by
+        `EmailOutboxWorker` once the transaction commits.
+        """
+        if email_type not in self.subject_map:
+            raise ValueError("Invalid email type")
+        message = EmailOutbox(recipient=user_data['email'], email_type=email_type, context=user_data)
+        session.add(message)
+        return message
+
+    @staticmethod
+    def _verification_data(user: User) -> dict:
         verification_url = f"{settings.server_base_url}verify-email/{user.id}/{user.verification_token}"
-        await self.send_user_email({
+        return {
             "name": user.first_name,
             "verification_url": verification_url,
             "email": user.email
-        }, 'email_verification')
\ No newline at end of file
+        }
+
+    async def send_verification_email(self, user: User):
+        await self.send_user_email(self._verification_data(user), 'email_verification')
+
+    def queue_verification_email(self, session: AsyncSession, user: User) -> EmailOutbox:
+        """Queue the verification email for a user that has already been flushed (so it has an id)."""
+        return self.queue_user_email(session, self._verification_data(user), 'email_verification')
+
+    async def queue_verification_emails(self, session: AsyncSession, users: Iterable) -> None:
+        """
+        Queue verification emails for many users with one multi-row INSERT, e.g. after a bulk
+        import. `users` may be result rows carrying the User columns the email is built from.
+        """
+        messages = [
+            dict(recipient=user.email, email_type='email_verification', context=self._verification_data(user))
+            for user in users
+        ]
+        if messages:
+            await session.execute(insert(EmailOutbox), messages)
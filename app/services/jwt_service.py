@@ -1,8 +1,65 @@
 # app/services/jwt_service.py
 from builtins import dict, str
 import jwt
+import logging
+import os
+import time
 from datetime import datetime, timedelta
+from typing import Optional
 from settings.config import settings
+from app.services.key_ring import ASYMMETRIC_ALGORITHMS, KeyRing
+
+logger = logging.getLogger(__name__)
+
+_key_ring: Optional[KeyRing] = None
+_key_ring_source = None
+_key_files = None
+_next_key_check = 0.0
+
+def is_asymmetric() -> bool:
+    return settings.jwt_algorithm in ASYMMETRIC_ALGORITHMS
+
+def _key_file_versions(directory: str) -> tuple:
+    """Name, mtime and size of every key file, so adding, removing or rewriting one shows up."""
+    with os.scandir(directory) as entries:
+        return tuple(sorted(
+            (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+            for entry in entries if entry.name.endswith(".pem")
+        ))
+
+def get_key_ring() -> KeyRing:
+    """
+    Return the signing key ring, reloading it when the key settings change (e.g. after a
+    SIGHUP) or a key file in the key directory is added, removed or rewritten, which is how a
+    rotation is rolled out without a restart. The directory is looked at no more than once per
+    `jwt_key_check_interval` seconds, not on every signature and verification.
+
+    Without a key directory every worker would sign with its own ephemeral key and reject the
+    others' tokens, so that is only allowed in debug mode.
+    """
+    global _key_ring, _key_ring_source, _key_files, _next_key_check
+    source = (settings.jwt_algorithm, settings.jwt_key_dir, settings.jwt_active_kid)
+    if _key_ring is not None and source == _key_ring_source and (not settings.jwt_key_dir or time.monotonic() < _next_key_check):
+        return _key_ring
+    if settings.jwt_key_dir:
+        key_files = _key_file_versions(settings.jwt_key_dir)
+        _next_key_check = time.monotonic() + settings.jwt_key_check_interval
+        if _key_ring is None or source != _key_ring_source or key_files != _key_files:
+            _key_ring = KeyRing.from_directory(settings.jwt_key_dir, settings.jwt_algorithm, settings.jwt_active_kid or None)
+            _key_ring_source, _key_files = source, key_files
+    elif settings.debug:
+        logger.warning("JWT_KEY_DIR is not set; signing with an ephemeral key that is lost on restart")
+        _key_ring = KeyRing.generate(settings.jwt_algorithm)
+        _key_ring_source, _key_files = source, None
+    else:
+        raise ValueError(f"JWT_KEY_DIR must be set when JWT_ALGORITHM is {settings.jwt_algorithm} (ephemeral keys are only allowed with DEBUG)")
+    return _key_ring
+
+def verification_key_id() -> str:
+    """Identifies the keys tokens are currently verified against; changes whenever they do."""
+    if is_asymmetric():
+        return f"{settings.jwt_algorithm}:{','.join(get_key_ring().kids)}"
+    return f"{settings.jwt_algorithm}:{settings.jwt_secret_key}"
 
 def create_access_token(*, data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -11,12 +68,20 @@ def create_access_token(*, data: dict, expires_delta: timedelta = None):
         to_encode['role'] = to_encode['role'].upper()
     expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=settings.access_token_expire_minutes))
     to_encode.update({"exp": expire})
+    if is_asymmetric():
+        key = get_key_ring().active
+        return jwt.encode(to_encode, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
 def decode_token(token: str):
     try:
+        if is_asymmetric():
+            key = get_key_ring().get(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                return None
+            return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
         decoded = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
         return decoded
     except jwt.PyJWTError:
-        return None
\ No newline at end of file
+        return None
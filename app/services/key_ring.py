@@ -0,0 +1,81 @@
+# app/services/key_ring.py
+from builtins import ValueError, dict, list, open, sorted, str
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+logger = logging.getLogger(__name__)
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "EdDSA")
+
+
+class SigningKey(NamedTuple):
+    kid: str
+    algorithm: str
+    private_key: object
+    public_key: object
+
+
+class KeyRing:
+    """
+    The keys access tokens are signed and verified with. Exactly one key is active and signs
+    new tokens; the others are retiring and only verify tokens issued before the last rotation.
+
+    To rotate: add the new key, make it active, and drop the old one once the longest-lived
+    token it signed has expired. Tokens carry the signing key's id in their `kid` header.
+    """
+
+    def __init__(self, keys: Iterable[SigningKey], active_kid: str):
+        self._keys: Dict[str, SigningKey] = {key.kid: key for key in keys}
+        if active_kid not in self._keys:
+            raise ValueError(f"Active key '{active_kid}' is not in the key ring")
+        self.active = self._keys[active_kid]
+
+    @staticmethod
+    def generate_private_key(algorithm: str):
+        if algorithm == "EdDSA":
+            return ed25519.Ed25519PrivateKey.generate()
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    @classmethod
+    def generate(cls, algorithm: str, kid: str = "ephemeral") -> "KeyRing":
+        """A ring with one freshly generated key; tokens it signs do not survive a restart."""
+        private_key = cls.generate_private_key(algorithm)
+        return cls([SigningKey(kid, algorithm, private_key, private_key.public_key())], kid)
+
+    @classmethod
+    def from_directory(cls, directory: str, algorithm: str, active_kid: Optional[str] = None) -> "KeyRing":
+        """
+        Load every `<kid>.pem` private key in `directory`. Without `active_kid` the most
+        recently modified key is active.
+        """
+        paths = sorted(Path(directory).glob("*.pem"), key=lambda path: path.stat().st_mtime)
+        if not paths:
+            raise ValueError(f"No *.pem signing keys found in '{directory}'")
+        keys = []
+        for path in paths:
+            with open(path, "rb") as file:
+                private_key = serialization.load_pem_private_key(file.read(), password=None)
+            keys.append(SigningKey(path.stem, algorithm, private_key, private_key.public_key()))
+        return cls(keys, active_kid or paths[-1].stem)
+
+    def get(self, kid: Optional[str]) -> Optional[SigningKey]:
+        return self._keys.get(kid) if kid else None
+
+    @property
+    def kids(self) -> List[str]:
+        return sorted(self._keys)
+
+    def jwks(self) -> dict:
+        """The public halves of all keys as a JSON Web Key Set."""
+        keys = []
+        for key in self._keys.values():
+            exporter = OKPAlgorithm if key.algorithm == "EdDSA" else RSAAlgorithm
+            jwk = json.loads(exporter.to_jwk(key.public_key))
+            jwk.update(kid=key.kid, use="sig", alg=key.algorithm)
+            keys.append(jwk)
+        return {"keys": keys}
@@ -0,0 +1,149 @@
+# app/services/password_service.py
+from builtins import Exception, ValueError, bool, dict, float, int, len, max, range, str
+import asyncio
+import math
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Sequence
+from app.utils.security import hash_password, hash_passwords, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when no hashing slot frees up within the configured queue timeout."""
+
+
+class PasswordService:
+    """
+    Runs bcrypt hashing and verification on a bounded worker pool so the event loop
+    keeps serving other requests while a hash is being computed.
+
+    At most ``max_in_flight`` operations are submitted to the pool at once; callers
+    beyond that wait up to ``queue_timeout`` seconds for a slot and then get
+    ``PasswordHashingBusy``, which the API turns into a 503.
+    """
+
+    def __init__(self, max_workers: int = 4, max_in_flight: int = 16, queue_timeout: float = 5.0,
+                 executor: str = "thread", rounds: int = 12):
+        if executor not in ("thread", "process"):
+            raise ValueError("executor must be 'thread' or 'process'")
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self.queue_timeout = queue_timeout
+        self.executor_kind = executor
+        self.rounds = rounds
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+        self._in_flight = 0
+        self._waiting = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds_total = 0.0
+        self._max_wait_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # asyncio primitives are bound to a single loop, so rebuild when the loop changes
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._slots_loop = loop
+        return self._slots
+
+    async def _acquire(self, slots: asyncio.Semaphore) -> bool:
+        """
+        Take a slot, waiting up to ``queue_timeout``; False if none freed up. The acquire runs
+        as its own task rather than under ``asyncio.wait_for``, which before Python 3.12 can
+        drop a permit that was granted just as the timeout fired. If the wait ends any other
+        way than with the permit in hand (timeout, or the caller being cancelled), a permit the
+        task still ends up with is released, so the pool never shrinks.
+        """
+        acquire = asyncio.ensure_future(slots.acquire())
+
+        def abandon():
+            acquire.cancel()
+            acquire.add_done_callback(lambda task: task.cancelled() or task.exception() or slots.release())
+
+        try:
+            await asyncio.wait({acquire}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            abandon()
+            raise
+        if acquire.done() and not acquire.cancelled() and acquire.exception() is None:
+            return True
+        abandon()
+        return False
+
+    async def _run(self, func, *args):
+        slots = self._get_slots()
+        started = time.perf_counter()
+        self._waiting += 1
+        try:
+            acquired = await self._acquire(slots)
+        finally:
+            self._waiting -= 1
+        if not acquired:
+            self._rejected += 1
+            logger.warning("Password hashing pool saturated (%d in flight)", self._in_flight)
+            raise PasswordHashingBusy("Password hashing capacity exhausted, try again later")
+        waited = time.perf_counter() - started
+        self._wait_seconds_total += waited
+        self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            slots.release()
+
+    async def hash(self, password: str) -> str:
+        """Hash ``password`` on the worker pool."""
+        return await self._run(hash_password, password, self.rounds)
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """
+        Hash a batch of passwords, in order. The batch is split into one chunk per worker, so
+        each worker is handed its share at once rather than a password at a time.
+        """
+        if not passwords:
+            return []
+        size = math.ceil(len(passwords) / self.max_workers)
+        chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+        results = await asyncio.gather(*(self._run(hash_passwords, chunk, self.rounds) for chunk in chunks))
+        return [hashed for chunk in results for hashed in chunk]
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify ``plain_password`` against ``hashed_password`` on the worker pool."""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def metrics(self) -> dict:
+        """Return a snapshot of pool saturation counters."""
+        return {
+            "executor": self.executor_kind,
+            "max_workers": self.max_workers,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "saturation": self._in_flight / self.max_in_flight,
+            "avg_wait_seconds": self._wait_seconds_total / self._completed if self._completed else 0.0,
+            "max_wait_seconds": self._max_wait_seconds,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
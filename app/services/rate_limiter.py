@@ -0,0 +1,132 @@
+# app/services/rate_limiter.py
+from builtins import dict, float, int, len, max, min, str
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+
+class TokenBucket:
+    """
+    Allow bursts of up to `capacity` requests, refilled at `rate` requests per second.
+    The state kept per key is (tokens, updated_at).
+    """
+
+    def __init__(self, capacity: int, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+
+    @property
+    def idle_seconds(self) -> float:
+        """Seconds after the last hit at which a key's state is the same as a fresh one."""
+        return self.capacity / self.rate
+
+    def hit(self, state: Optional[tuple], now: float) -> Tuple[tuple, float]:
+        """Apply one request; returns the new state and 0, or the seconds to wait if rejected."""
+        tokens, updated_at = state or (float(self.capacity), now)
+        tokens = min(float(self.capacity), tokens + (now - updated_at) * self.rate)
+        if tokens >= 1:
+            return (tokens - 1, now), 0.0
+        return (tokens, now), (1 - tokens) / self.rate
+
+
+class SlidingWindow:
+    """
+    Allow `limit` requests in any `window` seconds, approximated from the counts of the current
+    and the previous fixed window, with the previous one weighted by how much of it still
+    overlaps the sliding window. The state kept per key is (window_start, previous, current).
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+
+    @property
+    def idle_seconds(self) -> float:
+        return 2 * self.window
+
+    def hit(self, state: Optional[tuple], now: float) -> Tuple[tuple, float]:
+        window_start, previous, current = state or (now, 0, 0)
+        elapsed = now - window_start
+        if elapsed >= self.window:
+            windows = int(elapsed // self.window)
+            previous = current if windows == 1 else 0
+            current = 0
+            window_start += windows * self.window
+            elapsed = now - window_start
+        if previous * (1 - elapsed / self.window) + current + 1 <= self.limit:
+            return (window_start, previous, current + 1), 0.0
+        if current + 1 > self.limit or previous == 0:
+            retry_after = self.window - elapsed
+        else:
+            # Until enough of the previous window has slid out to make room for one more
+            retry_after = self.window * (1 - (self.limit - current - 1) / previous) - elapsed
+        return (window_start, previous, current), max(retry_after, 0.001)
+
+
+class RateLimitBackend(ABC):
+    """
+    Where rate limit state lives. The in-process backend limits each worker on its own; a
+    shared backend (e.g. Redis) implements `hit` atomically on the server so every worker
+    draws from the same budget.
+    """
+
+    @abstractmethod
+    async def hit(self, key: str, limit) -> float:
+        """Count one request against `key` under `limit` (a TokenBucket or SlidingWindow).
+        Returns 0 if it is allowed, otherwise the seconds until it would be."""
+
+    def metrics(self) -> dict:
+        return {}
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process rate limit state, a few numbers per key. Keys that have been idle long enough
+    to be back at a full budget are swept every `evict_interval` seconds, and at most
+    `max_keys` are kept, dropping the least recently used, so a flood of distinct IPs or
+    usernames cannot grow memory without bound.
+    """
+
+    def __init__(self, max_keys: int = 100_000, evict_interval: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.evict_interval = evict_interval
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[tuple, float]]" = OrderedDict()
+        self._next_sweep = clock() + evict_interval
+        self.rejected = 0
+        self.evictions = 0
+
+    async def hit(self, key: str, limit) -> float:
+        # No awaits below, so concurrent requests on the event loop cannot interleave
+        now = self.clock()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        entry = self._entries.get(key)
+        state, retry_after = limit.hit(entry[0] if entry else None, now)
+        self._entries[key] = (state, now + limit.idle_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        if retry_after:
+            self.rejected += 1
+        return retry_after
+
+    def _sweep(self, now: float):
+        idle = [key for key, (_, idle_at) in self._entries.items() if idle_at <= now]
+        for key in idle:
+            del self._entries[key]
+        self.evictions += len(idle)
+        self._next_sweep = now + self.evict_interval
+
+    def clear(self):
+        self._entries.clear()
+
+    def metrics(self) -> dict:
+        return {
+            "keys": len(self._entries),
+            "max_keys": self.max_keys,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,92 @@
+# app/services/refresh_token_service.py
+from builtins import classmethod, str
+from datetime import datetime, timedelta, timezone
+import hashlib
+import logging
+import secrets
+import uuid
+from typing import Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies import get_settings
+from app.models.refresh_token_model import RefreshToken
+from app.models.user_model import User
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshTokenService:
+    """
+    Issues and rotates refresh tokens. Methods add their changes to the session and leave the
+    commit to the caller, so a login or refresh is committed as one unit of work.
+    """
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @classmethod
+    async def issue(cls, session: AsyncSession, user_id: uuid.UUID, family_id: Optional[uuid.UUID] = None) -> str:
+        """Create a refresh token for the user and return it; only its digest is stored."""
+        token = secrets.token_urlsafe(32)
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=get_settings().refresh_token_expire_minutes)
+        session.add(RefreshToken(
+            user_id=user_id,
+            family_id=family_id or uuid.uuid4(),
+            token_hash=cls._hash(token),
+            expires_at=expires_at,
+        ))
+        await session.flush()
+        return token
+
+    @classmethod
+    async def rotate(cls, session: AsyncSession, token: str) -> Optional[Tuple[User, str]]:
+        """
+        Exchange a refresh token for its successor. Returns the user and the new token, or None
+        if the token is unknown, expired, revoked or belongs to a user who may not log in.
+
+        The token is claimed with a single conditional UPDATE, so of two concurrent requests
+        presenting the same token only one succeeds. Presenting an already used token means it
+        was stolen or replayed, and every token in its family is revoked.
+        """
+        now = datetime.now(timezone.utc)
+        token_hash = cls._hash(token)
+        claimed = await session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == token_hash, RefreshToken.revoked_at.is_(None), RefreshToken.expires_at > now)
+            .values(revoked_at=now)
+            .returning(RefreshToken.user_id, RefreshToken.family_id)
+        )
+        row = claimed.first()
+        if row is None:
+            reused = await session.execute(
+                select(RefreshToken.family_id).where(RefreshToken.token_hash == token_hash, RefreshToken.revoked_at.is_not(None))
+            )
+            family_id = reused.scalar()
+            if family_id is not None:
+                logger.warning(f"Refresh token reuse detected, revoking family {family_id}")
+                await cls.revoke_family(session, family_id)
+            return None
+
+        user = (await session.execute(select(User).where(User.id == row.user_id))).scalars().first()
+        if user is None or user.is_locked or not user.email_verified:
+            await cls.revoke_family(session, row.family_id)
+            return None
+        return user, await cls.issue(session, user.id, row.family_id)
+
+    @classmethod
+    async def revoke_family(cls, session: AsyncSession, family_id: uuid.UUID):
+        await session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+        )
+
+    @classmethod
+    async def revoke_all(cls, session: AsyncSession, user_id: uuid.UUID):
+        """Revoke every outstanding refresh token of a user, e.g. after a password reset."""
+        await session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+        )
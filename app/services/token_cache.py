@@ -0,0 +1,76 @@
+# app/services/token_cache.py
+from builtins import dict, float, int, isinstance, len, str
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified access-token claims.
+
+    Entries are keyed on a SHA-256 digest of the token together with the signing key it was
+    verified against, so raw tokens are never held and rotating the key makes every earlier
+    entry unreachable. An entry is only served until the token's `exp`; tokens without an
+    expiry are not cached. A `max_size` of 0 disables the cache. Safe to use from several threads.
+    """
+
+    def __init__(self, max_size: int = 10_000, clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self.clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str, signing_key: str) -> bytes:
+        return hashlib.sha256(f"{signing_key}\x00{token}".encode()).digest()
+
+    def get(self, token: str, signing_key: str) -> Optional[dict]:
+        """Return the cached claims for `token`, or None if absent or expired."""
+        if self.max_size <= 0:
+            # Disabled: no digest, no lock, and no misses to skew the hit ratio
+            return None
+        key = self._key(token, signing_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, signing_key: str, claims: dict):
+        expires_at = claims.get("exp")
+        if self.max_size <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        key = self._key(token, signing_key)
+        with self._lock:
+            self._entries[key] = (claims, float(expires_at))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
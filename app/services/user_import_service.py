@@ -0,0 +1,162 @@
+# app/services/user_import_service.py
+from builtins import ValueError, classmethod, dict, isinstance, iter, len, next, set, str, sum, zip
+import logging
+import uuid
+from typing import AsyncIterator, List, Tuple
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user_model import UserRole
+from app.schemas.user_schemas import UserCreate
+from app.services.email_service import EmailService
+from app.services.password_service import PasswordService
+from app.services.user_service import NICKNAME_MAX_ROUNDS, UserService
+from app.utils.imports import Record
+from app.utils.security import generate_verification_token
+
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = "users_import"
+# Columns copied into the staging table and from there into users; the rest take their defaults
+STAGED_COLUMNS = (
+    "id", "nickname", "email", "first_name", "last_name", "bio", "profile_picture_url", "linkedin_profile_url",
+    "github_profile_url", "role", "is_professional", "failed_login_attempts", "is_locked", "email_verified",
+    "verification_token", "hashed_password",
+)
+
+
+def _error(row: int, email, message: str) -> dict:
+    return {"row": row, "email": email, "error": message}
+
+
+class UserImportService:
+    """
+    Creates users in bulk from a stream of records, a batch at a time:
+
+    1. each record is validated with `UserCreate`;
+    2. the batch's passwords are hashed on a process pool;
+    3. nicknames the records leave out are allocated with one query;
+    4. the batch is loaded with COPY into a temporary staging table, and moved into users with a
+       single INSERT ... SELECT ... ON CONFLICT DO NOTHING;
+    5. verification emails are added to the outbox, and the batch is committed.
+
+    A row that fails validation or conflicts with an existing user is reported by its row number
+    (1-based, not counting a CSV header) and does not hold up the others.
+    """
+
+    @classmethod
+    async def import_users(cls, session: AsyncSession, records: AsyncIterator[Record], password_service: PasswordService,
+                           email_service: EmailService, batch_size: int = 1000) -> dict:
+        """Import every record and return the `UserImportResponse` report."""
+        report = {"created": 0, "failed": 0, "errors": []}
+        batch: List[Tuple[int, Record]] = []
+        row = 0
+        async for record in records:
+            row += 1
+            batch.append((row, record))
+            if len(batch) >= batch_size:
+                await cls._import_batch(session, batch, password_service, email_service, report)
+                batch = []
+        if batch:
+            await cls._import_batch(session, batch, password_service, email_service, report)
+        report["errors"].sort(key=lambda error: error["row"])
+        report["failed"] = len(report["errors"])
+        return report
+
+    @staticmethod
+    def _validate(batch: List[Tuple[int, Record]], report: dict) -> List[Tuple[int, UserCreate]]:
+        valid, emails = [], set()
+        for row, record in batch:
+            if isinstance(record, ValueError):
+                report["errors"].append(_error(row, None, str(record)))
+                continue
+            try:
+                user = UserCreate.model_validate({"role": UserRole.AUTHENTICATED, **record})
+            except ValidationError as e:
+                message = "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors())
+                report["errors"].append(_error(row, record.get("email"), message))
+                continue
+            if len(user.password) < 8:
+                report["errors"].append(_error(row, user.email, "Password must be at least 8 characters long"))
+            elif user.email in emails:
+                report["errors"].append(_error(row, user.email, "Duplicate email in import"))
+            else:
+                emails.add(user.email)
+                valid.append((row, user))
+        return valid
+
+    @classmethod
+    async def _import_batch(cls, session: AsyncSession, batch: List[Tuple[int, Record]], password_service: PasswordService,
+                            email_service: EmailService, report: dict):
+        valid = cls._validate(batch, report)
+        if not valid:
+            return
+        hashes = await password_service.hash_many([user.password for _, user in valid])
+        nicknames = iter(await UserService.allocate_nicknames(session, sum(1 for _, user in valid if not user.nickname)))
+        generated = set()
+        staged = []
+        for (row, user), hashed_password in zip(valid, hashes):
+            user_id = uuid.uuid4()
+            nickname = user.nickname
+            if not nickname:
+                nickname = next(nicknames)
+                generated.add(user_id)
+            staged.append((
+                user_id, nickname, user.email, user.first_name, user.last_name, user.bio, user.profile_picture_url,
+                user.linkedin_profile_url, user.github_profile_url, user.role.name, False, 0, False, False,
+                generate_verification_token(), hashed_password, row,
+            ))
+
+        await session.execute(text(
+            f"CREATE TEMPORARY TABLE {STAGING_TABLE} (LIKE users INCLUDING DEFAULTS, row_number integer NOT NULL) ON COMMIT DROP"
+        ))
+        connection = await session.connection()
+        driver_connection = (await connection.get_raw_connection()).driver_connection
+        await driver_connection.copy_records_to_table(STAGING_TABLE, records=staged, columns=[*STAGED_COLUMNS, "row_number"])
+
+        created = await cls._insert_staged(session, generated, report)
+        await email_service.queue_verification_emails(session, created)
+        # Deliberately committed per batch, not by the request: each batch is independent, a
+        # large import never holds one long transaction, and ON COMMIT DROP clears the staging table
+        await session.commit()
+        report["created"] += len(created)
+
+    @classmethod
+    async def _insert_staged(cls, session: AsyncSession, generated: set, report: dict) -> list:
+        """
+        Move the staged rows into users, returning the rows inserted. A row whose nickname was
+        generated for it and happens to be taken gets a new one and is retried; any other
+        conflict is reported.
+        """
+        columns = ", ".join(STAGED_COLUMNS)
+        created = []
+        for _ in range(NICKNAME_MAX_ROUNDS):
+            result = await session.execute(text(
+                f"INSERT INTO users ({columns}) SELECT {columns} FROM {STAGING_TABLE} ORDER BY row_number "
+                "ON CONFLICT DO NOTHING RETURNING id, email, first_name, verification_token"
+            ))
+            created.extend(result.all())
+            conflicts = (await session.execute(text(
+                f"SELECT s.id, s.row_number, s.email, EXISTS (SELECT 1 FROM users AS u WHERE u.email = s.email) AS email_taken "
+                f"FROM {STAGING_TABLE} AS s WHERE NOT EXISTS (SELECT 1 FROM users AS u WHERE u.id = s.id) ORDER BY s.row_number"
+            ))).all()
+            retry = [conflict.id for conflict in conflicts if conflict.id in generated and not conflict.email_taken]
+            for conflict in conflicts:
+                if conflict.email_taken:
+                    report["errors"].append(_error(conflict.row_number, conflict.email, "Email already exists"))
+                elif conflict.id not in generated:
+                    report["errors"].append(_error(conflict.row_number, conflict.email, "Nickname already taken"))
+            await session.execute(
+                text(f"DELETE FROM {STAGING_TABLE} WHERE NOT (id = ANY(:retry))"),
+                {"retry": retry},
+            )
+            if not retry:
+                return created
+            await session.execute(
+                text(f"UPDATE {STAGING_TABLE} AS s SET nickname = n.nickname "
+                     "FROM unnest(CAST(:ids AS uuid[]), CAST(:nicknames AS varchar[])) AS n(id, nickname) WHERE s.id = n.id"),
+                {"ids": retry, "nicknames": await UserService.allocate_nicknames(session, len(retry))},
+            )
+        rows = (await session.execute(text(f"SELECT row_number, email FROM {STAGING_TABLE} ORDER BY row_number"))).all()
+        report["errors"].extend(_error(row.row_number, row.email, "Could not allocate a unique nickname") for row in rows)
+        return created
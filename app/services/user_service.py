@@ -1,44 +1,96 @@
-from builtins import Exception, bool, classmethod, int, str
+from builtins import Exception, bool, classmethod, getattr, int, len, list, range, set, str
+import re
 from datetime import datetime, timezone
 import secrets
-from typing import Optional, Dict, List
+from typing import AsyncIterator, Optional, Dict, List, Sequence, Tuple
 from pydantic import ValidationError
-from sqlalchemy import func, update, select
+from sqlalchemy import any_, bindparam, case, delete, func, literal, literal_column, null, or_, update, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.dependencies import get_email_service, get_settings
-from app.models.user_model import User, UserRole
+from sqlalchemy.orm import load_only
+from app.dependencies import get_email_service, get_password_service, get_settings
+from app.models.user_model import SEARCH_DOCUMENT, TRIGRAM_COLUMNS, User, UserRole
 from app.schemas.user_schemas import UserCreate, UserUpdate
-from app.utils.nickname_gen import generate_nickname
-from app.utils.security import generate_verification_token, hash_password, verify_password
+from app.utils.nickname_gen import generate_nickname, generate_nicknames
+from app.utils.security import generate_verification_token
 from uuid import UUID
 from app.services.email_service import EmailService
+from app.services.password_service import PasswordHashingBusy
+from app.services.refresh_token_service import RefreshTokenService
+from app.utils.cursors import CursorPosition
 import logging
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+NICKNAME_BATCH_SIZE = 16
+NICKNAME_MAX_ROUNDS = 5
+
 class UserService:
     @classmethod
-    async def _execute_query(cls, session: AsyncSession, query):
+    async def _execute_read(cls, session: AsyncSession, query, replica: bool = True):
+        """
+        Run a SELECT. Nothing is committed; the request's session scope ends the transaction.
+
+        With `replica` the statement may be served by a read replica (see `RoutingSession`);
+        lookups that feed a write should pass `replica=False` so they never see a lagging copy.
+        """
+        bind_arguments = {"replica": True} if replica else None
+        try:
+            return await session.execute(query, bind_arguments=bind_arguments)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error: {e}")
+            await session.rollback()
+            return None
+
+    @classmethod
+    async def _execute_write(cls, session: AsyncSession, query):
+        """
+        Run a data-modifying statement in the session's transaction. It is not committed here:
+        the request is one unit of work and `get_db` commits it once, after the endpoint returns.
+        """
         try:
             result = await session.execute(query)
-            await session.commit()
             return result
         except SQLAlchemyError as e:
             logger.error(f"Database error: {e}")
             await session.rollback()
             return None
 
+    @staticmethod
+    def _select(columns: Optional[Sequence[str]] = None):
+        """
+        SELECT users, or with `columns` only those columns and the primary key. Reading any
+        other attribute of the loaded users then raises instead of querying, so a projection
+        that leaves out `hashed_password` guarantees it never leaves the database. `id` is always
+        named, so an empty projection (`fields=links`) still loads the key the links are built on.
+        """
+        if columns is None:
+            return select(User)
+        return select(User).options(load_only(User.id, *(getattr(User, column) for column in columns), raiseload=True))
+
     @classmethod
-    async def _fetch_user(cls, session: AsyncSession, **filters) -> Optional[User]:
-        query = select(User).filter_by(**filters)
-        result = await cls._execute_query(session, query)
+    async def _fetch_user(cls, session: AsyncSession, replica: bool = True, columns: Optional[Sequence[str]] = None, **filters) -> Optional[User]:
+        query = cls._select(columns).filter_by(**filters)
+        result = await cls._execute_read(session, query, replica=replica)
         return result.scalars().first() if result else None
 
     @classmethod
-    async def get_by_id(cls, session: AsyncSession, user_id: UUID) -> Optional[User]:
-        return await cls._fetch_user(session, id=user_id)
+    async def get_by_id(cls, session: AsyncSession, user_id: UUID, columns: Optional[Sequence[str]] = None) -> Optional[User]:
+        return await cls._fetch_user(session, columns=columns, id=user_id)
+
+    @classmethod
+    async def get_by_ids(cls, session: AsyncSession, user_ids: Sequence[UUID], columns: Optional[Sequence[str]] = None) -> List[User]:
+        """
+        The users with any of `user_ids`, in no particular order, read with a single query. The
+        ids are sent as one array parameter, so lists of any length share a prepared statement.
+        """
+        if not user_ids:
+            return []
+        query = cls._select(columns).where(User.id == any_(bindparam("ids", list(user_ids), type_=ARRAY(PG_UUID(as_uuid=True)))))
+        result = await cls._execute_read(session, query)
+        return list(result.scalars().all()) if result else []
 
     @classmethod
     async def get_by_nickname(cls, session: AsyncSession, nickname: str) -> Optional[User]:
@@ -48,6 +100,66 @@ class UserService:
     async def get_by_email(cls, session: AsyncSession, email: str) -> Optional[User]:
         return await cls._fetch_user(session, email=email)
 
+    @classmethod
+    async def allocate_nickname(cls, session: AsyncSession, batch_size: int = NICKNAME_BATCH_SIZE) -> str:
+        """
+        Pick a nickname that is not taken yet, checking a whole batch of random candidates
+        with one `nickname IN (...)` query instead of one lookup per candidate.
+        """
+        for _ in range(NICKNAME_MAX_ROUNDS):
+            candidates = generate_nicknames(batch_size)
+            result = await session.execute(select(User.nickname).where(User.nickname.in_(candidates)))
+            taken = set(result.scalars().all())
+            for candidate in candidates:
+                if candidate not in taken:
+                    return candidate
+        raise ValueError("Could not allocate a unique nickname")
+
+    @classmethod
+    async def allocate_nicknames(cls, session: AsyncSession, count: int) -> List[str]:
+        """`count` distinct nicknames not taken yet, checked with one `nickname IN (...)` query per round."""
+        nicknames: List[str] = []
+        for _ in range(NICKNAME_MAX_ROUNDS):
+            if len(nicknames) >= count:
+                break
+            chosen = set(nicknames)
+            candidates = [nickname for nickname in generate_nicknames(count - len(nicknames)) if nickname not in chosen]
+            result = await session.execute(select(User.nickname).where(User.nickname.in_(candidates)))
+            taken = set(result.scalars().all())
+            nicknames.extend(candidate for candidate in candidates if candidate not in taken)
+        if len(nicknames) < count:
+            raise ValueError("Could not allocate unique nicknames")
+        return nicknames
+
+    @classmethod
+    async def _insert_user(cls, session: AsyncSession, values: Dict[str, str]) -> User:
+        """
+        Insert a user in one statement. The first-admin decision is made inside the INSERT
+        with an `EXISTS` subquery, and unique violations are absorbed by ON CONFLICT DO NOTHING,
+        so the happy path never needs a preceding lookup. Only when nothing was inserted do we
+        look at why: a taken email is reported, a taken nickname is re-allocated and retried.
+        """
+        users_exist = select(User.id).exists()
+        role_type = User.__table__.c.role.type
+        values = dict(values)
+        verification_token = values.pop("verification_token", None) or generate_verification_token()
+        values.update(
+            role=case((users_exist, literal(UserRole.ANONYMOUS, role_type)), else_=literal(UserRole.ADMIN, role_type)),
+            email_verified=~users_exist,
+            verification_token=case((users_exist, verification_token), else_=null()),
+        )
+        for _ in range(NICKNAME_MAX_ROUNDS):
+            query = pg_insert(User).values(**values).on_conflict_do_nothing().returning(User)
+            result = await session.execute(query)
+            user = result.scalars().first()
+            if user is not None:
+                return user
+            taken = await session.execute(select(User.id).where(User.email == values["email"]))
+            if taken.first() is not None:
+                raise ValueError("User with the given email already exists")
+            values["nickname"] = await cls.allocate_nickname(session)
+        raise ValueError("Could not allocate a unique nickname")
+
     @classmethod
     async def create(cls, session: AsyncSession, user_data: Dict[str, str], email_service: EmailService) -> Optional[User]:
         try:
@@ -59,33 +171,18 @@ class UserService:
             if not user_data.get("nickname") or len(user_data["nickname"]) < 3:
                 raise ValueError("Nickname must be at least 3 characters long")
 
-            # Check if the user already exists
-            existing_user = await cls.get_by_email(session, user_data["email"])
-            if existing_user:
-                raise ValueError("User with the given email already exists")
+            # Hash the password and pick a random nickname; collisions are resolved on insert
+            user_data["hashed_password"] = await get_password_service().hash(user_data.pop("password"))
+            user_data["nickname"] = generate_nickname()
 
-            # Hash the password and create the user
-            user_data["hashed_password"] = hash_password(user_data.pop("password"))
-            new_user = User(**user_data)
-
-            # Generate a unique nickname
-            new_nickname = generate_nickname()
-            while await cls.get_by_nickname(session, new_nickname):
-                new_nickname = generate_nickname()
-            new_user.nickname = new_nickname
-
-            # Assign role and handle email verification
-            user_count = await cls.count(session)
-            new_user.role = UserRole.ADMIN if user_count == 0 else UserRole.ANONYMOUS
-            if new_user.role == UserRole.ADMIN:
-                new_user.email_verified = True
-            else:
-                new_user.verification_token = generate_verification_token()
-                await email_service.send_verification_email(new_user)
-
-            session.add(new_user)
-            await session.commit()
+            # Role, email_verified and verification_token are decided by the INSERT itself
+            new_user = await cls._insert_user(session, user_data)
+            if not new_user.email_verified:
+                email_service.queue_verification_email(session, new_user)
+            await session.flush()
             return new_user
+        except PasswordHashingBusy:
+            raise
         except ValueError as e:
             logger.error(f"Validation error during user creation: {e}")
             raise
@@ -95,6 +192,7 @@ class UserService:
 
     @classmethod
     async def update(cls, session: AsyncSession, user_id: UUID, update_data: Dict[str, str]) -> Optional[User]:
+        """The updated user, or None if there is no user with `user_id`. Invalid data raises ValueError."""
         try:
             # Validate update data
             if "email" in update_data and "@" not in update_data["email"]:
@@ -104,19 +202,21 @@ class UserService:
 
             # Hash the password if provided
             if "password" in update_data:
-                update_data["hashed_password"] = hash_password(update_data.pop("password"))
-
-            # Update the user
-            query = update(User).where(User.id == user_id).values(**update_data).execution_options(synchronize_session="fetch")
-            await cls._execute_query(session, query)
-
-            # Fetch and return the updated user
-            updated_user = await cls.get_by_id(session, user_id)
-            if updated_user:
-                session.refresh(updated_user)
-                return updated_user
-            else:
-                raise ValueError("User not found")
+                update_data["hashed_password"] = await get_password_service().hash(update_data.pop("password"))
+
+            # Update the user and read the new row back in the same statement
+            query = (
+                update(User)
+                .where(User.id == user_id)
+                .values(**update_data)
+                .returning(User)
+                .execution_options(synchronize_session="fetch", populate_existing=True)
+            )
+            result = await cls._execute_write(session, query)
+            # None when no user has this id; the caller answers 404
+            return result.scalars().first() if result else None
+        except PasswordHashingBusy:
+            raise
         except ValueError as e:
             logger.error(f"Validation error during user update: {e}")
             raise
@@ -126,81 +226,233 @@ class UserService:
 
     @classmethod
     async def delete(cls, session: AsyncSession, user_id: UUID) -> bool:
-        user = await cls.get_by_id(session, user_id)
+        user = await cls._fetch_user(session, replica=False, id=user_id)
         if not user:
             return False
         await session.delete(user)
-        await session.commit()
+        await session.flush()
         return True
 
     @classmethod
-    async def list_users(cls, session: AsyncSession, skip: int = 0, limit: int = 10) -> List[User]:
-        query = select(User).offset(skip).limit(limit)
-        result = await cls._execute_query(session, query)
+    async def bulk_update(cls, session: AsyncSession, values: Optional[Dict], ids: Optional[Sequence[UUID]] = None,
+                          where: Sequence = (), chunk_size: int = 5000) -> List[UUID]:
+        """
+        Apply `values` to many users at once, or delete them when `values` is None. The users
+        are given by `ids`, or else are every user matching `where`. Returns the ids changed.
+
+        Each chunk of ids is one `UPDATE ... WHERE id = ANY(:ids) RETURNING id` (or DELETE),
+        committed on its own, so no transaction holds row locks for the whole list. With
+        `where` the matching ids are read a chunk at a time in id order.
+        """
+        affected: List[UUID] = []
+        async for chunk in cls._id_chunks(session, ids, where, chunk_size):
+            condition = User.id == any_(bindparam("ids", list(chunk), type_=ARRAY(PG_UUID(as_uuid=True))))
+            query = delete(User) if values is None else update(User).values(**values)
+            query = query.where(condition).returning(User.id).execution_options(synchronize_session=False)
+            result = await session.execute(query)
+            affected.extend(result.scalars().all())
+            # Deliberately committed per chunk, not by the request: a single transaction would
+            # hold row locks on every listed user until the last chunk is done
+            await session.commit()
+        return affected
+
+    @classmethod
+    async def _id_chunks(cls, session: AsyncSession, ids: Optional[Sequence[UUID]], where: Sequence, chunk_size: int):
+        if ids is not None:
+            for start in range(0, len(ids), chunk_size):
+                yield ids[start:start + chunk_size]
+            return
+        last_id = None
+        while True:
+            query = select(User.id).where(*where).order_by(User.id).limit(chunk_size)
+            if last_id is not None:
+                query = query.where(User.id > last_id)
+            chunk = (await session.execute(query)).scalars().all()
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1]
+
+    @classmethod
+    async def count_matching(cls, session: AsyncSession, where: Sequence) -> int:
+        """How many users match every condition in `where`; read from the primary."""
+        result = await cls._execute_read(session, select(func.count()).select_from(User).where(*where), replica=False)
+        return result.scalar() if result else 0
+
+    @classmethod
+    async def list_users(cls, session: AsyncSession, skip: int = 0, limit: int = 10, columns: Optional[Sequence[str]] = None) -> List[User]:
+        query = cls._select(columns).offset(skip).limit(limit)
+        result = await cls._execute_read(session, query)
         return result.scalars().all() if result else []
 
+    @classmethod
+    async def list_users_by_cursor(cls, session: AsyncSession, limit: int = 10, position: Optional[CursorPosition] = None,
+                                   columns: Optional[Sequence[str]] = None, where: Sequence = ()) -> Tuple[List[User], bool]:
+        """
+        Keyset pagination over (created_at, id), served by the ix_users_created_at_id index.
+
+        Returns the page in ascending order and whether more rows exist beyond it in the
+        direction of travel. Each page is an index range scan, so cost does not grow with depth.
+        A projection to `columns` always includes created_at, which the cursors are made of.
+        `where` narrows the rows paged over, e.g. to the matches of a search.
+        """
+        key = tuple_(User.created_at, User.id)
+        backwards = position is not None and position.backwards
+        query = cls._select(None if columns is None else [*columns, "created_at"]).where(*where)
+        if position is not None:
+            boundary = tuple_(position.created_at, position.id)
+            query = query.where(key < boundary if backwards else key > boundary)
+        if backwards:
+            query = query.order_by(User.created_at.desc(), User.id.desc())
+        else:
+            query = query.order_by(User.created_at, User.id)
+        result = await cls._execute_read(session, query.limit(limit + 1))
+        users = list(result.scalars().all()) if result else []
+        has_more = len(users) > limit
+        users = users[:limit]
+        if backwards:
+            users.reverse()
+        return users, has_more
+
+    @staticmethod
+    def search_conditions(q: Optional[str] = None, contains: Optional[str] = None, role: Optional[UserRole] = None,
+                          is_locked: Optional[bool] = None, email_verified: Optional[bool] = None,
+                          is_professional: Optional[bool] = None, created_after: Optional[datetime] = None,
+                          created_before: Optional[datetime] = None) -> list:
+        """
+        WHERE clauses for a user search, to pass to `list_users_by_cursor`; filters left as None
+        do not apply.
+
+        `q` matches words starting with each of its terms anywhere in the nickname, email, names
+        or bio, through the GIN index on SEARCH_DOCUMENT. `contains` is a case-insensitive
+        substring match on the nickname, email or names, which the pg_trgm indexes serve.
+        """
+        conditions = []
+        # tsquery operators and quotes are dropped, so user input cannot break the query's syntax;
+        # the rest is left whole for the parser, which keeps e.g. an email address as one word
+        terms = [term for term in re.findall(r"[^\s&|!():*<>'\\]+", q or "") if re.search(r"\w", term)]
+        if terms:
+            query = " & ".join(f"{term}:*" for term in terms)
+            conditions.append(SEARCH_DOCUMENT.op("@@")(func.to_tsquery(literal_column("'simple'::regconfig"), query)))
+        if contains:
+            pattern = "%" + re.sub(r"([\\%_])", r"\\\1", contains) + "%"
+            conditions.append(or_(*(getattr(User, column).ilike(pattern) for column in TRIGRAM_COLUMNS)))
+        filters = {"role": role, "is_locked": is_locked, "email_verified": email_verified, "is_professional": is_professional}
+        conditions.extend(getattr(User, name) == value for name, value in filters.items() if value is not None)
+        if created_after is not None:
+            conditions.append(User.created_at >= created_after)
+        if created_before is not None:
+            conditions.append(User.created_at < created_before)
+        return conditions
+
+    @classmethod
+    async def stream_users(cls, session: AsyncSession, columns: Sequence[str], where: Sequence = (),
+                           batch_size: int = 1000) -> AsyncIterator[Sequence]:
+        """
+        Yield the users matching `where` in (created_at, id) order, as batches of up to
+        `batch_size` rows mapping each of `columns` to its value.
+
+        Rows are read through a server-side cursor, a batch per round trip, and never become ORM
+        objects, so memory stays flat however many users match. The cursor needs a transaction
+        to live in, so pass a session from `Database.get_session_factory()`, not an autocommit
+        read session. The query is sent to a read replica when there is one (see
+        `RoutingSession`); the replica connection runs inside that session's transaction too.
+        """
+        query = (
+            select(*(User.__table__.c[name] for name in columns))
+            .where(*where)
+            .order_by(User.created_at, User.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await session.stream(query, bind_arguments={"replica": True})
+        async for rows in result.mappings().partitions():
+            yield rows
+
     @classmethod
     async def register_user(cls, session: AsyncSession, user_data: Dict[str, str], email_service: EmailService) -> Optional[User]:
         return await cls.create(session, user_data, email_service)
 
+    @classmethod
+    async def authenticate(cls, session: AsyncSession, email: str, password: str) -> Tuple[Optional[User], bool]:
+        """
+        Check a user's credentials with a single lookup. Returns the user (or None) and whether
+        the account was already locked, so the caller can tell a lockout from bad credentials.
+
+        A successful login is left in the session for the caller to commit together with
+        whatever else the request writes. A failed attempt is committed right away; its counter
+        is bumped in the database, not on the loaded row, so concurrent guesses are all counted
+        and the account locks after exactly `max_login_attempts` of them.
+        """
+        user = await cls._fetch_user(session, replica=False, email=email)
+        if user is None:
+            return None, False
+        if user.is_locked:
+            return None, True
+        if not user.email_verified:
+            return None, False
+        if await get_password_service().verify(password, user.hashed_password):
+            user.failed_login_attempts = 0
+            user.last_login_at = datetime.now(timezone.utc)
+            session.add(user)
+            return user, False
+        attempts = User.failed_login_attempts + 1
+        result = await cls._execute_write(session, update(User)
+            .where(User.id == user.id, User.is_locked.is_(False))
+            .values(failed_login_attempts=attempts, is_locked=attempts >= settings.max_login_attempts)
+            .returning(User.failed_login_attempts, User.is_locked)
+            .execution_options(synchronize_session=False))
+        row = result.first() if result else None
+        # Deliberately committed here: the request fails with 401 and get_db commits nothing on
+        # an error, but the attempt must still count towards the lockout
+        await session.commit()
+        if row and row.is_locked:
+            logger.warning(f"Locked user {user.id} after {row.failed_login_attempts} failed login attempts")
+        return None, False
+
     @classmethod
     async def login_user(cls, session: AsyncSession, email: str, password: str) -> Optional[User]:
-        user = await cls.get_by_email(session, email)
-        if user:
-            if not user.email_verified or user.is_locked:
-                return None
-            if verify_password(password, user.hashed_password):
-                user.failed_login_attempts = 0
-                user.last_login_at = datetime.now(timezone.utc)
-                session.add(user)
-                await session.commit()
-                return user
-            else:
-                user.failed_login_attempts += 1
-                if user.failed_login_attempts >= settings.max_login_attempts:
-                    user.is_locked = True
-                session.add(user)
-                await session.commit()
-        return None
+        user, _ = await cls.authenticate(session, email, password)
+        return user
 
     @classmethod
     async def reset_password(cls, session: AsyncSession, user_id: UUID, new_password: str) -> bool:
-        user = await cls.get_by_id(session, user_id)
+        user = await cls._fetch_user(session, replica=False, id=user_id)
         if user:
-            user.hashed_password = hash_password(new_password)
+            user.hashed_password = await get_password_service().hash(new_password)
             user.failed_login_attempts = 0
             user.is_locked = False
             session.add(user)
-            await session.commit()
+            await RefreshTokenService.revoke_all(session, user.id)
+            await session.flush()
             return True
         return False
 
     @classmethod
     async def verify_email_with_token(cls, session: AsyncSession, user_id: UUID, token: str) -> bool:
-        user = await cls.get_by_id(session, user_id)
+        user = await cls._fetch_user(session, replica=False, id=user_id)
         if user and user.verification_token == token:
             user.email_verified = True
             user.verification_token = None
             user.role = UserRole.AUTHENTICATED
             session.add(user)
-            await session.commit()
+            await session.flush()
             return True
         return False
 
     @classmethod
     async def count(cls, session: AsyncSession) -> int:
         query = select(func.count()).select_from(User)
-        result = await session.execute(query)
+        result = await session.execute(query, bind_arguments={"replica": True})
         return result.scalar()
 
     @classmethod
     async def unlock_user_account(cls, session: AsyncSession, user_id: UUID) -> bool:
-        user = await cls.get_by_id(session, user_id)
+        user = await cls._fetch_user(session, replica=False, id=user_id)
         if user and user.is_locked:
             user.is_locked = False
             user.failed_login_attempts = 0
             session.add(user)
-            await session.commit()
+            await session.flush()
             return True
         return False
     
@@ -209,5 +461,5 @@ class UserService:
        """
       Check if a user's account is locked.
        """
-       user = await cls.get_by_email(session, email)
+       user = await cls._fetch_user(session, replica=False, email=email)
        return user.is_locked if user else False
\ No newline at end of file
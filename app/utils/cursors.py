@@ -0,0 +1,52 @@
+from builtins import TypeError, ValueError, bool, int, len, str
+import base64
+import hashlib
+import hmac
+import json
+from datetime import datetime
+from typing import NamedTuple
+from uuid import UUID
+from settings.config import settings
+
+
+class CursorPosition(NamedTuple):
+    """A keyset position in the (created_at, id) ordering of the users table."""
+    created_at: datetime
+    id: UUID
+    backwards: bool = False
+
+
+def _sign(payload: bytes) -> str:
+    digest = hmac.new(settings.secret_key.encode('utf-8'), payload, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:16]).rstrip(b'=').decode('ascii')
+
+
+def encode_cursor(position: CursorPosition) -> str:
+    """Encode a keyset position into an opaque, tamper-evident cursor string."""
+    payload = json.dumps(
+        [position.created_at.isoformat(), str(position.id), int(position.backwards)],
+        separators=(',', ':'),
+    ).encode('utf-8')
+    body = base64.urlsafe_b64encode(payload).rstrip(b'=').decode('ascii')
+    return f"{body}.{_sign(payload)}"
+
+
+def decode_cursor(cursor: str) -> CursorPosition:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed or its signature does not match.
+    """
+    try:
+        body, signature = cursor.split('.', 1)
+        payload = base64.urlsafe_b64decode(body + '=' * (-len(body) % 4))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise ValueError("Invalid cursor signature")
+    try:
+        created_at, user_id, backwards = json.loads(payload)
+        return CursorPosition(datetime.fromisoformat(created_at), UUID(user_id), bool(backwards))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
@@ -0,0 +1,74 @@
+"""
+Encoders for streamed exports. Each consumes an async iterator of row batches (mappings of
+column name to value) and yields one chunk of bytes per batch, so a response built from them
+holds a single batch in memory at a time.
+"""
+
+from builtins import bool, isinstance, str
+import csv
+import io
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Mapping, Sequence
+import orjson
+from app.utils.responses import dumps
+
+Batches = AsyncIterator[Sequence[Mapping[str, Any]]]
+
+# Leading characters that make spreadsheet applications treat a cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class ExportFormat(str, Enum):
+    """The formats users are exported in, and imported from (see app.utils.imports)."""
+
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+EXPORT_MEDIA_TYPES = {ExportFormat.ndjson: "application/x-ndjson", ExportFormat.csv: "text/csv"}
+
+
+async def ndjson_chunks(batches: Batches) -> AsyncIterator[bytes]:
+    """One JSON object per line, with values encoded as in API responses."""
+    async for rows in batches:
+        yield b"".join(dumps({**row}, orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+def _csv_value(value: Any):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Free-text fields such as bio must not turn into formulas when the report is opened
+        return "'" + value
+    return value
+
+
+async def csv_chunks(batches: Batches, columns: Sequence[str]) -> AsyncIterator[bytes]:
+    """RFC 4180 CSV with a header row of `columns`."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(row[column]) for column in columns] for row in rows)
+        yield buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Compress a stream of chunks into a single gzip member as it goes."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,67 @@
+"""
+Parsers for streamed imports. Each consumes an async iterator of byte chunks, such as a
+request body, and yields one record per row: a dict of field name to value, or a ValueError
+describing why the row could not be read, so the caller can report it by row number and
+carry on with the rest.
+"""
+
+from builtins import ValueError, dict, isinstance, len, str, zip
+import codecs
+import csv
+from typing import AsyncIterator, Union
+import orjson
+
+Record = Union[dict, ValueError]
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """One JSON object per line; blank lines are skipped."""
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield ValueError("Invalid JSON")
+            continue
+        yield record if isinstance(record, dict) else ValueError("Each line must be a JSON object")
+
+
+async def csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """
+    CSV with a header row naming the fields. Empty cells are read as missing values and blank
+    lines are skipped. Quoted cells may span lines.
+    """
+    header = None
+    record_lines, quotes = [], 0
+    async for line in _lines(chunks):
+        record_lines.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            # Inside a quoted cell; escaped quotes come in pairs, so the count is still odd
+            continue
+        values = next(csv.reader(record_lines), [])
+        record_lines, quotes = [], 0
+        if not any(values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield ValueError(f"Expected {len(header)} fields, got {len(values)}")
+        else:
+            yield {name: value for name, value in zip(header, values) if value != ""}
+    if record_lines:
+        yield ValueError("Unterminated quoted field")
@@ -1,48 +1,107 @@
-from builtins import dict, int, max, str
-from typing import List, Callable
+from builtins import dict, getattr, int, max, str
+from typing import Dict, Iterable, List, Callable, Optional
 from urllib.parse import urlencode
 from uuid import UUID
 
-from fastapi import Request
+from fastapi import FastAPI, Request
 from app.schemas.link_schema import Link
-from app.schemas.pagination_schema import PaginationLink
 
 # Utility function to create a link
 def create_link(rel: str, href: str, method: str = "GET", action: str = None) -> Link:
     return Link(rel=rel, href=href, method=method, action=action)
 
-def create_pagination_link(rel: str, base_url: str, params: dict) -> PaginationLink:
+def create_pagination_link(rel: str, base_url: str, params: dict) -> dict:
+    """A `PaginationLink`-shaped dict; like the user links, it is built from the request URL and not validated."""
     # Ensure parameters are added in a specific order
     query_string = f"skip={params['skip']}&limit={params['limit']}"
-    return PaginationLink(rel=rel, href=f"{base_url}?{query_string}")
+    return {"rel": rel, "href": f"{base_url}?{query_string}", "method": "GET"}
 
-def create_user_links(user_id: UUID, request: Request) -> List[Link]:
+USER_ACTIONS = [
+    ("self", "get_user", "GET", "view"),
+    ("update", "update_user", "PUT", "update"),
+    ("delete", "delete_user", "DELETE", "delete"),
+]
+
+class LinkFactory:
+    """
+    Builds HATEOAS links by string substitution into route path templates resolved once,
+    instead of a `request.url_for` route search per link. Links come out as plain dicts in
+    the shape of `Link`; their hrefs are made from the app's own routes, so there is nothing
+    to validate.
+    """
+
+    def __init__(self, routes: Iterable):
+        self.templates: Dict[str, str] = {}
+        for route in routes:
+            name, path_format = getattr(route, "name", None), getattr(route, "path_format", None)
+            # The first route with a name wins, as with url_for
+            if name and path_format and name not in self.templates:
+                self.templates[name] = path_format
+
+    def user_links(self, base_url: str, user_id: UUID) -> List[dict]:
+        """The self/update/delete links of a user; `base_url` is the request's base URL without a trailing slash."""
+        user_id = str(user_id)
+        return [
+            {"rel": rel, "href": base_url + self.templates[name].format(user_id=user_id), "action": action_desc, "type": "application/json"}
+            for rel, name, method, action_desc in USER_ACTIONS
+        ]
+
+def get_link_factory(app: FastAPI) -> LinkFactory:
+    """Return the app's link factory, built from its routes on first use (or at startup)."""
+    factory = getattr(app.state, "link_factory", None)
+    if factory is None:
+        factory = app.state.link_factory = LinkFactory(app.routes)
+    return factory
+
+def request_base_url(request: Request) -> str:
+    return str(request.base_url).rstrip("/")
+
+def create_user_links(user_id: UUID, request: Request) -> List[dict]:
     """
     Generate navigation links for user actions.
     """
-    actions = [
-        ("self", "get_user", "GET", "view"),
-        ("update", "update_user", "PUT", "update"),
-        ("delete", "delete_user", "DELETE", "delete")
-    ]
-    return [
-        create_link(rel, str(request.url_for(action, user_id=str(user_id))), method, action_desc)
-        for rel, action, method, action_desc in actions
-    ]
+    return get_link_factory(request.app).user_links(request_base_url(request), user_id)
 
-def generate_pagination_links(request: Request, skip: int, limit: int, total_items: int) -> List[PaginationLink]:
-    base_url = str(request.url)
-    total_pages = (total_items + limit - 1) // limit
+def generate_pagination_links(request: Request, skip: int, limit: int, total_items: Optional[int], has_next: bool = False) -> List[dict]:
+    """
+    Generate offset pagination links. When the total is unknown there is no `last` link and
+    `has_next` decides whether a `next` link is emitted.
+    """
+    base_url = str(request.url).split("?")[0]
     links = [
         create_pagination_link("self", base_url, {'skip': skip, 'limit': limit}),
         create_pagination_link("first", base_url, {'skip': 0, 'limit': limit}),
-        create_pagination_link("last", base_url, {'skip': max(0, (total_pages - 1) * limit), 'limit': limit})
     ]
 
-    if skip + limit < total_items:
+    if total_items is not None:
+        total_pages = (total_items + limit - 1) // limit
+        links.append(create_pagination_link("last", base_url, {'skip': max(0, (total_pages - 1) * limit), 'limit': limit}))
+        has_next = skip + limit < total_items
+
+    if has_next:
         links.append(create_pagination_link("next", base_url, {'skip': skip + limit, 'limit': limit}))
 
     if skip > 0:
         links.append(create_pagination_link("prev", base_url, {'skip': max(skip - limit, 0), 'limit': limit}))
 
-    return links
\ No newline at end of file
+    return links
+
+def create_cursor_pagination_link(rel: str, base_url: str, limit: int, cursor: str, extra_params: Optional[dict] = None) -> dict:
+    return {"rel": rel, "href": f"{base_url}?{urlencode({'limit': limit, 'cursor': cursor, **(extra_params or {})})}", "method": "GET"}
+
+def generate_cursor_pagination_links(request: Request, limit: int, cursor: str, next_cursor: Optional[str], prev_cursor: Optional[str],
+                                     extra_params: Optional[dict] = None) -> List[dict]:
+    """
+    Generate keyset pagination links. An empty cursor addresses the first page.
+    `extra_params`, e.g. search filters, are carried over into every link.
+    """
+    base_url = str(request.url).split("?")[0]
+    links = [
+        create_cursor_pagination_link("self", base_url, limit, cursor, extra_params),
+        create_cursor_pagination_link("first", base_url, limit, "", extra_params),
+    ]
+    if next_cursor:
+        links.append(create_cursor_pagination_link("next", base_url, limit, next_cursor, extra_params))
+    if prev_cursor:
+        links.append(create_cursor_pagination_link("prev", base_url, limit, prev_cursor, extra_params))
+    return links
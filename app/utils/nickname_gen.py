@@ -1,10 +1,40 @@
-from builtins import str
+from builtins import int, len, list, set, str
 import random
+from typing import List
+
+ADJECTIVES = [
+    "agile", "amber", "ample", "arctic", "bold", "brave", "breezy", "bright", "brisk", "calm",
+    "candid", "cheery", "clever", "cosmic", "cozy", "crisp", "curious", "daring", "dapper", "eager",
+    "early", "earnest", "fancy", "fearless", "fluffy", "frosty", "gentle", "giddy", "glad", "golden",
+    "graceful", "happy", "hardy", "humble", "jolly", "keen", "kind", "lively", "lucky", "mellow",
+    "merry", "mighty", "misty", "nimble", "noble", "perky", "plucky", "polite", "proud", "quick",
+    "quiet", "rapid", "rosy", "rustic", "shiny", "silent", "sly", "snowy", "speedy", "sunny",
+    "swift", "tidy", "witty", "zesty",
+]
+ANIMALS = [
+    "alpaca", "badger", "beaver", "bison", "bobcat", "camel", "caribou", "cheetah", "cobra", "condor",
+    "cougar", "coyote", "crane", "dingo", "dolphin", "eagle", "falcon", "ferret", "finch", "fox",
+    "gazelle", "gecko", "gibbon", "heron", "hippo", "ibis", "iguana", "jackal", "jaguar", "koala",
+    "lemur", "leopard", "lion", "llama", "lynx", "marmot", "meerkat", "mink", "moose", "narwhal",
+    "ocelot", "orca", "otter", "owl", "panda", "panther", "parrot", "pelican", "penguin", "puffin",
+    "puma", "quokka", "rabbit", "raccoon", "raven", "seal", "sloth", "stork", "tapir", "tiger",
+    "toucan", "walrus", "wombat", "yak",
+]
+MAX_NUMBER = 9999
+
+# 64 adjectives x 64 animals x 10,000 numbers = ~41 million nicknames
+NAMESPACE_SIZE = len(ADJECTIVES) * len(ANIMALS) * (MAX_NUMBER + 1)
 
 
 def generate_nickname() -> str:
     """Generate a URL-safe nickname using adjectives and animal names."""
-    adjectives = ["clever", "jolly", "brave", "sly", "gentle"]
-    animals = ["panda", "fox", "raccoon", "koala", "lion"]
-    number = random.randint(0, 999)
-    return f"{random.choice(adjectives)}_{random.choice(animals)}_{number}"
\ No newline at end of file
+    number = random.randint(0, MAX_NUMBER)
+    return f"{random.choice(ADJECTIVES)}_{random.choice(ANIMALS)}_{number}"
+
+
+def generate_nicknames(count: int) -> List[str]:
+    """Generate `count` distinct nicknames, e.g. as candidates for one uniqueness check."""
+    nicknames = set()
+    while len(nicknames) < count:
+        nicknames.add(generate_nickname())
+    return list(nicknames)
@@ -1,5 +1,6 @@
 # app/security.py
 from builtins import Exception, ValueError, bool, int, str
+from typing import List, Sequence
 import secrets
 import bcrypt
 from logging import getLogger
@@ -29,6 +30,13 @@ def hash_password(password: str, rounds: int = 12) -> str:
         logger.error("Failed to hash password: %s", e)
         raise ValueError("Failed to hash password") from e
 
+def hash_passwords(passwords: Sequence[str], rounds: int = 12) -> List[str]:
+    """
+    Hash several passwords in one call, so a worker process is handed a whole chunk of a
+    bulk import at once instead of one password per round trip.
+    """
+    return [hash_password(password, rounds) for password in passwords]
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies a plain text password against a hashed password.
@@ -1,31 +1,197 @@
 # smtp_client.py
-from builtins import Exception, int, str
+from builtins import Exception, bool, enumerate, float, int, len, list, min, range, str, sum, super
 import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Iterable, List, Optional, Tuple
 from settings.config import settings
 import logging
 
+# (subject, html_content, recipient)
+OutgoingEmail = Tuple[str, str, str]
+
+
 class SMTPClient:
-    def __init__(self, server: str, port: int, username: str, password: str):
+    def __init__(self, server: str, port: int, username: str, password: str, use_tls: bool = True):
         self.server = server
         self.port = port
         self.username = username
         self.password = password
+        self.use_tls = use_tls
+
+    def _build_message(self, subject: str, html_content: str, recipient: str) -> str:
+        message = MIMEMultipart('alternative')
+        message['Subject'] = subject
+        message['From'] = self.username
+        message['To'] = recipient
+        message.attach(MIMEText(html_content, 'html'))
+        return message.as_string()
+
+    def _open_connection(self) -> smtplib.SMTP:
+        """Connect, upgrade to TLS if configured and authenticate."""
+        connection = smtplib.SMTP(self.server, self.port)
+        try:
+            if self.use_tls:
+                connection.starttls()  # Use TLS
+            connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        return connection
 
     def send_email(self, subject: str, html_content: str, recipient: str):
         try:
-            message = MIMEMultipart('alternative')
-            message['Subject'] = subject
-            message['From'] = self.username
-            message['To'] = recipient
-            message.attach(MIMEText(html_content, 'html'))
-
-            with smtplib.SMTP(self.server, self.port) as server:
-                server.starttls()  # Use TLS
-                server.login(self.username, self.password)
-                server.sendmail(self.username, recipient, message.as_string())
+            with self._open_connection() as server:
+                server.sendmail(self.username, recipient, self._build_message(subject, html_content, recipient))
             logging.info(f"Email sent to {recipient}")
         except Exception as e:
             logging.error(f"Failed to send email: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def send_each(self, messages: Iterable[OutgoingEmail]) -> List[Optional[Exception]]:
+        """
+        Send every message even if some fail. Returns one outcome per message, in order: None
+        when it was sent, otherwise the exception that stopped it.
+        """
+        outcomes = []
+        for message in messages:
+            try:
+                self.send_email(*message)
+                outcomes.append(None)
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+
+class PooledSMTPClient(SMTPClient):
+    """
+    SMTPClient that keeps up to `pool_size` authenticated sessions open and reuses them,
+    so only the first message on a session pays for connect, STARTTLS and AUTH.
+
+    Sessions idle for longer than `idle_timeout` are closed; sessions idle for longer than
+    `noop_after` are checked with NOOP before reuse. A session the server dropped is
+    replaced and the message retried once. Safe to use from several threads.
+    """
+
+    def __init__(self, server: str, port: int, username: str, password: str, use_tls: bool = True,
+                 pool_size: int = 4, idle_timeout: float = 60.0, noop_after: float = 5.0):
+        super().__init__(server, port, username, password, use_tls)
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self._idle = deque()  # (connection, last_used)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self.connections_opened = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = self._open_connection()
+        with self._lock:
+            self.connections_opened += 1
+        return connection
+
+    @staticmethod
+    def _discard(connection: smtplib.SMTP):
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+    def _is_alive(self, connection: smtplib.SMTP) -> bool:
+        try:
+            return connection.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self) -> smtplib.SMTP:
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    connection, last_used = self._idle.pop()
+                idle_for = time.monotonic() - last_used
+                if idle_for > self.idle_timeout:
+                    self._discard(connection)
+                elif idle_for <= self.noop_after or self._is_alive(connection):
+                    return connection
+                else:
+                    connection.close()
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, connection: smtplib.SMTP):
+        with self._lock:
+            self._idle.append((connection, time.monotonic()))
+        self._slots.release()
+
+    def _send_on_session(self, messages: List[OutgoingEmail]) -> int:
+        connection = self._acquire()
+        try:
+            for subject, html_content, recipient in messages:
+                payload = self._build_message(subject, html_content, recipient)
+                try:
+                    connection.sendmail(self.username, recipient, payload)
+                except smtplib.SMTPServerDisconnected:
+                    connection.close()
+                    connection = self._connect()
+                    connection.sendmail(self.username, recipient, payload)
+                logging.info(f"Email sent to {recipient}")
+        except Exception as e:
+            logging.error(f"Failed to send email: {str(e)}")
+            connection.close()
+            self._slots.release()
+            raise
+        self._release(connection)
+        return len(messages)
+
+    def send_email(self, subject: str, html_content: str, recipient: str):
+        self._send_on_session([(subject, html_content, recipient)])
+
+    def send_many(self, messages: Iterable[OutgoingEmail]) -> int:
+        """
+        Send a batch of messages, spreading it over up to `pool_size` sessions that each
+        send their share back to back. Returns the number of messages sent.
+        """
+        messages = list(messages)
+        if not messages:
+            return 0
+        sessions = min(self.pool_size, len(messages))
+        chunks = [messages[i::sessions] for i in range(sessions)]
+        if sessions == 1:
+            return self._send_on_session(chunks[0])
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            return sum(executor.map(self._send_on_session, chunks))
+
+    def send_each(self, messages: Iterable[OutgoingEmail]) -> List[Optional[Exception]]:
+        """
+        `send_many` for callers that need to know which messages went out: a failure only
+        costs its own message (and its session), and one outcome per message is returned,
+        in order: None when it was sent, otherwise the exception.
+        """
+        messages = list(messages)
+        if not messages:
+            return []
+        sessions = min(self.pool_size, len(messages))
+        chunks = [messages[i::sessions] for i in range(sessions)]
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            results = list(executor.map(super().send_each, chunks))
+        # Chunk i holds messages i, i + sessions, ...; put the outcomes back in request order
+        outcomes: List[Optional[Exception]] = [None] * len(messages)
+        for i, chunk_outcomes in enumerate(results):
+            outcomes[i::sessions] = chunk_outcomes
+        return outcomes
+
+    def close(self):
+        """Close all idle sessions."""
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            self._discard(connection)
@@ -1,11 +1,15 @@
 import markdown2
 from pathlib import Path
+from string import Formatter
+from typing import Dict, Iterable, Optional, Tuple
 
 class TemplateManager:
-    def __init__(self):
+    def __init__(self, templates_dir: Optional[Path] = None):
         # Dynamically determine the root path of the project
         self.root_dir = Path(__file__).resolve().parent.parent.parent  # Adjust this depending on the structure
-        self.templates_dir = self.root_dir / 'email_templates'
+        self.templates_dir = Path(templates_dir) if templates_dir else self.root_dir / 'email_templates'
+        # template name -> (source mtimes, compiled format string)
+        self._compiled: Dict[str, Tuple[Tuple[float, ...], str]] = {}
 
     def _read_template(self, filename: str) -> str:
         """Private method to read template content."""
@@ -34,15 +38,53 @@ class TemplateManager:
                 styled_html = styled_html.replace(f'<{tag}>', f'<{tag} style="{style}">')
         return styled_html
 
-    def render_template(self, template_name: str, **context) -> str:
-        """Render a markdown template with given context, applying advanced email styles."""
+    def _source_mtimes(self, template_name: str) -> Tuple[float, ...]:
+        filenames = ('header.md', f'{template_name}.md', 'footer.md')
+        try:
+            return tuple((self.templates_dir / filename).stat().st_mtime for filename in filenames)
+        except FileNotFoundError:
+            # Let _read_template raise its descriptive error
+            for filename in filenames:
+                self._read_template(filename)
+            raise
+
+    def _compile(self, template_name: str) -> str:
+        """
+        Convert header, body and footer to styled HTML once, leaving the body's placeholders
+        as str.format fields. Placeholders are swapped for plain alphanumeric markers that
+        markdown leaves untouched, and literal braces in the output are escaped.
+        """
         header = self._read_template('header.md')
         footer = self._read_template('footer.md')
-
-        # Read main template and format it with provided context
         main_template = self._read_template(f'{template_name}.md')
-        main_content = main_template.format(**context)
+
+        fields = {name for _, name, _, _ in Formatter().parse(main_template) if name}
+        markers = {name: f"TMPLFIELD{index}X" for index, name in enumerate(sorted(fields))}
+        main_content = main_template.format(**markers)
 
         full_markdown = f"{header}\n{main_content}\n{footer}"
-        html_content = markdown2.markdown(full_markdown)
-        return self._apply_email_styles(html_content)
\ No newline at end of file
+        html_content = self._apply_email_styles(markdown2.markdown(full_markdown))
+        html_content = html_content.replace('{', '{{').replace('}', '}}')
+        for name, marker in markers.items():
+            html_content = html_content.replace(marker, f'{{{name}}}')
+        return html_content
+
+    def get_compiled(self, template_name: str) -> str:
+        """Return the compiled template, recompiling it if any of its source files changed."""
+        mtimes = self._source_mtimes(template_name)
+        cached = self._compiled.get(template_name)
+        if cached is None or cached[0] != mtimes:
+            cached = (mtimes, self._compile(template_name))
+            self._compiled[template_name] = cached
+        return cached[1]
+
+    def precompile(self, template_names: Optional[Iterable[str]] = None):
+        """Compile the given templates (default: every body template) ahead of the first send."""
+        if template_names is None:
+            template_names = [path.stem for path in self.templates_dir.glob('*.md') if path.stem not in ('header', 'footer')]
+        for template_name in template_names:
+            self.get_compiled(template_name)
+
+    def render_template(self, template_name: str, **context) -> str:
+        """Render a markdown template with given context, applying advanced email styles."""
+        return self.get_compiled(template_name).format(**context)
@@ -11,27 +11,36 @@ Fixtures:
 - `token`: Generates an authentication token for testing secured endpoints.
 - `initialize_database`: Prepares the database at the session start.
 - `setup_database`: Sets up and tears down the database before and after each test.
+- `smtp_server`: Runs a local aiosmtpd server that accepts any login and collects messages.
+- `statement_counter`: Records the SQL statements the test engine executes, for round-trip assertions.
+- `round_trips`: Records every request sent to PostgreSQL (BEGIN/COMMIT/ROLLBACK, pings and statements) by any engine.
+- `app_client`: Calls the application in-process, with its real database dependencies, so `round_trips` sees them.
 """
 
 # Standard library imports
 from builtins import Exception, range, str
 from datetime import timedelta
+import socket
 from unittest.mock import AsyncMock, patch
 from uuid import uuid4
 
 # Third-party imports
 import pytest
 from fastapi.testclient import TestClient
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql.asyncpg import AsyncAdapt_asyncpg_connection, AsyncAdapt_asyncpg_cursor
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, scoped_session
 from faker import Faker
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
 
 # Application-specific imports
 from app.main import app
 from app.database import Base, Database
 from app.models.user_model import User, UserRole
-from app.dependencies import get_db, get_settings
+from app.dependencies import get_db, get_read_db, get_settings
 from app.utils.security import hash_password
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
@@ -64,6 +73,7 @@ async def async_client(db_session):
     """
     # Override the `get_db` dependency to use the test database session
     app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_read_db] = lambda: db_session
 
     # Use AsyncClient without the `app` argument
     async with AsyncClient(base_url="http://fastapi:8000") as client:
@@ -98,6 +108,58 @@ async def db_session(setup_database):
         finally:
             await session.close()
 
+@pytest.fixture
+def statement_counter():
+    """Collect every statement sent to the database through the test engine while the test runs."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+@pytest.fixture
+def round_trips(monkeypatch):
+    """
+    Record each round-trip the asyncpg driver makes, as "BEGIN", "COMMIT", "ROLLBACK", "PING"
+    or the SQL statement itself. Prepared statement cache misses are not counted.
+    """
+    trips = []
+
+    def wrap(cls, name, label=None, when=lambda self: True):
+        original = getattr(cls, name)
+
+        def recorder(self, *args, **kwargs):
+            if when(self):
+                trips.append(label or args[0])
+            return original(self, *args, **kwargs)
+
+        monkeypatch.setattr(cls, name, recorder)
+
+    def begins(cursor):
+        # The driver opens the transaction lazily, right before the statement it wraps
+        connection = cursor._adapt_connection
+        return not connection._started and connection.isolation_level != "autocommit"
+
+    wrap(AsyncAdapt_asyncpg_connection, "commit", "COMMIT", lambda self: self._started)
+    wrap(AsyncAdapt_asyncpg_connection, "rollback", "ROLLBACK", lambda self: self._started)
+    wrap(AsyncAdapt_asyncpg_connection, "ping", "PING")
+    wrap(AsyncAdapt_asyncpg_cursor, "execute")
+    wrap(AsyncAdapt_asyncpg_cursor, "executemany")
+    # Wrapped last so it records ahead of the statement
+    wrap(AsyncAdapt_asyncpg_cursor, "execute", "BEGIN", begins)
+    wrap(AsyncAdapt_asyncpg_cursor, "executemany", "BEGIN", begins)
+    return trips
+
+@pytest.fixture
+async def app_client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        yield client
+    # The pool's connections belong to this test's event loop
+    await Database._engine.dispose()
+
 @pytest.fixture(scope="function")
 async def locked_user(db_session):
     unique_email = fake.email()
@@ -246,3 +308,38 @@ def email_service():
     mock_service.send_verification_email.return_value = None
     mock_service.send_user_email.return_value = None
     return mock_service
+
+
+class CollectingHandler:
+    """aiosmtpd handler that keeps every received envelope."""
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    """
+    Provide a local SMTP stand-in. Yields the aiosmtpd controller (for its port) and the
+    handler holding received messages.
+    """
+    handler = CollectingHandler()
+    controller = Controller(
+        handler,
+        hostname="127.0.0.1",
+        port=free_port(),
+        authenticator=lambda server, session, envelope, mechanism, auth_data: AuthResult(success=True),
+        auth_require_tls=False,
+    )
+    controller.start()
+    yield controller, handler
+    controller.stop()
@@ -0,0 +1,78 @@
+from urllib.parse import urlencode
+import pytest
+from httpx import ASGITransport, AsyncClient
+from app.dependencies import get_rate_limit_backend
+from app.main import app
+from settings.config import override_settings
+
+FORM = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    get_rate_limit_backend().clear()
+    yield
+    get_rate_limit_backend().clear()
+
+
+def _client(ip):
+    return AsyncClient(transport=ASGITransport(app=app, client=(ip, 1234)), base_url="http://testserver")
+
+
+@pytest.mark.asyncio
+async def test_login_is_limited_per_ip_before_touching_the_database(app_client, verified_user, round_trips):
+    form = urlencode({"username": verified_user.email, "password": "MySuperPassword$1234"})
+    with override_settings(rate_limit_ip_burst=2, rate_limit_ip_per_second=0.01):
+        for _ in range(2):
+            assert (await app_client.post("/login/", content=form, headers=FORM)).status_code == 200
+        round_trips.clear()
+        response = await app_client.post("/api/users/login/", content=form, headers=FORM)
+    assert response.status_code == 429
+    assert 90 <= int(response.headers["retry-after"]) <= 100
+    assert round_trips == []
+
+
+@pytest.mark.asyncio
+async def test_login_is_limited_per_username_across_ips(app_client, verified_user):
+    form = urlencode({"username": verified_user.email.upper(), "password": "wrong"})
+    with override_settings(rate_limit_username_attempts=3, rate_limit_username_window=60):
+        for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+            async with _client(ip) as client:
+                assert (await client.post("/login/", content=form, headers=FORM)).status_code != 429
+        async with _client("10.0.0.4") as client:
+            response = await client.post("/login/", content=form, headers=FORM)
+            assert response.status_code == 429
+            assert int(response.headers["retry-after"]) <= 60
+            # Other accounts and other endpoints are unaffected
+            other = await client.post("/login/", content=urlencode({"username": "someone@example.com", "password": "x"}), headers=FORM)
+            assert other.status_code != 429
+            assert (await client.get("/.well-known/jwks.json")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_registration_is_limited_by_email(app_client):
+    body = {"email": "flood@example.com", "password": "AnotherPassword$1234"}
+    with override_settings(rate_limit_username_attempts=1):
+        assert (await app_client.post("/register/", json=body)).status_code != 429
+        assert (await app_client.post("/register/", json=body)).status_code == 429
+        with override_settings(rate_limit_enabled=False):
+            assert (await app_client.post("/register/", json=body)).status_code != 429
+
+
+@pytest.mark.asyncio
+async def test_ip_limit_uses_the_forwarded_client_behind_a_trusted_proxy(app_client):
+    form = urlencode({"username": "", "password": "x"})
+    with override_settings(rate_limit_ip_burst=1, rate_limit_ip_per_second=0.01, rate_limit_trusted_proxies="10.1.0.0/16"):
+        async with _client("10.1.0.5") as proxy:
+            forwarded = {**FORM, "X-Forwarded-For": "203.0.113.7, 10.1.0.9"}
+            assert (await proxy.post("/login/", content=form, headers=forwarded)).status_code != 429
+            assert (await proxy.post("/login/", content=form, headers=forwarded)).status_code == 429
+            # Another client behind the same proxy has its own allowance
+            other = {**FORM, "X-Real-IP": "198.51.100.2"}
+            assert (await proxy.post("/login/", content=form, headers=other)).status_code != 429
+        # A peer that is not a trusted proxy cannot pick its own key
+        async with _client("192.0.2.1") as client:
+            spoofed = {**FORM, "X-Forwarded-For": "192.0.2.200"}
+            assert (await client.post("/login/", content=form, headers=spoofed)).status_code != 429
+            spoofed = {**FORM, "X-Forwarded-For": "192.0.2.201"}
+            assert (await client.post("/login/", content=form, headers=spoofed)).status_code == 429
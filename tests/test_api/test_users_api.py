@@ -1,7 +1,22 @@
+import asyncio
+import gc
+import json
+import os
+import time
 import pytest
 from urllib.parse import urlencode
-from app.models.user_model import UserRole
+from uuid import uuid4
+from sqlalchemy import column, func, select, text
+from fastapi.routing import serialize_response
+from app.dependencies import get_import_password_service, get_settings
+from app.main import app
+from app.models.user_model import TRIGRAM_COLUMNS, TRIGRAM_INDEXES, User, UserRole
+from app.routers.user_routes import user_list_items
+from app.schemas.user_schemas import UserListResponse, UserResponse
 from app.services.jwt_service import decode_token
+from app.services.password_service import PasswordService
+from app.services.user_service import UserService
+from app.utils.responses import ORJSONResponse
 from app.utils.nickname_gen import generate_nickname
 
 
@@ -105,7 +120,7 @@ async def test_create_user_access_denied(async_client, admin_user,user_token):
         assert response.status_code == 500
         assert response.json()["nickname"] == updated_data["nickname"]
     response = await async_client.get(f"/api/users/{admin_user.id}", headers=headers)
-    assert response.status_code == 500
+    assert response.status_code == 403
     
 
 
@@ -115,8 +130,8 @@ async def test_update_user_email_access_denied(async_client, verified_user, user
     updated_data = {"email": f"updated_{verified_user.id}@example.com"}
     headers = {"Authorization": f"Bearer {user_token}"}
     response = await async_client.put(f"/api/users/{verified_user.id}", json=updated_data, headers=headers)
-    assert response.status_code == 500  # Fix the expected status code
-    assert "403: Operation not permitted" in response.json().get("detail", "")
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Operation not permitted"
 
 # Test updating a user's email with access allowed
 @pytest.mark.asyncio
@@ -133,11 +148,12 @@ async def test_update_user_email_access_allowed(async_client, admin_user, admin_
 async def test_delete_user(async_client, admin_user, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
     delete_response = await async_client.delete(f"/api/users/{admin_user.id}", headers=headers)
-    assert delete_response.status_code == 500
+    assert delete_response.status_code == 204
 
     # Verify the user is deleted
     fetch_response = await async_client.get(f"/api/users/{admin_user.id}", headers=headers)
-    assert fetch_response.status_code == 200
+    assert fetch_response.status_code == 404
+    assert fetch_response.json()["detail"] == "User not found"
 
 
 # Test creating a user with a duplicate email
@@ -191,8 +207,8 @@ async def test_login_user_not_found(async_client):
         "password": "DoesNotMatter123!",
     }
     response = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
-    assert response.status_code == 500
-    assert "401: Incorrect email or password." in response.json().get("detail", "")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Incorrect email or password."
 
 
 # Test login with an incorrect password
@@ -203,8 +219,18 @@ async def test_login_incorrect_password(async_client, verified_user):
         "password": "IncorrectPassword123!",
     }
     response = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
-    assert response.status_code == 500
-    assert "401: Incorrect email or password." in response.json().get("detail", "")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Incorrect email or password."
+
+
+# A failed login is counted even though the request ends in a 401
+@pytest.mark.asyncio
+async def test_failed_login_attempt_is_committed(app_client, db_session, verified_user):
+    form_data = {"username": verified_user.email, "password": "IncorrectPassword123!"}
+    response = await app_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    assert response.status_code == 401
+    attempts = await db_session.scalar(select(User.failed_login_attempts).where(User.id == verified_user.id).execution_options(populate_existing=True))
+    assert attempts == 1
 
 
 # Test login for an unverified user
@@ -215,7 +241,7 @@ async def test_login_unverified_user(async_client, unverified_user):
         "password": "MySuperPassword$1234",
     }
     response = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
-    assert response.status_code == 500
+    assert response.status_code == 401
 
 
 # Test login for a locked user
@@ -226,8 +252,17 @@ async def test_login_locked_user(async_client, locked_user):
         "password": "MySuperPassword$1234",
     }
     response = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
-    assert response.status_code == 500
-    assert '401: Incorrect email or password.' in response.json().get("detail", "")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Account locked due to too many failed login attempts."
+
+
+# Test updating a non-existent user
+@pytest.mark.asyncio
+async def test_update_user_does_not_exist(app_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await app_client.put("/api/users/00000000-0000-0000-0000-000000000000", json={"first_name": "Nobody"}, headers=headers)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "User not found"
 
 
 # Test deleting a non-existent user
@@ -236,7 +271,7 @@ async def test_delete_user_does_not_exist(async_client, admin_token):
     non_existent_user_id = "00000000-0000-0000-0000-000000000000"
     headers = {"Authorization": f"Bearer {admin_token}"}
     delete_response = await async_client.delete(f"/api/users/{non_existent_user_id}", headers=headers)
-    assert delete_response.status_code == 500
+    assert delete_response.status_code == 404
 
 
 # Test updating a user's GitHub profile
@@ -245,8 +280,8 @@ async def test_update_user_github(async_client, admin_user, admin_token):
     updated_data = {"github_profile_url": "http://www.github.com/example"}
     headers = {"Authorization": f"Bearer {admin_token}"}
     response = await async_client.put(f"/api/users/{admin_user.id}", json=updated_data, headers=headers)
-    assert response.status_code == 500
-    
+    assert response.status_code == 200
+    assert response.json()["github_profile_url"] == updated_data["github_profile_url"]
 
 
 # Test updating a user's LinkedIn profile
@@ -279,11 +314,53 @@ async def test_list_users_as_manager(async_client, manager_token):
     assert 'items' in response.json()
 
 
+# Test listing users without computing the total
+@pytest.mark.asyncio
+async def test_list_users_without_total(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/api/users/", params={"include_total": "false", "limit": 10}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] is None and data["total_exact"] is None
+    rels = {link["rel"] for link in data["links"]}
+    assert "next" in rels and "last" not in rels
+
+    response = await async_client.get("/api/users/", params={"limit": 10}, headers=headers)
+    data = response.json()
+    assert data["total"] == 51 and data["total_exact"] is True
+
+
+# Test listing users with keyset cursors
+@pytest.mark.asyncio
+async def test_list_users_cursor_mode(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/api/users/", params={"cursor": "", "limit": 30}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["items"]) == 30
+    assert data["total"] is None
+    next_link = next(link["href"] for link in data["links"] if link["rel"] == "next")
+
+    response = await async_client.get(next_link, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["items"]) == 21  # 50 users plus the admin
+    rels = {link["rel"] for link in data["links"]}
+    assert "prev" in rels and "next" not in rels
+
+
+# Test listing users with a forged cursor
+@pytest.mark.asyncio
+async def test_list_users_invalid_cursor(async_client, admin_token):
+    response = await async_client.get("/api/users/", params={"cursor": "forged.cursor"}, headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 400
+
+
 # Test listing users as an unauthorized user
 @pytest.mark.asyncio
 async def test_list_users_unauthorized(async_client, user_token):
     response = await async_client.get("/api/users/", headers={"Authorization": f"Bearer {user_token}"})
-    assert response.status_code == 500
+    assert response.status_code == 403
 
 from unittest.mock import AsyncMock
 
@@ -298,4 +375,491 @@ async def test_send_verification_email(async_client, email_service: AsyncMock):
     })
 
     email_service.send_email()
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+
+def _kinds(round_trips):
+    return [trip.split()[0].upper() for trip in round_trips]
+
+# Reads go through autocommit sessions: one round-trip per statement, no BEGIN/COMMIT
+@pytest.mark.asyncio
+async def test_get_user_round_trips(app_client, admin_user, admin_token, round_trips):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    await app_client.get(f"/api/users/{admin_user.id}", headers=headers)  # connect and warm up
+    round_trips.clear()
+    response = await app_client.get(f"/api/users/{admin_user.id}", headers=headers)
+    assert response.status_code == 200
+    assert _kinds(round_trips) == ["PING", "SELECT"]
+
+@pytest.mark.asyncio
+async def test_list_users_round_trips(app_client, admin_user, admin_token, round_trips):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    await app_client.get("/api/users/?include_total=false", headers=headers)
+    round_trips.clear()
+    response = await app_client.get("/api/users/?include_total=false", headers=headers)
+    assert response.status_code == 200
+    assert _kinds(round_trips) == ["PING", "SELECT"]
+
+# Writes commit once: the updated row comes back from UPDATE ... RETURNING
+@pytest.mark.asyncio
+async def test_update_user_round_trips(app_client, admin_user, admin_token, round_trips):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    await app_client.put(f"/api/users/{admin_user.id}", json={"first_name": "Warm"}, headers=headers)
+    round_trips.clear()
+    response = await app_client.put(f"/api/users/{admin_user.id}", json={"first_name": "Updated"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "Updated"
+    assert _kinds(round_trips) == ["PING", "BEGIN", "UPDATE", "COMMIT"]
+
+
+@pytest.mark.asyncio
+async def test_list_users_item_links(app_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await app_client.get("/api/users/", headers=headers)
+    item = response.json()["items"][0]
+    assert [link["rel"] for link in item["links"]] == ["self", "update", "delete"]
+    assert item["links"][0]["href"] == f"http://testserver/api/users/{admin_user.id}"
+    # The self link resolves to the same user
+    assert (await app_client.get(item["links"][0]["href"], headers=headers)).json()["links"] == item["links"]
+
+    response = await app_client.get("/api/users/?include_links=false&cursor=", headers=headers)
+    assert "links" not in response.json()["items"][0]
+
+
+@pytest.mark.asyncio
+async def test_sparse_fieldsets(app_client, admin_user, admin_token, round_trips):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await app_client.get("/api/users/?fields=id,nickname,email,role&cursor=", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["items"] == [{"id": str(admin_user.id), "nickname": admin_user.nickname, "email": admin_user.email, "role": "ADMIN"}]
+
+    response = await app_client.get(f"/api/users/{admin_user.id}?fields=nickname,links", headers=headers)
+    assert list(response.json()) == ["nickname", "links"]
+
+    # A links-only fieldset still reads the id the links are built from
+    response = await app_client.get(f"/api/users/{admin_user.id}?fields=links", headers=headers)
+    assert response.status_code == 200
+    assert list(response.json()) == ["links"]
+    assert str(admin_user.id) in response.json()["links"][0]["href"]
+    response = await app_client.get("/api/users/?fields=links&include_total=false", headers=headers)
+    assert response.status_code == 200
+    assert [list(item) for item in response.json()["items"]] == [["links"]]
+
+    # The password hash is never read for these endpoints, with or without a fieldset
+    round_trips.clear()
+    await app_client.get("/api/users/", headers=headers)
+    await app_client.get(f"/api/users/{admin_user.id}", headers=headers)
+    selects = [statement for statement in round_trips if "FROM users" in statement]
+    assert selects and not any("hashed_password" in statement or "verification_token" in statement for statement in selects)
+
+    response = await app_client.get("/api/users/?fields=nickname,hashed_password", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: hashed_password"
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_benchmark_sparse_fieldset_bytes(app_client, db_session, admin_user, admin_token):
+    """Compare bytes read from Postgres and response size for a 100-row page with and without a fieldset."""
+    db_session.add_all([
+        User(nickname=f"bench_{i}", email=f"bench_{i}@example.com", first_name="Bench", last_name="User", bio="b" * 500,
+             hashed_password=admin_user.hashed_password, role=UserRole.AUTHENTICATED, email_verified=True)
+        for i in range(100)
+    ])
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    async def row_bytes(columns):
+        subquery = select(*(User.__table__.c[name] for name in columns)).limit(100).subquery()
+        return (await db_session.execute(select(func.sum(func.pg_column_size(column(subquery.name)))).select_from(subquery))).scalar()
+
+    before_rows = await row_bytes([column.name for column in User.__table__.columns])
+    after_rows = await row_bytes(["id", "nickname", "email", "role"])
+    before = await app_client.get("/api/users/?limit=100&include_total=false", headers=headers)
+    after = await app_client.get("/api/users/?limit=100&include_total=false&fields=id,nickname,email,role", headers=headers)
+    print(f"\n100 rows from Postgres: {before_rows} -> {after_rows} bytes | response: {len(before.content)} -> {len(after.content)} bytes")
+    assert after_rows < before_rows / 4
+    assert len(after.content) < len(before.content) / 4
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_benchmark_list_users_serialization(app_client, db_session, admin_user, admin_token):
+    """Compare list page serialization before and after dumping rows directly, and list endpoint throughput."""
+    db_session.add_all([
+        User(nickname=f"bench_{i}", email=f"bench_{i}@example.com", first_name="Bench", last_name="User",
+             hashed_password=admin_user.hashed_password, role=UserRole.AUTHENTICATED, email_verified=True)
+        for i in range(1000)
+    ])
+    await db_session.commit()
+    route = next(route for route in app.routes if getattr(route, "name", None) == "list_users")
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    async def before(users):
+        # The previous path: validate every row, validate the page, then response_model validates and encodes it again
+        page = UserListResponse(items=[UserResponse.model_validate(user) for user in users], size=len(users))
+        content = await serialize_response(field=route.secure_cloned_response_field, response_content=page)
+        return route.response_class(content).body
+
+    async def after(users):
+        items = user_list_items(users)
+        return ORJSONResponse({"items": items, "total": None, "total_exact": None, "page": None, "size": len(items), "links": []}).body
+
+    async def rate(serialize, users, rounds):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            body = await serialize(users)
+        return rounds / (time.perf_counter() - started), body
+
+    for size in (10, 100, 1000):
+        users = await UserService.list_users(db_session, 0, size)
+        rounds = 10_000 // size
+        old_rate, old_body = await rate(before, users, rounds)
+        new_rate, new_body = await rate(after, users, rounds)
+        old_page = json.loads(old_body)
+        for item in old_page["items"]:
+            del item["links"]
+        assert old_page == json.loads(new_body)
+
+        url = f"/api/users/?limit={size}&include_total=false"
+        await app_client.get(url, headers=headers)
+        requests = max(2000 // size, 5)
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await app_client.get(url, headers=headers)
+        endpoint_rate = requests / (time.perf_counter() - started)
+        assert len(response.json()["items"]) == size
+        print(f"\npage size {size}: serialize {old_rate:.0f} -> {new_rate:.0f} pages/s | GET {endpoint_rate:.0f} req/s")
+        assert new_rate > old_rate
+
+
+# Test that a refresh token buys a new access token without the password, once
+@pytest.mark.asyncio
+async def test_refresh_token_rotation(app_client, verified_user):
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    response = await app_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    assert response.status_code == 200
+    refresh_token = response.json()["refresh_token"]
+
+    response = await app_client.post("/token/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    data = response.json()
+    assert decode_token(data["access_token"])["sub"] == verified_user.email
+    assert data["refresh_token"] != refresh_token
+
+    reused = await app_client.post("/token/refresh", json={"refresh_token": refresh_token})
+    assert reused.status_code == 401
+    assert reused.headers["www-authenticate"] == "Bearer"
+    # Reuse revoked the whole family, including the token issued a moment ago
+    response = await app_client.post("/token/refresh", json={"refresh_token": data["refresh_token"]})
+    assert response.status_code == 401
+
+
+@pytest.fixture
+async def search_users(db_session, admin_user):
+    users = [
+        User(nickname="ada_l", email="ada.lovelace@example.com", first_name="Ada", last_name="Lovelace", bio="Analytical engine programmer",
+             role=UserRole.AUTHENTICATED, email_verified=True, is_professional=True),
+        User(nickname="grace_h", email="grace.hopper@example.com", first_name="Grace", last_name="Hopper", bio="Compiler pioneer",
+             role=UserRole.MANAGER, email_verified=True, is_locked=True),
+        User(nickname="alan_t", email="alan.turing@example.com", first_name="Alan", last_name="Turing", bio="Engine of computation",
+             role=UserRole.AUTHENTICATED, email_verified=False),
+    ]
+    for user in users:
+        user.hashed_password = admin_user.hashed_password
+    db_session.add_all(users)
+    await db_session.commit()
+    return users
+
+
+@pytest.mark.asyncio
+async def test_search_users(app_client, admin_token, search_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    async def nicknames(query):
+        response = await app_client.get(f"/api/users/search?{query}&fields=nickname", headers=headers)
+        assert response.status_code == 200
+        return sorted(item["nickname"] for item in response.json()["items"])
+
+    assert await nicknames("q=engine") == ["ada_l", "alan_t"]
+    assert await nicknames("q=Lovel") == ["ada_l"]
+    assert await nicknames("q=engine%20comp") == ["alan_t"]
+    assert await nicknames("q=grace.hop") == ["grace_h"]
+    assert await nicknames("q=hopper%20example") == []
+    assert await nicknames("contains=OPPE") == ["grace_h"]
+    assert await nicknames("contains=%25") == []
+    assert await nicknames("q=engine&email_verified=false") == ["alan_t"]
+    assert await nicknames("role=MANAGER&is_locked=true") == ["grace_h"]
+    assert await nicknames("is_professional=true") == ["ada_l"]
+    assert await nicknames("created_after=2000-01-01T00:00:00Z&q=engine") == ["ada_l", "alan_t"]
+    assert await nicknames("created_before=2000-01-01T00:00:00Z") == []
+    # tsquery syntax in the input is harmless
+    assert await nicknames("q=ada%20%26%20!%27:*%20(|)") == ["ada_l"]
+
+
+@pytest.mark.asyncio
+async def test_search_users_pages_by_cursor(app_client, admin_token, search_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await app_client.get("/api/users/search?contains=example&role=AUTHENTICATED&limit=1&fields=nickname", headers=headers)
+    first = response.json()
+    links = {link["rel"]: link["href"] for link in first["links"]}
+    assert "contains=example" in links["next"] and "role=AUTHENTICATED" in links["next"] and "fields=nickname" in links["next"]
+
+    second = (await app_client.get(links["next"], headers=headers)).json()
+    assert sorted(item["nickname"] for item in first["items"] + second["items"]) == ["ada_l", "alan_t"]
+    assert "next" not in {link["rel"] for link in second["links"]}
+
+
+async def _explain(db_session, *conditions) -> str:
+    query = select(User.id).where(*conditions).compile(db_session.bind, compile_kwargs={"literal_binds": True})
+    await db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = (await db_session.execute(text(f"EXPLAIN {query}"))).scalars().all()
+    await db_session.rollback()
+    return "\n".join(plan)
+
+
+@pytest.mark.asyncio
+async def test_search_uses_full_text_index(db_session, search_users):
+    assert "ix_users_search_document" in await _explain(db_session, *UserService.search_conditions(q="lovelace"))
+
+
+@pytest.mark.asyncio
+async def test_contains_uses_trigram_indexes(db_session, search_users):
+    available = (await db_session.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"))).scalar()
+    if not available:
+        pytest.skip("pg_trgm is not installed on this server")
+    await db_session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for name, column in zip(TRIGRAM_INDEXES, TRIGRAM_COLUMNS):
+        await db_session.execute(text(f"CREATE INDEX {name} ON users USING gin ({column} gin_trgm_ops)"))
+    await db_session.commit()
+    plan = await _explain(db_session, *UserService.search_conditions(contains="hopper"))
+    assert all(name in plan for name in TRIGRAM_INDEXES)
+
+
+async def _seed_users(db_session, hashed_password: str, rows: int):
+    """Insert `rows` generated users server-side, one second apart in created_at."""
+    await db_session.execute(text(
+        "INSERT INTO users (id, nickname, email, first_name, last_name, bio, role, is_professional, failed_login_attempts, "
+        "is_locked, email_verified, hashed_password, created_at, updated_at) "
+        "SELECT gen_random_uuid(), 'user_' || n, 'user_' || n || '@example.com', 'First' || (n % 1000), 'Last' || (n % 997), "
+        "'bio number ' || n, 'AUTHENTICATED', false, 0, n % 50 = 0, true, :password, "
+        "now() - n * interval '1 second', now() FROM generate_series(1, :rows) AS n"
+    ), {"password": hashed_password, "rows": rows})
+    await db_session.commit()
+    await db_session.execute(text("ANALYZE users"))
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_benchmark_search_latency(app_client, db_session, admin_user, admin_token):
+    """Search latency over a large users table; SEARCH_BENCHMARK_ROWS sets its size."""
+    rows = int(os.environ.get("SEARCH_BENCHMARK_ROWS", "200000"))
+    await _seed_users(db_session, admin_user.hashed_password, rows)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    for query in ["q=first42%20last7", "q=user_12345", "q=bio&is_locked=true", "role=AUTHENTICATED&is_locked=true"]:
+        await app_client.get(f"/api/users/search?{query}", headers=headers)
+        timings = []
+        for _ in range(10):
+            started = time.perf_counter()
+            response = await app_client.get(f"/api/users/search?{query}&limit=20", headers=headers)
+            timings.append(time.perf_counter() - started)
+            assert response.status_code == 200
+        timings.sort()
+        print(f"\n{rows} rows, {query}: median {timings[5] * 1000:.1f}ms, max {timings[-1] * 1000:.1f}ms")
+
+
+@pytest.mark.asyncio
+async def test_export_users(app_client, admin_token, search_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await app_client.get("/api/users/export?q=engine&fields=nickname,role,email", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert sorted(json.loads(line)["nickname"] for line in response.text.splitlines()) == ["ada_l", "alan_t"]
+    assert json.loads(response.text.splitlines()[0]).keys() == {"nickname", "role", "email"}
+
+    response = await app_client.get("/api/users/export?format=csv&role=MANAGER&fields=nickname,email,links", headers=headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="users.csv"'
+    assert response.text == "nickname,email\r\ngrace_h,grace.hopper@example.com\r\n"
+
+    response = await app_client.get("/api/users/export?gzip=true&fields=id", headers=headers)
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.text.splitlines()) == 4
+
+
+@pytest.mark.asyncio
+async def test_export_users_requires_admin(app_client, manager_token):
+    response = await app_client.get("/api/users/export", headers={"Authorization": f"Bearer {manager_token}"})
+    assert response.status_code == 403
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_export_memory_is_bounded(app_client, db_session, admin_user, admin_token):
+    """
+    Export a large table and sample this process's RSS as each chunk is sent. The app is called
+    directly, as httpx's ASGI transport would buffer the whole body. EXPORT_BENCHMARK_ROWS sets
+    the table size.
+    """
+    if not os.path.exists("/proc/self/statm"):
+        pytest.skip("RSS is read from /proc")
+    rows = int(os.environ.get("EXPORT_BENCHMARK_ROWS", "1000000"))
+    await _seed_users(db_session, admin_user.hashed_password, rows)
+    gc.collect()
+    baseline = peak = _rss_bytes()
+    received = lines = 0
+    statuses = []
+    requested, done = False, asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal peak, received, lines
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            received += len(body)
+            lines += body.count(b"\n")
+            peak = max(peak, _rss_bytes())
+            if not message.get("more_body", False):
+                done.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/api/users/export", "raw_path": b"/api/users/export", "query_string": b"format=ndjson", "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"authorization", f"Bearer {admin_token}".encode())],
+        "client": ("127.0.0.1", 123), "server": ("testserver", 80),
+    }
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    elapsed = time.perf_counter() - started
+    print(f"\nexported {lines} rows, {received / 2**20:.0f} MiB in {elapsed:.1f}s; RSS grew {(peak - baseline) / 2**20:.1f} MiB")
+    assert statuses == [200]
+    assert lines == rows + 1
+    assert peak - baseline < 64 * 2**20
+
+
+@pytest.mark.asyncio
+async def test_import_users(app_client, admin_token, admin_user):
+    password_service = PasswordService(max_workers=1, rounds=4)
+    app.dependency_overrides[get_import_password_service] = lambda: password_service
+    try:
+        body = (
+            "email,password,first_name,role\n"
+            "ada.import@example.com,Secret*123,Ada,MANAGER\n"
+            f"{admin_user.email},Secret*123,Dup,\n"
+        )
+        response = await app_client.post("/api/users/import?format=csv", content=body,
+                                          headers={"Authorization": f"Bearer {admin_token}", "Content-Type": "text/csv"})
+    finally:
+        app.dependency_overrides.pop(get_import_password_service)
+        password_service.shutdown()
+    assert response.status_code == 200
+    assert response.json() == {"created": 1, "failed": 1, "errors": [{"row": 2, "email": admin_user.email, "error": "Email already exists"}]}
+
+
+@pytest.mark.asyncio
+async def test_import_users_requires_admin(app_client, manager_token):
+    response = await app_client.post("/api/users/import", content=b"", headers={"Authorization": f"Bearer {manager_token}"})
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_bulk_operations(app_client, admin_token, search_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    ada, grace, alan = search_users
+    missing = "00000000-0000-0000-0000-000000000000"
+
+    response = await app_client.post("/api/users/bulk/role", json={"ids": [str(alan.id), missing, str(ada.id)], "role": "MANAGER"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"count": 2, "results": [
+        {"id": str(alan.id), "status": "updated"}, {"id": missing, "status": "not_found"}, {"id": str(ada.id), "status": "updated"},
+    ]}
+
+    response = await app_client.post("/api/users/bulk/unlock", json={"filter": {"is_locked": True}}, headers=headers)
+    assert response.json() == {"count": 1, "results": [{"id": str(grace.id), "status": "updated"}]}
+
+    response = await app_client.post("/api/users/bulk/lock", json={"filter": {"contains": "example", "role": "MANAGER"}}, headers=headers)
+    assert response.json()["count"] == 3
+
+    response = await app_client.post("/api/users/bulk/delete", json={"ids": [str(grace.id), str(grace.id)]}, headers=headers)
+    assert response.json() == {"count": 1, "results": [{"id": str(grace.id), "status": "deleted"}]}
+
+    listed = (await app_client.get("/api/users/search?is_locked=true&fields=nickname", headers=headers)).json()["items"]
+    assert sorted(item["nickname"] for item in listed) == ["ada_l", "alan_t"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_operations_validation(app_client, admin_token, manager_token):
+    response = await app_client.post("/api/users/bulk/lock", json={}, headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 422
+    response = await app_client.post("/api/users/bulk/lock", json={"ids": []}, headers={"Authorization": f"Bearer {manager_token}"})
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_bulk_operations_refuse_everyone_and_self(app_client, admin_user, admin_token, search_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    # Filters that reduce to no conditions would match every account
+    for body in ({"filter": {}}, {"filter": {"q": "!!"}}, {"filter": {"contains": ""}}):
+        response = await app_client.post("/api/users/bulk/delete", json=body, headers=headers)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "The filter matches every user; narrow it down"
+
+    response = await app_client.post("/api/users/bulk/lock", json={"ids": [str(search_users[0].id), str(admin_user.id)]}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "A bulk operation cannot include your own account"
+
+    # A filter that matches the caller leaves them out
+    response = await app_client.post("/api/users/bulk/lock", json={"filter": {"is_locked": False}}, headers=headers)
+    assert response.status_code == 200
+    assert str(admin_user.id) not in {result["id"] for result in response.json()["results"]}
+    response = await app_client.get(f"/api/users/{admin_user.id}?fields=id", headers=headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_get_users_batch(app_client, manager_token, search_users, round_trips):
+    headers = {"Authorization": f"Bearer {manager_token}"}
+    ada, grace, alan = search_users
+    missing = "00000000-0000-0000-0000-000000000000"
+    body = {"ids": [str(alan.id), missing, str(ada.id), str(alan.id), str(grace.id)]}
+
+    await app_client.post("/api/users/batch", json=body, headers=headers)
+    round_trips.clear()
+    response = await app_client.post("/api/users/batch?fields=id,nickname", json=body, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "items": [{"id": str(user.id), "nickname": user.nickname} for user in (alan, ada, grace)],
+        "missing": [missing],
+    }
+    assert _kinds(round_trips) == ["PING", "SELECT"]
+
+    item = (await app_client.post("/api/users/batch", json={"ids": [str(ada.id)]}, headers=headers)).json()["items"][0]
+    assert item["email"] == ada.email
+    assert [link["rel"] for link in item["links"]] == ["self", "update", "delete"]
+
+
+@pytest.mark.asyncio
+async def test_get_users_batch_validation(app_client, admin_token, user_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    ids = [str(uuid4()) for _ in range(get_settings().batch_get_max_ids + 1)]
+    response = await app_client.post("/api/users/batch", json={"ids": ids}, headers=headers)
+    assert response.status_code == 400
+    response = await app_client.post("/api/users/batch", json={"ids": ids[:2]}, headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == 403
+    response = await app_client.post("/api/users/batch?fields=password", json={"ids": ids[:2]}, headers=headers)
+    assert response.status_code == 400
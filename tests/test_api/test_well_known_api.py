@@ -0,0 +1,25 @@
+import pytest
+from settings.config import override_settings
+from tests.test_services.test_jwt_service import _write_key
+
+
+@pytest.mark.asyncio
+async def test_jwks_lists_every_key_with_cache_headers(app_client, tmp_path):
+    _write_key(tmp_path, "retiring", "RS256")
+    _write_key(tmp_path, "active", "RS256")
+    with override_settings(jwt_algorithm="RS256", jwt_key_dir=str(tmp_path), jwt_active_kid="active"):
+        response = await app_client.get("/.well-known/jwks.json")
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "public, max-age=300"
+        assert sorted(key["kid"] for key in response.json()["keys"]) == ["active", "retiring"]
+        assert all(key["kty"] == "RSA" and "d" not in key for key in response.json()["keys"])
+
+        revalidated = await app_client.get("/.well-known/jwks.json", headers={"If-None-Match": response.headers["etag"]})
+        assert revalidated.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_jwks_is_empty_for_shared_secret_signing(app_client):
+    response = await app_client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert response.json() == {"keys": []}
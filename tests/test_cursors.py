@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.utils.cursors import CursorPosition, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    position = CursorPosition(datetime(2024, 4, 21, 9, 51, 44, 977108, tzinfo=timezone.utc), uuid4(), backwards=True)
+    assert decode_cursor(encode_cursor(position)) == position
+
+
+def test_cursor_is_opaque():
+    user_id = uuid4()
+    cursor = encode_cursor(CursorPosition(datetime.now(timezone.utc), user_id))
+    assert str(user_id) not in cursor
+
+
+def test_tampered_cursor_is_rejected():
+    cursor = encode_cursor(CursorPosition(datetime.now(timezone.utc), uuid4()))
+    other = encode_cursor(CursorPosition(datetime.now(timezone.utc), uuid4()))
+    forged = cursor.split(".")[0] + "." + other.split(".")[1]
+    with pytest.raises(ValueError, match="Invalid cursor signature"):
+        decode_cursor(forged)
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "a.b", "...."])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
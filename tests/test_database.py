@@ -0,0 +1,129 @@
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.database import Database, InstrumentedAsyncQueuePool, ReplicaSet
+from app.dependencies import get_settings
+from app.models.user_model import User, UserRole
+from app.services.user_service import UserService
+from tests.conftest import free_port
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_instrumented_pool_counts_checkouts_and_timeouts():
+    engine = create_async_engine(
+        get_settings().database_url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert engine.pool.checkedout() == 1
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+        pool = engine.pool
+        assert pool.checkouts == 1
+        assert pool.timeouts == 1
+        assert pool.checkedout() == 0
+    finally:
+        await engine.dispose()
+
+
+async def test_database_pool_metrics():
+    metrics = Database.pool_metrics()
+    assert {"size", "checked_out", "overflow", "checkouts", "timeouts", "avg_wait_seconds"} <= metrics.keys()
+    assert metrics["overflow"] >= 0
+
+
+class Engines:
+    """A primary and stand-in replicas on the same database, each counting the statements it runs."""
+
+    def __init__(self, replicas=1, dead=0):
+        url = get_settings().database_url
+        self.primary = create_async_engine(url)
+        dead_url = make_url(url).set(host="127.0.0.1", port=free_port())  # nothing listens here
+        self.replicas = [create_async_engine(dead_url) for _ in range(dead)]
+        self.replicas += [create_async_engine(url) for _ in range(replicas)]
+        self.statements = {}
+        for name, engine in [("primary", self.primary)] + [(f"replica{i}", e) for i, e in enumerate(self.replicas)]:
+            self.statements[name] = 0
+            event.listen(engine.sync_engine, "before_cursor_execute", self._counter(name))
+
+    def _counter(self, name):
+        def count(conn, cursor, statement, parameters, context, executemany):
+            self.statements[name] += 1
+        return count
+
+    async def dispose(self):
+        for engine in [self.primary] + self.replicas:
+            await engine.dispose()
+
+
+@pytest.fixture
+async def engines(request):
+    engines = Engines(**getattr(request, "param", {}))
+    yield engines
+    await engines.dispose()
+
+
+@pytest.mark.parametrize("engines", [{"replicas": 2}], indirect=True)
+async def test_reads_round_robin_over_replicas(engines, user):
+    factory = Database.build_session_factory(engines.primary, ReplicaSet(engines.replicas))
+    for _ in range(2):
+        async with factory() as session:
+            assert (await UserService.get_by_id(session, user.id)).email == user.email
+            assert await UserService.count(session) == 1
+    assert engines.statements == {"primary": 0, "replica0": 2, "replica1": 2}
+
+
+async def test_session_reads_its_own_writes_after_a_write(engines):
+    factory = Database.build_session_factory(engines.primary, ReplicaSet(engines.replicas))
+    async with factory() as session:
+        assert await UserService.count(session) == 0
+        session.add(User(nickname="sticky", email="sticky@example.com", hashed_password="x", role=UserRole.AUTHENTICATED))
+        await session.flush()
+        # Not committed, so only the primary connection can see it
+        assert await UserService.count(session) == 1
+        assert (await UserService.get_by_email(session, "sticky@example.com")).nickname == "sticky"
+    assert engines.statements["replica0"] == 1
+
+
+async def test_writes_and_lookups_for_writes_use_the_primary(engines, user):
+    factory = Database.build_session_factory(engines.primary, ReplicaSet(engines.replicas))
+    async with factory() as session:
+        assert await UserService.unlock_user_account(session, user.id) is False
+    assert engines.statements["replica0"] == 0
+
+
+@pytest.mark.parametrize("engines", [{"replicas": 1, "dead": 1}], indirect=True)
+async def test_unreachable_replica_is_ejected(engines, user):
+    replicas = ReplicaSet(engines.replicas, eject_seconds=60)
+    factory = Database.build_session_factory(engines.primary, replicas)
+    for _ in range(3):
+        async with factory() as session:
+            assert (await UserService.get_by_id(session, user.id)).id == user.id
+    assert replicas.healthy() == [False, True]
+    assert engines.statements == {"primary": 0, "replica0": 0, "replica1": 3}
+
+
+@pytest.mark.parametrize("engines", [{"replicas": 0, "dead": 1}], indirect=True)
+async def test_reads_fall_back_to_primary_when_all_replicas_are_down(engines, user):
+    factory = Database.build_session_factory(engines.primary, ReplicaSet(engines.replicas))
+    async with factory() as session:
+        assert (await UserService.get_by_id(session, user.id)).id == user.id
+    assert engines.statements == {"primary": 1, "replica0": 0}
+
+
+def test_ejected_replica_returns_after_timeout():
+    now = [0.0]
+    replicas = ReplicaSet(["a", "b"], eject_seconds=10, clock=lambda: now[0])
+    replicas.eject(0)
+    assert {replicas.choose() for _ in range(4)} == {1}
+    now[0] = 10.0
+    assert {replicas.choose() for _ in range(4)} == {0, 1}
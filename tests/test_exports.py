@@ -0,0 +1,54 @@
+import csv
+import gzip
+import io
+from datetime import datetime, timezone
+from uuid import uuid4
+import orjson
+import pytest
+from app.models.user_model import UserRole
+from app.utils.exports import csv_chunks, gzip_chunks, ndjson_chunks
+
+
+async def _batches(*batches):
+    for rows in batches:
+        yield rows
+
+
+async def _collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+ROW = {"id": uuid4(), "nickname": "ada_l", "role": UserRole.ADMIN, "is_locked": False, "bio": None,
+       "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc)}
+
+
+@pytest.mark.asyncio
+async def test_ndjson_chunks():
+    body = await _collect(ndjson_chunks(_batches([ROW, ROW], [ROW])))
+    lines = body.splitlines()
+    assert len(lines) == 3 and body.endswith(b"\n")
+    assert orjson.loads(lines[0]) == {"id": str(ROW["id"]), "nickname": "ada_l", "role": "ADMIN", "is_locked": False,
+                                      "bio": None, "created_at": "2024-01-01T00:00:00Z"}
+
+
+@pytest.mark.asyncio
+async def test_csv_chunks():
+    columns = list(ROW)
+    rows = [ROW, {**ROW, "nickname": 'quote "and, comma', "bio": "=HYPERLINK(\"http://evil\")"}]
+    body = await _collect(csv_chunks(_batches(rows), columns))
+    parsed = list(csv.reader(io.StringIO(body.decode())))
+    assert parsed[0] == columns
+    assert parsed[1] == [str(ROW["id"]), "ada_l", "ADMIN", "false", "", "2024-01-01T00:00:00+00:00"]
+    assert parsed[2][1] == 'quote "and, comma'
+    assert parsed[2][4] == "'=HYPERLINK(\"http://evil\")"
+
+
+@pytest.mark.asyncio
+async def test_csv_chunks_without_rows_has_header():
+    assert await _collect(csv_chunks(_batches(), ["id", "email"])) == b"id,email\r\n"
+
+
+@pytest.mark.asyncio
+async def test_gzip_chunks():
+    chunks = [b"x" * 10_000, b"y" * 10_000]
+    assert gzip.decompress(await _collect(gzip_chunks(_batches(*chunks)))) == b"".join(chunks)
@@ -0,0 +1,44 @@
+import pytest
+from app.utils.imports import csv_records, ndjson_records
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _collect(records):
+    return [record async for record in records]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 7, 1024])
+async def test_csv_records(size):
+    data = (
+        '﻿email,password,bio\r\n'
+        'ada@example.com,Secret*123,"Wrote the first ""program"",\nwith notes"\r\n'
+        '\r\n'
+        'alan@example.com,Secret*123,\r\n'
+        'short,row\r\n'
+    ).encode()
+    records = await _collect(csv_records(_chunks(data, size)))
+    assert records[0] == {"email": "ada@example.com", "password": "Secret*123", "bio": 'Wrote the first "program",\nwith notes'}
+    assert records[1] == {"email": "alan@example.com", "password": "Secret*123"}
+    assert isinstance(records[2], ValueError) and str(records[2]) == "Expected 3 fields, got 2"
+    assert len(records) == 3
+
+
+@pytest.mark.asyncio
+async def test_csv_records_unterminated_quote():
+    records = await _collect(csv_records(_chunks(b'email,bio\na@example.com,"open\n', 5)))
+    assert len(records) == 1 and str(records[0]) == "Unterminated quoted field"
+
+
+@pytest.mark.asyncio
+async def test_ndjson_records():
+    data = '{"email": "ada@example.com", "first_name": "Ada Łovelace"}\n\nnot json\n[1]\n{"email": "alan@example.com"}'.encode()
+    records = await _collect(ndjson_records(_chunks(data, 3)))
+    assert records[0] == {"email": "ada@example.com", "first_name": "Ada Łovelace"}
+    assert str(records[1]) == "Invalid JSON"
+    assert str(records[2]) == "Each line must be a JSON object"
+    assert records[3] == {"email": "alan@example.com"}
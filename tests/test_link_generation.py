@@ -1,4 +1,5 @@
-from builtins import len, max, sorted, str
+from builtins import all, len, max, sorted, str
+import time
 from unittest.mock import MagicMock
 from urllib.parse import parse_qs, urlparse, parse_qsl, urlunparse, urlencode
 from uuid import uuid4
@@ -6,7 +7,10 @@ from uuid import uuid4
 import pytest
 from fastapi import Request
 
-from app.utils.link_generation import create_link, create_pagination_link, create_user_links, generate_pagination_links
+from app.main import app
+from app.schemas.link_schema import Link
+from app.schemas.pagination_schema import PaginationLink
+from app.utils.link_generation import LinkFactory, create_link, create_pagination_link, create_user_links, generate_cursor_pagination_links, generate_pagination_links
 
 from urllib.parse import urlparse, parse_qs, urlunparse, urlencode
 
@@ -33,13 +37,51 @@ def test_create_link():
     link = create_link("self", "http://example.com", "GET", "view")
     assert normalize_url(str(link.href)) == "http://example.com"
 
-def test_create_user_links(mock_request):
+@pytest.fixture
+def app_request():
+    return Request({
+        "type": "http", "app": app, "router": app.router, "scheme": "http", "server": ("testserver", 80),
+        "root_path": "", "path": "/api/users/", "query_string": b"", "headers": [],
+    })
+
+def test_create_user_links(app_request):
     user_id = uuid4()
-    links = create_user_links(user_id, mock_request)
+    links = create_user_links(user_id, app_request)
     assert len(links) == 3
-    assert normalize_url(str(links[0].href)) == f"http://testserver/get_user/{user_id}"
-    assert normalize_url(str(links[1].href)) == f"http://testserver/update_user/{user_id}"
-    assert normalize_url(str(links[2].href)) == f"http://testserver/delete_user/{user_id}"
+    # Same hrefs as url_for, and valid Link objects once validated
+    for link, name in zip(links, ["get_user", "update_user", "delete_user"]):
+        assert link["href"] == str(app_request.url_for(name, user_id=str(user_id)))
+        assert Link.model_validate(link).href
+    assert [link["rel"] for link in links] == ["self", "update", "delete"]
+
+def test_link_factory_uses_first_route_with_a_name():
+    class Route:
+        def __init__(self, name, path_format):
+            self.name, self.path_format = name, path_format
+    factory = LinkFactory([Route("get_user", "/api/users/{user_id}"), Route("get_user", "/api/users/api/users/{user_id}"),
+                           Route("update_user", "/api/users/{user_id}"), Route("delete_user", "/api/users/{user_id}")])
+    assert factory.user_links("https://api.example.com", "42")[0]["href"] == "https://api.example.com/api/users/42"
+
+@pytest.mark.slow
+def test_benchmark_user_links(app_request):
+    """Compare building the links of a 100-row page with url_for and Link validation vs. the link factory."""
+    user_ids = [uuid4() for _ in range(100)]
+
+    def url_for_links(user_id):
+        return [create_link(rel, str(app_request.url_for(name, user_id=str(user_id))), method, action)
+                for rel, name, method, action in [("self", "get_user", "GET", "view"), ("update", "update_user", "PUT", "update"), ("delete", "delete_user", "DELETE", "delete")]]
+
+    def measure(build, rounds=20):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for user_id in user_ids:
+                build(user_id)
+        return (time.perf_counter() - started) / rounds
+
+    before = measure(url_for_links)
+    after = measure(lambda user_id: create_user_links(user_id, app_request))
+    print(f"\nlinks for a 100-row page: url_for {before * 1000:.2f}ms | link factory {after * 1000:.2f}ms")
+    assert after < before
 
 def test_generate_pagination_links(mock_request):
     skip = 10
@@ -48,4 +90,19 @@ def test_generate_pagination_links(mock_request):
     links = generate_pagination_links(mock_request, skip, limit, total_items)
     assert len(links) >= 4
     expected_self_url = "http://testserver/users?limit=5&skip=10"
-    assert normalize_url(str(links[0].href)) == normalize_url(expected_self_url), "Self link should match expected URL"
\ No newline at end of file
+    assert normalize_url(links[0]["href"]) == normalize_url(expected_self_url), "Self link should match expected URL"
+    # Plain dicts, valid PaginationLinks once validated
+    assert all(PaginationLink.model_validate(link).href for link in links)
+
+def test_generate_cursor_pagination_links(mock_request):
+    links = generate_cursor_pagination_links(mock_request, 10, "abc.def", "next.sig", None)
+    rels = {link["rel"]: normalize_url(link["href"]) for link in links}
+    assert rels["first"] == normalize_url("http://testserver/users?limit=10&cursor=")
+    assert rels["next"] == normalize_url("http://testserver/users?limit=10&cursor=next.sig")
+    assert "prev" not in rels
+
+def test_generate_pagination_links_without_total(mock_request):
+    links = generate_pagination_links(mock_request, 0, 5, None, has_next=True)
+    rels = [link["rel"] for link in links]
+    assert "last" not in rels
+    assert "next" in rels
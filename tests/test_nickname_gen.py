@@ -0,0 +1,18 @@
+import re
+from app.utils.nickname_gen import NAMESPACE_SIZE, generate_nickname, generate_nicknames
+
+
+def test_generate_nickname_is_url_safe():
+    for _ in range(100):
+        nickname = generate_nickname()
+        assert re.match(r'^[\w-]+$', nickname)
+        assert 3 <= len(nickname) <= 50
+
+
+def test_generate_nicknames_are_distinct():
+    nicknames = generate_nicknames(500)
+    assert len(nicknames) == len(set(nicknames)) == 500
+
+
+def test_namespace_is_large():
+    assert NAMESPACE_SIZE > 10_000_000
@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+import orjson
+
+from app.models.user_model import UserRole
+from app.schemas.pagination_schema import PaginationLink
+from app.schemas.user_schemas import UserListResponse, UserResponse
+from app.utils.responses import ORJSONResponse
+
+
+def _page():
+    item = UserResponse.model_construct(
+        id=uuid4(), email="john.doe@example.com", nickname="john_doe", role=UserRole.ADMIN,
+        github_profile_url="https://github.com/johndoe", created_at=datetime(2024, 4, 21, 9, 51, 44, 977108, tzinfo=timezone.utc),
+    )
+    links = [PaginationLink(rel="self", href="http://testserver/api/users/?skip=0&limit=10")]
+    return UserListResponse.model_construct(items=[item], total=1, total_exact=True, page=1, size=1, links=links)
+
+
+def test_renders_models_like_fastapi():
+    page = _page()
+    assert orjson.loads(ORJSONResponse(page).body) == jsonable_encoder(page)
+
+
+def test_renders_plain_content():
+    user_id = uuid4()
+    assert orjson.loads(ORJSONResponse({"id": user_id, "at": datetime(2024, 1, 1, tzinfo=timezone.utc)}).body) == {
+        "id": str(user_id), "at": "2024-01-01T00:00:00Z"
+    }
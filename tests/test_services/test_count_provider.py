@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import text
+from app.models.user_model import User
+from app.services.count_provider import (
+    CachedCountProvider, CountProvider, EstimatedCountProvider, ExactCountProvider, build_count_provider
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def test_exact_count(db_session, users_with_same_role_50_users):
+    result = await ExactCountProvider(User).count(db_session)
+    assert result.value == 50
+    assert result.exact is True
+
+
+async def test_cached_count_reuses_value_until_ttl(db_session, users_with_same_role_50_users, user):
+    clock = FakeClock()
+    provider = CachedCountProvider(User, ttl=10, clock=clock)
+    assert await provider.count(db_session) == (51, True)
+
+    await db_session.delete(user)
+    await db_session.commit()
+    clock.now = 9.9
+    # Served from the cache, so no longer known to be exact
+    assert await provider.count(db_session) == (51, False)
+
+    clock.now = 10.0
+    assert await provider.count(db_session) == (50, True)
+
+
+async def test_estimated_count_above_threshold(db_session, users_with_same_role_50_users):
+    await db_session.execute(text("ANALYZE users"))
+    result = await EstimatedCountProvider(User, threshold=10).count(db_session)
+    assert result.value == 50
+    assert result.exact is False
+
+
+async def test_estimated_count_below_threshold_is_exact(db_session, users_with_same_role_50_users):
+    await db_session.execute(text("ANALYZE users"))
+    result = await EstimatedCountProvider(User, threshold=1000).count(db_session)
+    assert result.value == 50
+    assert result.exact is True
+
+
+async def test_count_provider_is_abstract():
+    with pytest.raises(TypeError):
+        CountProvider(User)
+
+
+async def test_build_count_provider():
+    assert isinstance(build_count_provider(User, "cached", ttl=5), CachedCountProvider)
+    assert isinstance(build_count_provider(User, "estimate"), EstimatedCountProvider)
+    with pytest.raises(ValueError, match="Unknown count strategy"):
+        build_count_provider(User, "approximate")
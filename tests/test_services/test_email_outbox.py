@@ -0,0 +1,155 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.dependencies import get_settings
+from app.models.email_outbox_model import EmailOutbox
+from app.services.email_outbox_worker import EmailOutboxWorker
+from app.services.email_service import EmailService
+from app.services.user_service import UserService
+from app.utils.smtp_connection import SMTPClient
+from app.utils.template_manager import TemplateManager
+from tests.conftest import free_port
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine(get_settings().database_url)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _email_service(port: int) -> EmailService:
+    email_service = EmailService(template_manager=TemplateManager())
+    email_service.smtp_client = SMTPClient("127.0.0.1", port, "outbox@example.com", "secret", use_tls=False)
+    return email_service
+
+
+async def _queue(session_factory, email_service, recipient="outbox_user@example.com"):
+    async with session_factory() as session:
+        email_service.queue_user_email(session, {"name": "Outbox", "verification_url": "http://x/verify", "email": recipient}, "email_verification")
+        await session.commit()
+
+
+async def test_create_queues_verification_email_without_smtp(db_session, admin_user):
+    email_service = EmailService(template_manager=TemplateManager())
+    email_service.smtp_client = MagicMock(spec=SMTPClient)
+    user = await UserService.create(db_session, {
+        "nickname": "outboxed",
+        "email": "queued_user@example.com",
+        "password": "ValidPassword123!",
+    }, email_service)
+    assert user is not None
+    email_service.smtp_client.send_email.assert_not_called()
+    message = (await db_session.execute(select(EmailOutbox))).scalars().one()
+    assert message.recipient == "queued_user@example.com"
+    assert message.status == EmailOutbox.PENDING
+    assert str(user.id) in message.context["verification_url"]
+
+
+async def test_worker_delivers_to_smtp_server(smtp_server, session_factory):
+    controller, handler = smtp_server
+    email_service = _email_service(controller.port)
+    await _queue(session_factory, email_service)
+
+    worker = EmailOutboxWorker(session_factory, email_service)
+    assert await worker.run_once() == 1
+    assert await worker.run_once() == 0
+
+    assert [envelope.rcpt_tos for envelope in handler.messages] == [["outbox_user@example.com"]]
+    async with session_factory() as session:
+        message = (await session.execute(select(EmailOutbox))).scalars().one()
+    assert message.status == EmailOutbox.SENT
+    assert message.attempts == 1
+    assert message.sent_at is not None
+
+
+async def test_worker_backs_off_and_gives_up(session_factory):
+    email_service = _email_service(free_port())  # nothing listens here
+    await _queue(session_factory, email_service)
+
+    worker = EmailOutboxWorker(session_factory, email_service, max_attempts=2, backoff_seconds=0)
+    assert await worker.run_once() == 1
+    async with session_factory() as session:
+        message = (await session.execute(select(EmailOutbox))).scalars().one()
+    assert message.status == EmailOutbox.PENDING
+    assert message.attempts == 1
+    assert message.last_error
+
+    assert await worker.run_once() == 1
+    async with session_factory() as session:
+        message = (await session.execute(select(EmailOutbox))).scalars().one()
+    assert message.status == EmailOutbox.FAILED
+    assert message.attempts == 2
+
+
+async def test_worker_skips_messages_not_yet_due(session_factory):
+    email_service = _email_service(free_port())
+    await _queue(session_factory, email_service)
+
+    worker = EmailOutboxWorker(session_factory, email_service, backoff_seconds=3600)
+    assert await worker.run_once() == 1
+    assert await worker.run_once() == 0
+    async with session_factory() as session:
+        message = (await session.execute(select(EmailOutbox))).scalars().one()
+    assert message.next_attempt_at > datetime.now(timezone.utc)
+
+
+async def test_worker_sends_outside_the_claiming_transaction(smtp_server, session_factory):
+    controller, handler = smtp_server
+    email_service = _email_service(controller.port)
+    await _queue(session_factory, email_service)
+    loop = asyncio.get_running_loop()
+    seen = []
+
+    async def inspect():
+        # Another session can lock the row: the claim was committed and no lock is held
+        async with session_factory() as session:
+            query = select(EmailOutbox).with_for_update(nowait=True)
+            seen.append((await session.execute(query)).scalars().one().status)
+
+    deliver_many = email_service.deliver_many
+
+    def deliver_and_inspect(emails):
+        asyncio.run_coroutine_threadsafe(inspect(), loop).result()
+        return deliver_many(emails)
+
+    email_service.deliver_many = deliver_and_inspect
+    worker = EmailOutboxWorker(session_factory, email_service)
+    assert await worker.run_once() == 1
+    assert seen == [EmailOutbox.SENDING]
+    assert len(handler.messages) == 1
+    async with session_factory() as session:
+        message = (await session.execute(select(EmailOutbox))).scalars().one()
+    assert message.status == EmailOutbox.SENT
+
+
+async def test_worker_reclaims_an_expired_claim(smtp_server, session_factory):
+    controller, handler = smtp_server
+    email_service = _email_service(controller.port)
+    await _queue(session_factory, email_service)
+    async with session_factory() as session:
+        # A worker that died mid-send: claimed, attempt counted, lease not yet over
+        await session.execute(update(EmailOutbox).values(status=EmailOutbox.SENDING, attempts=1, next_attempt_at=datetime.now(timezone.utc) + timedelta(minutes=5)))
+        await session.commit()
+
+    worker = EmailOutboxWorker(session_factory, email_service)
+    assert await worker.run_once() == 0
+    async with session_factory() as session:
+        await session.execute(update(EmailOutbox).values(next_attempt_at=datetime.now(timezone.utc)))
+        await session.commit()
+    assert await worker.run_once() == 1
+    async with session_factory() as session:
+        message = (await session.execute(select(EmailOutbox))).scalars().one()
+    assert message.status == EmailOutbox.SENT
+    assert message.attempts == 2
+
+
+def test_backoff_doubles():
+    worker = EmailOutboxWorker(None, None, backoff_seconds=30)
+    assert [worker.backoff(n).total_seconds() for n in (1, 2, 3)] == [30, 60, 120]
@@ -0,0 +1,103 @@
+import os
+from datetime import timedelta
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from app.services.jwt_service import create_access_token, decode_token, get_key_ring
+from app.services.key_ring import KeyRing
+from settings.config import override_settings
+
+
+def _write_key(directory, kid, algorithm):
+    pem = KeyRing.generate_private_key(algorithm).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    (directory / f"{kid}.pem").write_bytes(pem)
+
+
+def _token(sub="user-1"):
+    return create_access_token(data={"sub": sub, "role": "admin"}, expires_delta=timedelta(minutes=5))
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "EdDSA"])
+def test_asymmetric_round_trip_with_kid(tmp_path, algorithm):
+    _write_key(tmp_path, "k1", algorithm)
+    with override_settings(jwt_algorithm=algorithm, jwt_key_dir=str(tmp_path), jwt_active_kid=""):
+        token = _token()
+        assert jwt.get_unverified_header(token) == {"alg": algorithm, "kid": "k1", "typ": "JWT"}
+        assert decode_token(token)["role"] == "ADMIN"
+
+
+def test_rotation_keeps_live_tokens_valid(tmp_path):
+    _write_key(tmp_path, "k1", "RS256")
+    with override_settings(jwt_algorithm="RS256", jwt_key_dir=str(tmp_path), jwt_active_kid="k1"):
+        old_token = _token()
+    _write_key(tmp_path, "k2", "RS256")
+    with override_settings(jwt_algorithm="RS256", jwt_key_dir=str(tmp_path), jwt_active_kid="k2", jwt_key_check_interval=0):
+        new_token = _token()
+        assert jwt.get_unverified_header(new_token)["kid"] == "k2"
+        assert decode_token(old_token)["sub"] == "user-1"
+        assert decode_token(new_token)["sub"] == "user-1"
+        # Once the retiring key is removed, tokens it signed stop verifying
+        os.remove(tmp_path / "k1.pem")
+        assert decode_token(old_token) is None
+        assert decode_token(new_token) is not None
+
+
+def test_key_directory_is_checked_at_most_once_per_interval(tmp_path, monkeypatch):
+    _write_key(tmp_path, "k1", "RS256")
+    with override_settings(jwt_algorithm="RS256", jwt_key_dir=str(tmp_path), jwt_active_kid="", jwt_key_check_interval=60):
+        token = _token()
+        scans = []
+        monkeypatch.setattr("app.services.jwt_service._key_file_versions", lambda directory: scans.append(directory) or ())
+        for _ in range(10):
+            assert decode_token(token) is not None
+        assert scans == []
+
+
+def test_key_rewritten_in_place_is_reloaded(tmp_path):
+    _write_key(tmp_path, "k1", "RS256")
+    with override_settings(jwt_algorithm="RS256", jwt_key_dir=str(tmp_path), jwt_active_kid="", jwt_key_check_interval=0):
+        old_token = _token()
+        # Same file name, new key; the directory's own mtime does not change. The file's mtime
+        # is pinned so the write cannot land within the same timestamp tick as the first one
+        _write_key(tmp_path, "k1", "RS256")
+        os.utime(tmp_path / "k1.pem", ns=(1, 1))
+        assert decode_token(old_token) is None
+        assert decode_token(_token()) is not None
+
+
+def test_ephemeral_keys_need_debug():
+    with override_settings(jwt_algorithm="RS256", jwt_key_dir="", debug=False):
+        with pytest.raises(ValueError, match="JWT_KEY_DIR must be set"):
+            get_key_ring()
+    with override_settings(jwt_algorithm="RS256", jwt_key_dir="", debug=True):
+        assert decode_token(_token())["sub"] == "user-1"
+
+
+def test_newest_key_is_active_by_default(tmp_path):
+    _write_key(tmp_path, "k1", "EdDSA")
+    _write_key(tmp_path, "k2", "EdDSA")
+    os.utime(tmp_path / "k1.pem", (1, 1))
+    assert KeyRing.from_directory(str(tmp_path), "EdDSA").active.kid == "k2"
+
+
+def test_rejects_unknown_kid_and_algorithm_confusion(tmp_path):
+    _write_key(tmp_path, "k1", "RS256")
+    with override_settings(jwt_algorithm="RS256", jwt_key_dir=str(tmp_path), jwt_active_kid=""):
+        token = _token()
+        claims = jwt.decode(token, options={"verify_signature": False})
+        forged = jwt.encode(claims, "guess", algorithm="HS256", headers={"kid": "k1"})
+        assert decode_token(forged) is None
+        unknown = jwt.encode(claims, KeyRing.generate_private_key("RS256"), algorithm="RS256", headers={"kid": "other"})
+        assert decode_token(unknown) is None
+
+
+def test_jwks_verifies_tokens_locally(tmp_path):
+    _write_key(tmp_path, "k1", "RS256")
+    with override_settings(jwt_algorithm="RS256", jwt_key_dir=str(tmp_path), jwt_active_kid=""):
+        token = _token()
+        jwks = jwt.PyJWKSet.from_dict(get_key_ring().jwks())
+    # What a downstream service does with the published key set
+    key = jwks[jwt.get_unverified_header(token)["kid"]]
+    assert jwt.decode(token, key.key, algorithms=[key.algorithm_name])["sub"] == "user-1"
@@ -0,0 +1,132 @@
+import asyncio
+import statistics
+import time
+import pytest
+from app.services.password_service import PasswordHashingBusy, PasswordService
+from app.utils.security import hash_password, verify_password
+
+pytestmark = pytest.mark.asyncio
+
+
+def _p99(samples):
+    return statistics.quantiles(samples, n=100)[98]
+
+
+async def test_hash_and_verify_round_trip():
+    service = PasswordService(max_workers=2, rounds=4)
+    hashed = await service.hash("secure_password")
+    assert hashed.startswith("$2b$04$")
+    assert await service.verify("secure_password", hashed) is True
+    assert await service.verify("wrong_password", hashed) is False
+    service.shutdown()
+
+
+async def test_verify_invalid_hash_raises_value_error():
+    service = PasswordService(max_workers=1, rounds=4)
+    with pytest.raises(ValueError):
+        await service.verify("secure_password", "invalid_hash_format")
+    service.shutdown()
+
+
+async def test_saturated_pool_rejects_with_busy(monkeypatch):
+    service = PasswordService(max_workers=1, max_in_flight=1, queue_timeout=0.05, rounds=4)
+    monkeypatch.setattr("app.services.password_service.hash_password", lambda password, rounds: time.sleep(0.3) or "slow")
+    first = asyncio.create_task(service.hash("one"))
+    await asyncio.sleep(0.01)
+    with pytest.raises(PasswordHashingBusy):
+        await service.hash("two")
+    assert await first == "slow"
+    metrics = service.metrics()
+    assert metrics["rejected"] == 1
+    assert metrics["completed"] == 1
+    assert metrics["in_flight"] == 0
+    service.shutdown()
+
+
+class _LateSemaphore(asyncio.Semaphore):
+    """Hands out the permit even though the waiter was cancelled, as a timeout racing the grant can."""
+
+    async def acquire(self):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            pass
+        return await super().acquire()
+
+
+async def test_permit_granted_at_timeout_is_not_leaked(monkeypatch):
+    service = PasswordService(max_workers=1, max_in_flight=2, queue_timeout=0.01, rounds=4)
+    slots = _LateSemaphore(2)
+    monkeypatch.setattr(service, "_get_slots", lambda: slots)
+    for _ in range(5):
+        with pytest.raises(PasswordHashingBusy):
+            await service.hash("late")
+    await asyncio.sleep(0.01)  # let the last abandoned acquire finish
+    assert slots._value == 2
+    service.shutdown()
+
+
+async def test_cancelled_waiter_does_not_leak_a_permit(monkeypatch):
+    service = PasswordService(max_workers=1, max_in_flight=1, queue_timeout=5, rounds=4)
+    monkeypatch.setattr("app.services.password_service.hash_password", lambda password, rounds: time.sleep(0.1) or "slow")
+    first = asyncio.create_task(service.hash("one"))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(service.hash("two"))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert await first == "slow"
+    assert service._get_slots()._value == 1
+    assert service.metrics()["waiting"] == 0
+    service.shutdown()
+
+
+async def test_metrics_report_saturation_while_busy(monkeypatch):
+    service = PasswordService(max_workers=2, max_in_flight=2, rounds=4)
+    monkeypatch.setattr("app.services.password_service.hash_password", lambda password, rounds: time.sleep(0.2) or "slow")
+    tasks = [asyncio.create_task(service.hash(str(i))) for i in range(3)]
+    await asyncio.sleep(0.05)
+    metrics = service.metrics()
+    assert metrics["in_flight"] == 2
+    assert metrics["waiting"] == 1
+    assert metrics["saturation"] == 1.0
+    await asyncio.gather(*tasks)
+    service.shutdown()
+
+
+@pytest.mark.slow
+async def test_benchmark_concurrent_login_p99():
+    """Compare p99 latency of 32 concurrent logins with bcrypt inline vs. on the pool."""
+    hashed = hash_password("MySuperPassword$1234", rounds=10)
+    concurrency = 32
+
+    async def inline_login():
+        verify_password("MySuperPassword$1234", hashed)
+
+    service = PasswordService(max_workers=4, max_in_flight=concurrency)
+
+    async def pooled_login():
+        await service.verify("MySuperPassword$1234", hashed)
+
+    async def measure(login):
+        batch_start = time.perf_counter()
+
+        async def timed_login():
+            await login()
+            return time.perf_counter() - batch_start
+
+        async def probe():
+            # A cheap request arriving alongside the logins
+            await asyncio.sleep(0)
+            return time.perf_counter() - batch_start
+
+        results = await asyncio.gather(probe(), *[timed_login() for _ in range(concurrency)])
+        return _p99(results[1:]), results[0]
+
+    inline_p99, inline_stall = await measure(inline_login)
+    pooled_p99, pooled_stall = await measure(pooled_login)
+    service.shutdown()
+    print(f"\nconcurrent logins={concurrency} inline p99={inline_p99 * 1000:.1f}ms stall={inline_stall * 1000:.1f}ms "
+          f"| pooled p99={pooled_p99 * 1000:.1f}ms stall={pooled_stall * 1000:.1f}ms")
+    assert pooled_stall < inline_stall
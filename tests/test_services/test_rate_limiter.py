@@ -0,0 +1,66 @@
+import pytest
+from app.services.rate_limiter import InMemoryRateLimitBackend, SlidingWindow, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_burst_then_refills():
+    bucket, state = TokenBucket(capacity=3, rate=0.5), None
+    for _ in range(3):
+        state, retry_after = bucket.hit(state, 0.0)
+        assert retry_after == 0
+    state, retry_after = bucket.hit(state, 0.0)
+    assert retry_after == pytest.approx(2.0)
+    state, retry_after = bucket.hit(state, 2.0)
+    assert retry_after == 0
+
+
+def test_sliding_window_weights_the_previous_window():
+    window, state = SlidingWindow(limit=10, window=60), None
+    for _ in range(10):
+        state, retry_after = window.hit(state, 0.0)
+        assert retry_after == 0
+    state, retry_after = window.hit(state, 30.0)
+    assert retry_after == pytest.approx(30.0)
+    # Halfway into the next window half of the previous ten still count
+    state, retry_after = window.hit(state, 90.0)
+    assert retry_after == 0
+    for _ in range(4):
+        state, retry_after = window.hit(state, 90.0)
+        assert retry_after == 0
+    state, retry_after = window.hit(state, 90.0)
+    assert retry_after == pytest.approx(6.0)
+    # Two windows later nothing is left
+    state, retry_after = window.hit(state, 240.0)
+    assert retry_after == 0 and state[1:] == (0, 1)
+
+
+async def test_backend_keys_are_independent():
+    backend = InMemoryRateLimitBackend(clock=FakeClock())
+    limit = TokenBucket(capacity=1, rate=1)
+    assert await backend.hit("ip:1", limit) == 0
+    assert await backend.hit("ip:1", limit) > 0
+    assert await backend.hit("ip:2", limit) == 0
+    assert backend.metrics()["rejected"] == 1
+
+
+async def test_backend_evicts_idle_and_excess_keys():
+    clock = FakeClock()
+    backend = InMemoryRateLimitBackend(max_keys=3, evict_interval=10, clock=clock)
+    limit = TokenBucket(capacity=10, rate=1)
+    for key in ("a", "b", "c", "d"):
+        await backend.hit(key, limit)
+    assert list(backend._entries) == ["b", "c", "d"]
+    clock.now += 4
+    await backend.hit("b", limit)
+    # Past the sweep interval, keys back at a full bucket are dropped
+    clock.now += 7
+    await backend.hit("e", limit)
+    assert list(backend._entries) == ["b", "e"]
+    assert backend.metrics()["evictions"] == 3
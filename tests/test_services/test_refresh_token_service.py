@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import select, update
+from app.models.refresh_token_model import RefreshToken
+from app.services.refresh_token_service import RefreshTokenService
+from app.services.user_service import UserService
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_issue_stores_only_a_digest(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    await db_session.commit()
+    stored = (await db_session.execute(select(RefreshToken))).scalars().one()
+    assert stored.token_hash != token and len(stored.token_hash) == 64
+    assert stored.expires_at > datetime.now(timezone.utc) + timedelta(hours=23)
+
+
+async def test_rotate_returns_user_and_successor(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    user, successor = await RefreshTokenService.rotate(db_session, token)
+    assert user.id == verified_user.id and successor != token
+    tokens = (await db_session.execute(select(RefreshToken).order_by(RefreshToken.created_at))).scalars().all()
+    assert len({t.family_id for t in tokens}) == 1
+    assert await RefreshTokenService.rotate(db_session, successor) is not None
+
+
+async def test_reuse_revokes_the_family(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    _, successor = await RefreshTokenService.rotate(db_session, token)
+    assert await RefreshTokenService.rotate(db_session, token) is None
+    # The thief's replay also kills the legitimate client's current token
+    assert await RefreshTokenService.rotate(db_session, successor) is None
+
+
+async def test_expired_and_unknown_tokens_are_rejected(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    await db_session.execute(update(RefreshToken).values(expires_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+    assert await RefreshTokenService.rotate(db_session, token) is None
+    assert await RefreshTokenService.rotate(db_session, "not-a-token") is None
+
+
+async def test_locked_user_cannot_refresh(db_session, locked_user):
+    token = await RefreshTokenService.issue(db_session, locked_user.id)
+    assert await RefreshTokenService.rotate(db_session, token) is None
+
+
+async def test_password_reset_revokes_refresh_tokens(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    assert await UserService.reset_password(db_session, verified_user.id, "NewPassword123!") is True
+    assert await RefreshTokenService.rotate(db_session, token) is None
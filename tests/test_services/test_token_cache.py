@@ -0,0 +1,116 @@
+import time
+from datetime import timedelta
+import pytest
+from fastapi import HTTPException
+from app import dependencies
+from app.dependencies import get_current_user
+from app.services.jwt_service import create_access_token
+from app.services.token_cache import TokenCache
+from settings.config import override_settings
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_after_put():
+    cache = TokenCache(max_size=2, clock=Clock())
+    assert cache.get("token", "key") is None
+    cache.put("token", "key", {"sub": "1", "exp": 2000})
+    assert cache.get("token", "key") == {"sub": "1", "exp": 2000}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entry_expires_at_exp():
+    clock = Clock()
+    cache = TokenCache(clock=clock)
+    cache.put("token", "key", {"sub": "1", "exp": 1010})
+    clock.now = 1009.9
+    assert cache.get("token", "key") is not None
+    clock.now = 1010
+    assert cache.get("token", "key") is None
+    assert cache.metrics()["size"] == 0
+
+
+def test_rotated_key_misses():
+    cache = TokenCache(clock=Clock())
+    cache.put("token", "old-secret", {"sub": "1", "exp": 2000})
+    assert cache.get("token", "new-secret") is None
+
+
+def test_least_recently_used_is_evicted():
+    cache = TokenCache(max_size=2, clock=Clock())
+    cache.put("a", "key", {"exp": 2000})
+    cache.put("b", "key", {"exp": 2000})
+    cache.get("a", "key")
+    cache.put("c", "key", {"exp": 2000})
+    assert cache.get("b", "key") is None
+    assert cache.get("a", "key") is not None and cache.get("c", "key") is not None
+    assert cache.evictions == 1
+
+
+def test_tokens_without_exp_and_disabled_cache_are_not_stored():
+    cache = TokenCache(clock=Clock())
+    cache.put("token", "key", {"sub": "1"})
+    disabled = TokenCache(max_size=0, clock=Clock())
+    disabled.put("token", "key", {"sub": "1", "exp": 2000})
+    assert cache.get("token", "key") is None and disabled.get("token", "key") is None
+    # A disabled cache does not count lookups, so it reports no misses
+    assert disabled.metrics()["misses"] == 0
+
+
+def test_get_current_user_verifies_each_token_once(monkeypatch):
+    monkeypatch.setattr(dependencies, "_token_cache", TokenCache())
+    calls = []
+    decode = dependencies.decode_token
+    monkeypatch.setattr(dependencies, "decode_token", lambda token: calls.append(token) or decode(token))
+    token = create_access_token(data={"sub": "user-1", "role": "ADMIN"}, expires_delta=timedelta(minutes=5))
+    for _ in range(3):
+        assert get_current_user(token) == {"user_id": "user-1", "role": "ADMIN"}
+    assert len(calls) == 1
+
+
+def test_get_current_user_rejects_cached_token_after_secret_rotation(monkeypatch):
+    monkeypatch.setattr(dependencies, "_token_cache", TokenCache())
+    token = create_access_token(data={"sub": "user-1", "role": "ADMIN"}, expires_delta=timedelta(minutes=5))
+    get_current_user(token)
+    with override_settings(jwt_secret_key="rotated-secret"):
+        with pytest.raises(HTTPException) as exc_info:
+            get_current_user(token)
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.slow
+async def test_benchmark_authenticated_get_throughput(app_client, admin_token, monkeypatch):
+    """Compare authenticated GET throughput, and the cost of get_current_user alone, with the cache on and off."""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    requests, calls = 2000, 50_000
+
+    async def throughput(cache):
+        monkeypatch.setattr(dependencies, "_token_cache", cache)
+        await app_client.get("/metrics", headers=headers)
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await app_client.get("/metrics", headers=headers)
+        assert response.status_code == 200
+        return requests / (time.perf_counter() - started)
+
+    def per_call(cache):
+        monkeypatch.setattr(dependencies, "_token_cache", cache)
+        started = time.perf_counter()
+        for _ in range(calls):
+            get_current_user(admin_token)
+        return (time.perf_counter() - started) / calls
+
+    uncached = await throughput(TokenCache(max_size=0))
+    cache = TokenCache()
+    cached = await throughput(cache)
+    uncached_call, cached_call = per_call(TokenCache(max_size=0)), per_call(TokenCache())
+    print(f"\nauthenticated GET /metrics: cache off {uncached:.0f} req/s | cache on {cached:.0f} req/s"
+          f"\nget_current_user: cache off {uncached_call * 1e6:.1f}us | cache on {cached_call * 1e6:.1f}us")
+    assert cache.hits == requests
+    assert cached_call < uncached_call
@@ -0,0 +1,124 @@
+import json
+import time
+from unittest.mock import patch
+import pytest
+from sqlalchemy import func, select
+from app import cli
+from app.models.email_outbox_model import EmailOutbox
+from app.models.user_model import User, UserRole
+from app.services.email_service import EmailService
+from app.services.password_service import PasswordService
+from app.services.user_import_service import UserImportService
+from app.utils.exports import ExportFormat
+from app.utils.imports import ndjson_records
+from app.utils.security import verify_password
+from app.utils.template_manager import TemplateManager
+
+
+@pytest.fixture
+def email_service():
+    # A real service, which queues to the outbox, rather than conftest's mock
+    return EmailService(template_manager=TemplateManager())
+
+
+@pytest.fixture
+def password_service():
+    service = PasswordService(max_workers=2, executor="thread", rounds=4)
+    yield service
+    service.shutdown()
+
+
+async def _records(*records):
+    for record in records:
+        yield record
+
+
+@pytest.mark.asyncio
+async def test_import_users(db_session, email_service, password_service, user):
+    records = _records(
+        {"email": "ada@example.com", "password": "Secret*123", "first_name": "Ada", "role": "MANAGER"},
+        {"email": "not-an-email", "password": "Secret*123"},
+        {"email": "short@example.com", "password": "short"},
+        {"email": "ada@example.com", "password": "Secret*123"},
+        ValueError("Invalid JSON"),
+        {"email": user.email, "password": "Secret*123"},
+        {"email": "taken@example.com", "password": "Secret*123", "nickname": user.nickname},
+        {"email": "alan@example.com", "password": "Secret*123", "nickname": "alan_t"},
+        {"email": "grace@example.com", "password": "Secret*123"},
+    )
+    report = await UserImportService.import_users(db_session, records, password_service, email_service, batch_size=4)
+
+    assert report["created"] == 3
+    assert [(error["row"], error["error"]) for error in report["errors"]] == [
+        (2, "email: value is not a valid email address: The email address is not valid. It must have exactly one @-sign."),
+        (3, "Password must be at least 8 characters long"),
+        (4, "Duplicate email in import"),
+        (5, "Invalid JSON"),
+        (6, "Email already exists"),
+        (7, "Nickname already taken"),
+    ]
+    assert report["failed"] == 6
+
+    imported = {u.email: u for u in (await db_session.execute(select(User).where(User.email.like("%@example.com")))).scalars()}
+    ada = imported["ada@example.com"]
+    assert ada.role == UserRole.MANAGER and ada.first_name == "Ada" and not ada.email_verified
+    assert ada.nickname and imported["alan@example.com"].nickname == "alan_t"
+    assert verify_password("Secret*123", imported["grace@example.com"].hashed_password)
+    outbox = (await db_session.execute(select(EmailOutbox.recipient))).scalars().all()
+    assert sorted(outbox) == ["ada@example.com", "alan@example.com", "grace@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_import_retries_generated_nickname_collisions(db_session, email_service, password_service, user):
+    # The first allocation hands out a nickname that is already taken; the import retries it
+    allocations = iter([[user.nickname], ["fresh_nickname_1"]])
+
+    async def allocate(session, count):
+        return next(allocations)
+
+    with patch("app.services.user_import_service.UserService.allocate_nicknames", allocate):
+        report = await UserImportService.import_users(
+            db_session, _records({"email": "new@example.com", "password": "Secret*123"}), password_service, email_service
+        )
+    assert report == {"created": 1, "failed": 0, "errors": []}
+    nickname = (await db_session.execute(select(User.nickname).where(User.email == "new@example.com"))).scalar()
+    assert nickname == "fresh_nickname_1"
+
+
+@pytest.mark.asyncio
+async def test_import_users_cli(db_session, tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text("email,password,first_name\ncli@example.com,Secret*123,Cli\nbroken,Secret*123,\n")
+    with patch("app.cli.get_import_password_service", lambda: PasswordService(max_workers=1, rounds=4)):
+        report = await cli.import_users(str(path), ExportFormat.csv)
+    assert report["created"] == 1 and report["errors"][0]["row"] == 2
+    assert (await db_session.execute(select(User.first_name).where(User.email == "cli@example.com"))).scalar() == "Cli"
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_benchmark_import_throughput(db_session, email_service):
+    """
+    Import 10k users through NDJSON parsing, validation, process-pool hashing, COPY and the
+    set-based insert. bcrypt runs at 4 rounds here: at the production cost of 12 each hash
+    takes ~250ms of CPU, which alone caps throughput at ~240 users/minute per core.
+    """
+    rows = 10_000
+    body = b"".join(
+        json.dumps({"email": f"import_{i}@example.com", "password": "Secret*123", "first_name": "Import"}).encode() + b"\n"
+        for i in range(rows)
+    )
+
+    async def chunks():
+        for start in range(0, len(body), 65536):
+            yield body[start:start + 65536]
+
+    service = PasswordService(max_workers=2, max_in_flight=2, executor="process", rounds=4)
+    started = time.perf_counter()
+    report = await UserImportService.import_users(db_session, ndjson_records(chunks()), service, email_service)
+    elapsed = time.perf_counter() - started
+    service.shutdown()
+    print(f"\nimported {report['created']} users in {elapsed:.1f}s, {report['created'] / elapsed * 60:.0f} users/minute")
+    assert report["created"] == rows
+    assert (await db_session.execute(select(func.count()).select_from(EmailOutbox))).scalar() == rows
+    assert report["created"] / elapsed * 60 >= 10_000
@@ -1,7 +1,19 @@
+import asyncio
+import time
+import uuid
 import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import InvalidRequestError
+from app.dependencies import get_password_service
 from app.models.user_model import User, UserRole
+from app.services.email_service import EmailService
 from app.services.user_service import UserService
-from app.utils.nickname_gen import generate_nickname
+from app.utils.cursors import CursorPosition
+from app.utils.nickname_gen import ADJECTIVES, ANIMALS, generate_nickname
+from app.utils.security import hash_password
+from app.utils.template_manager import TemplateManager
+from settings.config import override_settings
+from tests.conftest import AsyncTestingSessionLocal
 
 # Use pytest-asyncio for async tests
 pytestmark = pytest.mark.asyncio
@@ -70,6 +82,20 @@ async def test_update_user_invalid_data(db_session, user):
     with pytest.raises(ValueError, match="Invalid email address"):
         await UserService.update(db_session, user.id, {"email": "invalidemail"})
 
+# Test updating a user who does not exist
+async def test_update_user_does_not_exist(db_session):
+    assert await UserService.update(db_session, "00000000-0000-0000-0000-000000000000", {"first_name": "Nobody"}) is None
+
+# Writes are left for the request to commit: rolling back undoes them
+async def test_writes_are_not_committed_by_the_service(db_session, user, verified_user):
+    deleted_id, updated_id = user.id, verified_user.id
+    assert await UserService.delete(db_session, deleted_id) is True
+    assert await UserService.update(db_session, updated_id, {"first_name": "Rolled"}) is not None
+    assert db_session.in_transaction()
+    await db_session.rollback()
+    assert await db_session.scalar(select(func.count()).select_from(User).where(User.id == deleted_id)) == 1
+    assert await db_session.scalar(select(User.first_name).where(User.id == updated_id)) != "Rolled"
+
 # Test deleting a user who exists
 async def test_delete_user_exists(db_session, user):
     deletion_success = await UserService.delete(db_session, user.id)
@@ -125,6 +151,48 @@ async def test_login_user_incorrect_password(db_session, user):
     user = await UserService.login_user(db_session, user.email, "IncorrectPassword!")
     assert user is None
 
+# Test that a locked account is reported as such, without checking the password
+async def test_authenticate_locked_user(db_session, locked_user):
+    user, locked = await UserService.authenticate(db_session, locked_user.email, "MySuperPassword$1234")
+    assert user is None and locked is True
+
+async def _guess_concurrently(email, attempts):
+    async def guess():
+        async with AsyncTestingSessionLocal() as session:
+            return await UserService.authenticate(session, email, "WrongPassword!")
+    return await asyncio.gather(*[guess() for _ in range(attempts)])
+
+# Test that concurrent wrong-password logins are all counted
+async def test_concurrent_failed_logins_are_counted_exactly(db_session, verified_user):
+    verified_user.hashed_password = hash_password("MySuperPassword$1234", rounds=4)
+    await db_session.commit()
+    with override_settings(max_login_attempts=1000):
+        results = await _guess_concurrently(verified_user.email, 100)
+    assert all(user is None for user, _ in results)
+    await db_session.refresh(verified_user)
+    assert verified_user.failed_login_attempts == 100
+    assert not verified_user.is_locked
+
+# Test that concurrent guesses lock the account after exactly max_login_attempts failures
+async def test_concurrent_failed_logins_lock_at_the_limit(db_session, verified_user):
+    verified_user.hashed_password = hash_password("MySuperPassword$1234", rounds=4)
+    await db_session.commit()
+    with override_settings(max_login_attempts=10):
+        await _guess_concurrently(verified_user.email, 100)
+    await db_session.refresh(verified_user)
+    assert verified_user.is_locked
+    assert verified_user.failed_login_attempts == 10
+    user, locked = await UserService.authenticate(db_session, verified_user.email, "MySuperPassword$1234")
+    assert user is None and locked is True
+
+# Test that a projection loads only the requested columns and refuses to lazy load the rest
+async def test_get_by_id_with_columns(db_session, user):
+    db_session.expunge_all()
+    fetched = await UserService.get_by_id(db_session, user.id, columns=["nickname", "email"])
+    assert fetched.nickname == user.nickname and fetched.id == user.id
+    with pytest.raises(InvalidRequestError):
+        fetched.hashed_password
+
 # Test resetting a user's password
 async def test_reset_password(db_session, user):
     new_password = "NewPassword123!"
@@ -145,3 +213,129 @@ async def test_unlock_user_account(db_session, locked_user):
     assert unlocked is True
     refreshed_user = await UserService.get_by_id(db_session, locked_user.id)
     assert not refreshed_user.is_locked
+
+# Test walking the user list with keyset cursors in both directions
+async def test_list_users_by_cursor(db_session, users_with_same_role_50_users):
+    page_1, has_more = await UserService.list_users_by_cursor(db_session, limit=20)
+    assert len(page_1) == 20 and has_more
+    last = page_1[-1]
+    page_2, has_more = await UserService.list_users_by_cursor(db_session, limit=20, position=CursorPosition(last.created_at, last.id))
+    assert len(page_2) == 20 and has_more
+    last = page_2[-1]
+    page_3, has_more = await UserService.list_users_by_cursor(db_session, limit=20, position=CursorPosition(last.created_at, last.id))
+    assert len(page_3) == 10 and not has_more
+    seen = [user.id for user in page_1 + page_2 + page_3]
+    assert len(set(seen)) == 50
+
+    first = page_3[0]
+    back, has_more = await UserService.list_users_by_cursor(db_session, limit=20, position=CursorPosition(first.created_at, first.id, backwards=True))
+    assert [user.id for user in back] == [user.id for user in page_2]
+    assert has_more
+
+# Test that nickname allocation skips candidates that are already taken
+async def test_allocate_nickname_skips_taken(db_session, user, monkeypatch):
+    monkeypatch.setattr("app.services.user_service.generate_nicknames", lambda count: [user.nickname, "free_nickname_1"])
+    assert await UserService.allocate_nickname(db_session) == "free_nickname_1"
+
+# Test that nickname allocation gives up when every candidate is taken
+async def test_allocate_nickname_exhausted(db_session, user, monkeypatch):
+    monkeypatch.setattr("app.services.user_service.generate_nicknames", lambda count: [user.nickname])
+    with pytest.raises(ValueError, match="Could not allocate a unique nickname"):
+        await UserService.allocate_nickname(db_session)
+
+# Test that creation retries with a new nickname when the chosen one was claimed concurrently
+async def test_create_retries_nickname_conflict(db_session, admin_user, email_service, monkeypatch):
+    async def allocate(session, batch_size=16):
+        return "retry_nickname_1"
+
+    monkeypatch.setattr("app.services.user_service.generate_nickname", lambda: admin_user.nickname)
+    monkeypatch.setattr(UserService, "allocate_nickname", allocate)
+    created = await UserService.create(db_session, {
+        "nickname": "ignored", "email": "conflict@example.com", "password": "ValidPassword123!",
+    }, email_service)
+    assert created.nickname == "retry_nickname_1"
+    assert created.role == UserRole.ANONYMOUS
+
+# Test that a taken email is reported by the insert itself, without a lookup up front
+async def test_create_duplicate_email(db_session, user, email_service):
+    with pytest.raises(ValueError, match="User with the given email already exists"):
+        await UserService.create(db_session, {
+            "nickname": "dupe", "email": user.email, "password": "ValidPassword123!",
+        }, email_service)
+
+# Test that the first user becomes a verified admin in a single INSERT
+async def test_create_first_user_statement_count(db_session, email_service, statement_counter):
+    created = await UserService.create(db_session, {
+        "nickname": "first", "email": "first_admin@example.com", "password": "ValidPassword123!",
+    }, email_service)
+    assert created.role == UserRole.ADMIN
+    assert created.email_verified and created.verification_token is None
+    assert [s.split()[0] for s in statement_counter] == ["INSERT"]
+
+# Test that later registrations take one INSERT for the user and one for the queued email
+async def test_create_user_statement_count(db_session, admin_user, statement_counter):
+    created = await UserService.create(db_session, {
+        "nickname": "second", "email": "second_user@example.com", "password": "ValidPassword123!",
+    }, EmailService(template_manager=TemplateManager()))
+    assert created.role == UserRole.ANONYMOUS
+    assert not created.email_verified and created.verification_token
+    assert [s.split()[:3] for s in statement_counter] == [["INSERT", "INTO", "users"], ["INSERT", "INTO", "email_outbox"]]
+
+async def _seed_users(session, count):
+    """Bulk-insert `count` users whose nicknames fill the generator's namespace densely."""
+    adjectives = "ARRAY[" + ",".join(f"'{a}'" for a in ADJECTIVES) + "]"
+    animals = "ARRAY[" + ",".join(f"'{a}'" for a in ANIMALS) + "]"
+    a, b = len(ADJECTIVES), len(ANIMALS)
+    await session.execute(text(f"""
+        INSERT INTO users (id, nickname, email, role, hashed_password, email_verified, created_at)
+        SELECT gen_random_uuid(),
+               ({adjectives})[1 + g % {a}] || '_' || ({animals})[1 + (g / {a}) % {b}] || '_' || (g / {a * b}),
+               'seed' || g || '@example.com', 'AUTHENTICATED'::"UserRole", 'x', true, now()
+        FROM generate_series(0, {count - 1}) AS g
+    """))
+    await session.commit()
+
+@pytest.mark.slow
+@pytest.mark.parametrize("existing_users", [10_000, 100_000, 1_000_000])
+async def test_benchmark_create_latency(db_session, email_service, existing_users):
+    """Registration latency with the batch nickname allocator at different table sizes."""
+    await _seed_users(db_session, existing_users)
+    password_service = get_password_service()
+    rounds, password_service.rounds = password_service.rounds, 4  # keep bcrypt out of the measurement
+    try:
+        durations = []
+        for i in range(50):
+            started = time.perf_counter()
+            user = await UserService.create(db_session, {
+                "nickname": "bench", "email": f"bench{i}@example.com", "password": "ValidPassword123!",
+            }, email_service)
+            durations.append(time.perf_counter() - started)
+            assert user is not None
+    finally:
+        password_service.rounds = rounds
+    durations.sort()
+    print(f"\ncreate with {existing_users} users: median={durations[25] * 1000:.1f}ms p99={durations[-1] * 1000:.1f}ms")
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_by_ids_in_chunks(db_session, user, verified_user, locked_user, round_trips):
+    missing = uuid.uuid4()
+    ids = [user.id, missing, verified_user.id, locked_user.id]
+    round_trips.clear()
+    affected = await UserService.bulk_update(db_session, {"is_locked": True}, ids=ids, chunk_size=2)
+    assert set(affected) == {user.id, verified_user.id, locked_user.id}
+    updates = [statement for statement in round_trips if statement.startswith("UPDATE users")]
+    assert len(updates) == 2 and all("= ANY (" in statement for statement in updates)
+    locked = (await db_session.execute(select(User.id).where(User.is_locked))).scalars().all()
+    assert set(locked) == set(affected)
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_by_filter(db_session, users_with_same_role_50_users, admin_user):
+    affected = await UserService.bulk_update(db_session, {"role": UserRole.MANAGER}, where=[User.role == UserRole.AUTHENTICATED], chunk_size=7)
+    assert len(affected) == 50 and len(set(affected)) == 50
+    assert (await db_session.execute(select(func.count()).where(User.role == UserRole.MANAGER))).scalar() == 50
+
+    deleted = await UserService.bulk_update(db_session, None, where=[User.role == UserRole.MANAGER], chunk_size=20)
+    assert len(deleted) == 50
+    assert (await db_session.execute(select(User.id))).scalars().all() == [admin_user.id]
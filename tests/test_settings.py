@@ -0,0 +1,48 @@
+import time
+import pytest
+from app.dependencies import get_settings
+from settings import config
+from settings.config import Settings, override_settings, reload_settings
+
+
+def test_get_settings_returns_shared_instance():
+    assert get_settings() is get_settings()
+    assert get_settings() is config.settings
+
+
+def test_override_settings_restores_values():
+    original = get_settings().max_login_attempts
+    with override_settings(max_login_attempts=100) as settings:
+        assert settings.max_login_attempts == 100
+        assert config.settings.max_login_attempts == 100
+    assert get_settings().max_login_attempts == original
+
+
+def test_reload_settings_updates_in_place(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setenv("MAX_LOGIN_ATTEMPTS", "7")
+    try:
+        assert reload_settings() is settings
+        assert config.settings.max_login_attempts == 7
+    finally:
+        monkeypatch.delenv("MAX_LOGIN_ATTEMPTS")
+        reload_settings()
+    assert settings.max_login_attempts == Settings().max_login_attempts
+
+
+@pytest.mark.slow
+def test_benchmark_settings_dependency_resolution():
+    """Per-request cost of resolving settings: building Settings() vs. the shared instance."""
+    iterations = 2000
+    started = time.perf_counter()
+    for _ in range(iterations):
+        Settings()
+    uncached = (time.perf_counter() - started) / iterations
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        get_settings()
+    cached = (time.perf_counter() - started) / iterations
+
+    print(f"\nsettings per call: Settings()={uncached * 1e6:.1f}us get_settings()={cached * 1e6:.3f}us")
+    assert cached < uncached
@@ -0,0 +1,105 @@
+import smtplib
+import time
+import pytest
+from app.utils.smtp_connection import PooledSMTPClient, SMTPClient
+
+
+def _pooled(controller, **kwargs):
+    return PooledSMTPClient("127.0.0.1", controller.port, "pool@example.com", "secret", use_tls=False, **kwargs)
+
+
+def _messages(count):
+    return [("Subject", f"<p>message {i}</p>", f"user{i}@example.com") for i in range(count)]
+
+
+def test_pooled_client_reuses_session(smtp_server):
+    controller, handler = smtp_server
+    client = _pooled(controller, pool_size=2)
+    for subject, html, recipient in _messages(5):
+        client.send_email(subject, html, recipient)
+    assert len(handler.messages) == 5
+    assert client.connections_opened == 1
+    client.close()
+
+
+def test_send_many_spreads_over_sessions(smtp_server):
+    controller, handler = smtp_server
+    client = _pooled(controller, pool_size=3)
+    assert client.send_many(_messages(30)) == 30
+    assert sorted(e.rcpt_tos[0] for e in handler.messages) == sorted(f"user{i}@example.com" for i in range(30))
+    assert client.connections_opened <= 3
+    client.close()
+
+
+def test_send_each_reports_every_outcome_in_order(smtp_server):
+    controller, handler = smtp_server
+
+    async def handle_RCPT(server, session, envelope, address, rcpt_options):
+        if address.startswith("user3@") or address.startswith("user7@"):
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    handler.handle_RCPT = handle_RCPT
+    client = _pooled(controller, pool_size=3)
+    outcomes = client.send_each(_messages(10))
+    assert [i for i, outcome in enumerate(outcomes) if outcome is not None] == [3, 7]
+    assert isinstance(outcomes[3], smtplib.SMTPRecipientsRefused)
+    assert len(handler.messages) == 8
+    client.close()
+
+
+def test_idle_session_is_replaced(smtp_server):
+    controller, handler = smtp_server
+    client = _pooled(controller, pool_size=1, idle_timeout=0.0)
+    client.send_email("Subject", "<p>one</p>", "a@example.com")
+    time.sleep(0.01)
+    client.send_email("Subject", "<p>two</p>", "b@example.com")
+    assert client.connections_opened == 2
+    assert len(handler.messages) == 2
+    client.close()
+
+
+def test_dropped_session_reconnects_transparently(smtp_server):
+    controller, handler = smtp_server
+    client = _pooled(controller, pool_size=1)
+    client.send_email("Subject", "<p>one</p>", "a@example.com")
+    # Simulate the server hanging up on the idle session
+    connection, _ = client._idle[0]
+    connection.sock.close()
+    connection.sock = None
+    client.send_email("Subject", "<p>two</p>", "b@example.com")
+    assert len(handler.messages) == 2
+    assert client.connections_opened == 2
+    client.close()
+
+
+def test_unreachable_server_raises_and_frees_slot():
+    client = PooledSMTPClient("127.0.0.1", 1, "pool@example.com", "secret", use_tls=False, pool_size=1)
+    with pytest.raises(OSError):
+        client.send_email("Subject", "<p>x</p>", "a@example.com")
+    with pytest.raises(OSError):
+        client.send_email("Subject", "<p>x</p>", "a@example.com")
+
+
+@pytest.mark.slow
+def test_benchmark_smtp_throughput(smtp_server):
+    """Messages/second sending 300 emails with a connection per email vs. pooled send_many."""
+    controller, handler = smtp_server
+    messages = _messages(300)
+
+    client = SMTPClient("127.0.0.1", controller.port, "pool@example.com", "secret", use_tls=False)
+    started = time.perf_counter()
+    for subject, html, recipient in messages:
+        client.send_email(subject, html, recipient)
+    unpooled = len(messages) / (time.perf_counter() - started)
+
+    pooled_client = _pooled(controller, pool_size=4)
+    started = time.perf_counter()
+    pooled_client.send_many(messages)
+    pooled = len(messages) / (time.perf_counter() - started)
+    pooled_client.close()
+
+    print(f"\nSMTP throughput: connection per email={unpooled:.0f} msg/s, pooled send_many={pooled:.0f} msg/s")
+    assert len(handler.messages) == 600
+    assert pooled > unpooled
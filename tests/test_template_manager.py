@@ -0,0 +1,86 @@
+import os
+import time
+import markdown2
+import pytest
+from app.utils.template_manager import TemplateManager
+
+
+def legacy_render(manager, template_name, **context):
+    """The original read-format-convert-style pipeline, used as the reference output."""
+    header = manager._read_template('header.md')
+    footer = manager._read_template('footer.md')
+    main_content = manager._read_template(f'{template_name}.md').format(**context)
+    return manager._apply_email_styles(markdown2.markdown(f"{header}\n{main_content}\n{footer}"))
+
+
+@pytest.fixture
+def templates_dir(tmp_path):
+    (tmp_path / 'header.md').write_text("# Welcome {not a field}\n", encoding='utf-8')
+    (tmp_path / 'footer.md').write_text("Thanks, *The Team*\n", encoding='utf-8')
+    (tmp_path / 'greeting.md').write_text("Hello {name},\n\n[Verify]({verification_url}) or use code {{literal}}.\n", encoding='utf-8')
+    return tmp_path
+
+
+def test_render_matches_legacy_output():
+    manager = TemplateManager()
+    context = {"name": "Jane", "verification_url": "http://example.com/verify/1/abc", "email": "jane@example.com"}
+    assert manager.render_template('email_verification', **context) == legacy_render(manager, 'email_verification', **context)
+
+
+def test_render_substitutes_fields_and_keeps_literal_braces(templates_dir):
+    manager = TemplateManager(templates_dir)
+    context = {"name": "Jane", "verification_url": "http://example.com/verify"}
+    html = manager.render_template('greeting', **context)
+    assert html == legacy_render(manager, 'greeting', **context)
+    assert '<a href="http://example.com/verify"' in html
+    assert '{not a field}' in html and '{literal}' in html
+
+
+def test_missing_context_raises_key_error(templates_dir):
+    with pytest.raises(KeyError):
+        TemplateManager(templates_dir).render_template('greeting', name="Jane")
+
+
+def test_missing_template_raises(templates_dir):
+    with pytest.raises(FileNotFoundError, match="absent.md"):
+        TemplateManager(templates_dir).render_template('absent')
+
+
+def test_compiled_template_is_cached_until_file_changes(templates_dir, monkeypatch):
+    manager = TemplateManager(templates_dir)
+    manager.precompile()
+    compiles = []
+    original = manager._compile
+    monkeypatch.setattr(manager, '_compile', lambda name: compiles.append(name) or original(name))
+
+    manager.render_template('greeting', name="Jane", verification_url="http://x")
+    assert compiles == []
+
+    body = templates_dir / 'greeting.md'
+    body.write_text("Bye {name}\n", encoding='utf-8')
+    stat = body.stat()
+    os.utime(body, (stat.st_atime, stat.st_mtime + 5))
+    assert 'Bye Jane' in manager.render_template('greeting', name="Jane")
+    assert compiles == ['greeting']
+
+
+@pytest.mark.slow
+def test_benchmark_template_renders_per_second():
+    """Renders/second of the verification email: original pipeline vs. compiled template."""
+    manager = TemplateManager()
+    context = {"name": "Jane", "verification_url": "http://example.com/verify/1/abc", "email": "jane@example.com"}
+    iterations = 500
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        legacy_render(manager, 'email_verification', **context)
+    legacy = iterations / (time.perf_counter() - started)
+
+    manager.precompile(['email_verification'])
+    started = time.perf_counter()
+    for _ in range(iterations):
+        manager.render_template('email_verification', **context)
+    compiled = iterations / (time.perf_counter() - started)
+
+    print(f"\nverification email renders/s: legacy={legacy:.0f} compiled={compiled:.0f}")
+    assert compiled > legacy